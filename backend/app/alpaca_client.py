@@ -1,14 +1,14 @@
 # Alpaca API wrapper
 # This file will contain the Alpaca API client implementation for fetching account data, positions, and trade history 
 
-from alpaca.trading.client import TradingClient
-from alpaca.data import StockHistoricalDataClient
-from alpaca.trading.requests import MarketOrderRequest, TakeProfitRequest, StopLossRequest, LimitOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+# The alpaca SDK request/enum types are imported inside the functions that build requests:
+# loading them costs ~0.5s, which API workers and bot jobs shouldn't pay before the first order.
 from dotenv import load_dotenv
-import pandas as pd
+from app.bars import BarArray
+from app.clients import registry
+from app.journal import journal
+from app.ledger import ledger
+from app.metrics import span
 import os
 from datetime import datetime, timedelta
 
@@ -16,22 +16,15 @@ load_dotenv()
 
 #Utility functions
 def get_trading_client():
-    api_key = os.getenv('APCA-API-KEY-ID')
-    secret_key = os.getenv('APCA-API-SECRET-KEY')
-    
-    if not api_key or not secret_key:
-        raise ValueError("Missing Alpaca API credentials")
-    
-    return TradingClient(api_key, secret_key, paper=True)
+    # Shared keep-alive client, see app/clients.py
+    return registry.trading()
 
 def get_data_client():
-    api_key = os.getenv('APCA-API-KEY-ID')
-    secret_key = os.getenv('APCA-API-SECRET-KEY')
-    
-    if not api_key or not secret_key:
-        raise ValueError("Missing Alpaca API credentials")
-    
-    return StockHistoricalDataClient(api_key, secret_key)
+    return registry.data()
+
+def get_client_stats():
+    """Connection pool reuse / handshake counters"""
+    return registry.stats()
 
 # Account
 def get_account():
@@ -47,12 +40,16 @@ def get_account():
     return info
 
 def get_positions():
+    if ledger.live:
+        return ledger.all_positions()
     trading_client = get_trading_client()
     positions = trading_client.get_all_positions()
 
     return positions
 
 def get_orders(): 
+    if ledger.live:
+        return ledger.open_orders()
     trading_client = get_trading_client()
     orders = trading_client.get_orders()
 
@@ -60,6 +57,8 @@ def get_orders():
 
 #Place Orders
 def market_order(symbol: str, qty: int, side: str):
+    from alpaca.trading.requests import MarketOrderRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
     order_data = MarketOrderRequest(
         symbol=symbol.upper(),
         qty=qty,
@@ -71,6 +70,8 @@ def market_order(symbol: str, qty: int, side: str):
 def limit_order(symbol: str, qty: int, side: str, limit_price: float):
     if not limit_price or limit_price <= 0:
         raise ValueError("Limit price must be positive")
+    from alpaca.trading.requests import LimitOrderRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
     
     order_data = LimitOrderRequest(
         symbol=symbol.upper(),
@@ -85,6 +86,8 @@ def limit_order(symbol: str, qty: int, side: str, limit_price: float):
 def bracket_order(symbol: str, qty: int, side: str, 
                        stop_loss: float, take_profit: float, 
                        order_type: str = "market", limit_price: float = None):
+    from alpaca.trading.requests import MarketOrderRequest, LimitOrderRequest, StopLossRequest, TakeProfitRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
     # Build the main order first
     if order_type == "market":
         main_order = MarketOrderRequest(
@@ -117,6 +120,8 @@ def bracket_order(symbol: str, qty: int, side: str,
 
 
 def stop_loss(symbol: str, qty: int, stop_price: float):
+    from alpaca.trading.requests import StopLossRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
     order_data = StopLossRequest(
         symbol=symbol.upper(),
         qty=qty,
@@ -127,6 +132,8 @@ def stop_loss(symbol: str, qty: int, stop_price: float):
     return submit_order(order_data)
 
 def take_profit(symbol: str, qty: int, limit_price: float):
+    from alpaca.trading.requests import TakeProfitRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce
     order_data = TakeProfitRequest(
         symbol=symbol.upper(),
         qty=qty,
@@ -141,34 +148,62 @@ def take_profit(symbol: str, qty: int, limit_price: float):
 def submit_order(order_data):
     client = get_trading_client()
     order = client.submit_order(order_data)
-    
-    # Print order details for debugging
-    for property_name, value in order:
-        print(f'"{property_name}": {value}')
-    
+    journal.record_order(ledger.apply_order(order))
     return order
 
 def cancel_order_by_id(order_id: str):
     # Cancel a pending order
     client = get_trading_client()
-    order = client.get_order_by_id(order_id)
-    if order.status in ['filled', 'canceled', 'expired', 'rejected']:
-        return {"message": f"Order {order_id} cannot be cancelled (status: {order.status})"}
+    status = ledger.order_status(order_id) if ledger.live else None
+    if status is None:
+        status = client.get_order_by_id(order_id).status
+    if status in ['filled', 'canceled', 'expired', 'rejected']:
+        return {"message": f"Order {order_id} cannot be cancelled (status: {status})"}
     
     # Cancel the order
     client.cancel_order_by_id(order_id)
+    ledger.mark_status(order_id, "pending_cancel")
+    return {"message": f"Order {order_id} cancelled successfully"}
+
+def cancel_order_direct(order_id: str):
+    # Single round-trip cancel: the broker answers 422 when the order is no longer cancelable
+    from alpaca.common.exceptions import APIError
+    client = get_trading_client()
+    try:
+        client.cancel_order_by_id(order_id)
+    except APIError as e:
+        if e.status_code == 422:
+            return {"message": f"Order {order_id} cannot be cancelled ({e.message})"}
+        raise
+    ledger.mark_status(order_id, "pending_cancel")
     return {"message": f"Order {order_id} cancelled successfully"}
         
 
 def get_order_status(order_id: str):
-    # Check order status
+    # Check order status, locally when the ledger is receiving trade updates
+    if ledger.live:
+        status = ledger.order_status(order_id)
+        if status is not None:
+            return status
     client = get_trading_client()
     order = client.get_order_by_id(order_id)
     return order.status
 
 #Market Data
+def get_market_data(symbol: str):
+    """15-minute bars for the dashboard as JSON-friendly records"""
+    return get_15min_bars(symbol).records()
+
 def get_15min_data(symbol: str):
     """Get 15-minute data for technical analysis"""
+    bars = get_15min_bars(symbol)
+    with span("dataframe", symbol):
+        return bars.to_frame()
+
+def get_15min_bars(symbol: str) -> BarArray:
+    """Last 7 days of 15-minute bars as a compact BarArray"""
+    from alpaca.data.requests import StockBarsRequest
+    from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
     client = get_data_client()
     
     bars_request = StockBarsRequest(
@@ -178,26 +213,10 @@ def get_15min_data(symbol: str):
         end=datetime.now()
     )
     
-    bars = client.get_stock_bars(bars_request)
-
-    bar_list = [
-        {
-            "timestamp": bar.timestamp,
-            "open": bar.open,
-            "high": bar.high,
-            "low": bar.low,
-            "close": bar.close,
-            "volume": bar.volume,
-            "trade_count": bar.trade_count,
-            "vwap": bar.vwap,
-            "symbol": bar.symbol
-        }
-        for bar in bars[symbol]  # bars[symbol] is a list of Bar objects
-    ]
-
-    # Now convert to DataFrame
-    df = pd.DataFrame(bar_list)
-    df.set_index('timestamp', inplace=True)
-
-    return df
+    with span("fetch", symbol):
+        bars = client.get_stock_bars(bars_request)
+
+    # Typed columns straight from the SDK bars, no per-bar dicts
+    with span("bars", symbol):
+        return BarArray.from_bars(bars.data.get(symbol, []), symbol)
 
@@ -0,0 +1,194 @@
+# Strategy backends
+# What turns a symbol's technical_data into a trade plan. Every backend returns llm_strategy's
+# dict: a HOLD with a reason, or decision/side/stop_loss/take_profit/confidence plus the
+# technical_context bot.execute_decision reads.
+#
+#   llm     the OpenAI call behind the signal gate and decision cache (strategy.decide)
+#   local   app.local_model: microseconds per symbol, one matrix product for a whole universe
+#
+# STRATEGY_BACKEND picks the one that trades; SHADOW_BACKEND optionally runs the other on the
+# same inputs, never places its orders, and counts and logs where the two disagree.
+
+import logging
+import os
+import threading
+
+import numpy as np
+
+from app.journal import journal
+from app.metrics import span
+
+STRATEGY_BACKEND = os.getenv("STRATEGY_BACKEND", "llm")
+SHADOW_BACKEND = os.getenv("SHADOW_BACKEND") or None
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    """strategy.decide: signal gate, prompt, cached OpenAI call, validated answer"""
+
+    name = "llm"
+
+    def decide(self, technical_data, symbol: str, qty: int):
+        from app.strategy import decide
+        return decide(technical_data, symbol, qty)
+
+    def decide_batch(self, items):
+        """[(technical_data, symbol, qty)] -> [plan]; one call per symbol"""
+        return [self.decide(*item) for item in items]
+
+
+class LocalModelBackend:
+    """Trade plans from the exported local model, loaded from LOCAL_MODEL_PATH on first use"""
+
+    name = "local"
+
+    def __init__(self, model=None, path: str = None):
+        self._model = model
+        self.path = path
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from app.local_model import LocalModel, LOCAL_MODEL_PATH
+                    self._model = LocalModel.load(self.path or LOCAL_MODEL_PATH)
+        return self._model
+
+    def _plan(self, technical_data, symbol: str, probability: float, record: bool = True):
+        from app.strategy import technical_context
+
+        plan = self.model.plan(float(technical_data["current_price"]), probability)
+        if plan["decision"] != "HOLD":
+            plan["technical_context"] = technical_context(technical_data)
+        if record:
+            journal.record_decision(symbol, plan, model=self.model.name, technical_data=technical_data)
+        return plan
+
+    def decide(self, technical_data, symbol: str, qty: int, record: bool = True):
+        with span("local_model", symbol):
+            probability = self.model.probability(technical_data)
+        return self._plan(technical_data, symbol, probability, record)
+
+    def decide_batch(self, items, record: bool = True):
+        """[(technical_data, symbol, qty)] -> [plan], scored in one matrix product"""
+        from app.local_model import raw_row
+
+        if not items:
+            return []
+        with span("local_model"):
+            probabilities = self.model.probabilities([raw_row(t) for t, _, _ in items])
+        return [self._plan(t, symbol, float(p), record) for (t, symbol, _), p in zip(items, probabilities)]
+
+    def decide_features(self, features, symbols, qty: int, record: bool = True):
+        """
+        {symbol: plan} straight from a batch_indicators.compute_features matrix (one row per
+        symbol). Unless recording, held symbols never get a technical_data dict.
+        """
+        from app.batch_indicators import FEATURE_INDEX, feature_dict
+
+        with span("local_model"):
+            probabilities = self.model.probabilities(features)
+        plans = {}
+        threshold = self.model.threshold
+        for symbol, row, p in zip(symbols, np.asarray(features), probabilities):
+            if p < threshold and not record:
+                plans[symbol] = self.model.plan(float(row[FEATURE_INDEX["price"]]), float(p))
+                continue
+            technical_data = feature_dict(row, symbol)
+            technical_data["current_price"] = technical_data["price"]
+            plans[symbol] = self._plan(technical_data, symbol, float(p), record)
+        return plans
+
+
+class ShadowBackend:
+    """Trade on `primary`, run `shadow` on the same inputs and count agreement"""
+
+    def __init__(self, primary, shadow):
+        self.primary = primary
+        self.shadow = shadow
+        self.name = f"{primary.name}+shadow:{shadow.name}"
+        self._lock = threading.Lock()
+        self.counts = {"compared": 0, "agreed": 0, "both_buy": 0, "primary_only": 0,
+                       "shadow_only": 0, "shadow_errors": 0}
+
+    def _compare(self, symbol, plan, shadow_plan):
+        trades, shadow_trades = plan.get("decision") != "HOLD", shadow_plan.get("decision") != "HOLD"
+        with self._lock:
+            self.counts["compared"] += 1
+            if trades == shadow_trades:
+                self.counts["agreed"] += 1
+                self.counts["both_buy"] += trades
+            else:
+                self.counts["primary_only" if trades else "shadow_only"] += 1
+        if trades != shadow_trades:
+            logger.info("Shadow disagreement on %s: %s %s (%s), %s %s (%s)", symbol,
+                        self.primary.name, plan.get("decision"), plan.get("confidence"),
+                        self.shadow.name, shadow_plan.get("decision"), shadow_plan.get("confidence"))
+
+    def _shadow(self, method, *args):
+        try:
+            # A local shadow isn't journaled, it would double the decision history; an LLM shadow
+            # is, like every LLM decision, and so becomes training data for the local model
+            if isinstance(self.shadow, LocalModelBackend):
+                return getattr(self.shadow, method)(*args, record=False)
+            return getattr(self.shadow, method)(*args)
+        except Exception as e:
+            with self._lock:
+                self.counts["shadow_errors"] += 1
+            logger.warning("Shadow backend %s failed: %s", self.shadow.name, e)
+            return None
+
+    def decide(self, technical_data, symbol: str, qty: int):
+        plan = self.primary.decide(technical_data, symbol, qty)
+        shadow_plan = self._shadow("decide", technical_data, symbol, qty)
+        if shadow_plan is not None:
+            self._compare(symbol, plan, shadow_plan)
+        return plan
+
+    def decide_batch(self, items):
+        plans = self.primary.decide_batch(items)
+        shadow_plans = self._shadow("decide_batch", items)
+        if shadow_plans is not None:
+            for (_, symbol, _), plan, shadow_plan in zip(items, plans, shadow_plans):
+                self._compare(symbol, plan, shadow_plan)
+        return plans
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts["agreement"] = counts["agreed"] / counts["compared"] if counts["compared"] else None
+        return counts
+
+
+BACKENDS = {"llm": LLMBackend, "local": LocalModelBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def build_backend(name: str = STRATEGY_BACKEND, shadow: str = SHADOW_BACKEND):
+    backend = BACKENDS[name]()
+    if shadow and shadow != name:
+        backend = ShadowBackend(backend, BACKENDS[shadow]())
+    return backend
+
+
+def get_backend():
+    """Process-wide backend from STRATEGY_BACKEND / SHADOW_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = build_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the process-wide backend (tests, benchmarks, a retrained model); returns the old one"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
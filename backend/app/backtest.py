@@ -0,0 +1,286 @@
+# Event-driven backtester
+# Replays stored 15-minute bars bar by bar through the same decision path as run_bot:
+# technical_data -> signal gate -> prompt -> LLM -> confidence / risk-reward gate, then
+# simulates the bracket order against later bars' high/low. Indicators are updated
+# incrementally and the LLM is swapped for a recorded or deterministic stand-in, so
+# multi-year, multi-symbol runs finish offline in seconds.
+#
+#   cd backend && python -m app.backtest SPY AAPL --llm rules
+
+import argparse
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.bot import confidence_gate
+from app.decision_cache import decision_key
+from app.indicators import IncrementalIndicators
+from app.signal_gate import SignalGate
+from app.strategy import decide, technical_data_from_snapshot, MIN_BARS
+
+
+# LLM stand-ins: anything with respond(prompt, technical_data) -> str. Set uses_prompt = False
+# when the prompt text isn't needed and decide() will pass None instead of formatting it.
+class RuleBasedLLM:
+    """Deterministic stub: buy crossovers and oversold RSI with a fixed-percent bracket"""
+
+    uses_prompt = False
+
+    def __init__(self, stop_pct: float = 0.01, target_pct: float = 0.02, confidence: float = 0.6):
+        self.stop_pct = stop_pct
+        self.target_pct = target_pct
+        self.confidence = confidence
+
+    def respond(self, prompt, technical_data):
+        if not (technical_data["crossover_detected"] or technical_data["rsi_zone"] == "oversold"):
+            return "HOLD"
+        price = float(technical_data["current_price"])
+        return json.dumps({
+            "side": "buy",
+            "order_type": "market",
+            "stop_loss": round(price * (1 - self.stop_pct), 2),
+            "take_profit": round(price * (1 + self.target_pct), 2),
+            "confidence": self.confidence,
+            "reasoning": "rule-based stub",
+        })
+
+
+class RecordedLLM:
+    """Replays LLM answers recorded by RecordingLLM, keyed on the quantized technical_data"""
+
+    uses_prompt = False
+
+    def __init__(self, path: str, default: str = "HOLD"):
+        self.default = default
+        self.responses = {}
+        self.misses = 0
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record["key"]] = record["response"]
+
+    def respond(self, prompt, technical_data):
+        response = self.responses.get(decision_key(technical_data))
+        if response is None:
+            self.misses += 1
+            return self.default
+        return response
+
+
+class RecordingLLM:
+    """Wraps a live responder (e.g. the OpenAI call) and appends every answer to a JSONL file"""
+
+    def __init__(self, path: str, ask=None):
+        if ask is None:
+            from app.strategy import ask_llm as ask
+        self.ask = ask
+        self.path = path
+
+    def respond(self, prompt, technical_data):
+        response = self.ask(prompt)
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"key": decision_key(technical_data), "response": response}) + "\n")
+        return response
+
+
+def _times(bars):
+    return bars.index if isinstance(bars, pd.DataFrame) else bars["timestamp"]
+
+
+class Backtester:
+    """Bar-by-bar simulation of run_bot's decisions and bracket-order exits"""
+
+    def __init__(self, llm=None, qty: int = 1, initial_cash: float = 100000.0,
+                 slippage_bps: float = 0.0, min_bars: int = MIN_BARS, indicator_params=None,
+                 confidence_scale: float = 1.0, gate: SignalGate = None):
+        self.llm = llm or RuleBasedLLM()
+        # A gate of its own: backtest bars must not move the live pass-rate / savings stats
+        self.gate = gate or SignalGate()
+        self.qty = qty
+        self.initial_cash = initial_cash
+        self.slippage = slippage_bps / 10000
+        self.min_bars = min_bars
+        self.indicator_params = indicator_params or {}
+        self.confidence_scale = confidence_scale
+
+    def _fill(self, price: float, side: str, entering: bool) -> float:
+        # Slippage always works against us
+        worse = (side == "buy") == entering
+        return price * (1 + self.slippage) if worse else price * (1 - self.slippage)
+
+    def run_symbol(self, symbol: str, bars, start_time=None):
+        """
+        Simulate one symbol over a bars DataFrame, or a dict of column arrays with a
+        "timestamp" column (see app.sweep). Bars before `start_time` only warm up the
+        indicators. Returns (trades, per-bar mark-to-market P&L array).
+        """
+        opens = np.asarray(bars["open"], dtype=np.float64).tolist()
+        highs = np.asarray(bars["high"], dtype=np.float64).tolist()
+        lows = np.asarray(bars["low"], dtype=np.float64).tolist()
+        closes = np.asarray(bars["close"], dtype=np.float64).tolist()
+        volumes = np.asarray(bars["volume"], dtype=np.float64).tolist()
+        times = _times(bars)
+        first = 0 if start_time is None else int(np.searchsorted(times, start_time, side="left"))
+
+        engine = IncrementalIndicators(**self.indicator_params)
+        trades = []
+        pnl = np.zeros(len(closes))
+        realized = 0.0
+        position = None  # open trade dict
+        pending = None  # trade plan waiting for the next bar's open
+
+        for i in range(len(closes)):
+            # Market entry from the previous bar's decision fills at this bar's open
+            if pending is not None:
+                position = {
+                    "symbol": symbol,
+                    "side": pending["side"],
+                    "qty": pending["qty"],
+                    "entry_time": times[i],
+                    "entry_price": self._fill(opens[i], pending["side"], True),
+                    "stop_loss": pending["stop_loss"],
+                    "take_profit": pending["take_profit"],
+                    "confidence": pending.get("confidence"),
+                }
+                pending = None
+
+            if position is not None:
+                exit_price, reason = self._check_exit(position, opens[i], highs[i], lows[i])
+                if exit_price is not None:
+                    realized += self._close(position, times[i], exit_price, reason, trades)
+                    position = None
+
+            engine.update(closes[i], volumes[i])
+            unrealized = 0.0 if position is None else self._pnl(position, closes[i])
+            pnl[i] = realized + unrealized
+
+            # Like the live bot, only look for entries when flat and with enough history
+            if position is not None or i < first or engine.bars < self.min_bars or i == len(closes) - 1:
+                continue
+
+            technical_data = technical_data_from_snapshot(engine.snapshot(), symbol)
+            decision = decide(technical_data, symbol, self.qty, llm=self.llm, gate=self.gate)
+            if decision.get("decision") == "HOLD":
+                continue
+            try:
+                _, rejection = confidence_gate(decision, self.confidence_scale)
+            except (KeyError, TypeError, ZeroDivisionError):
+                continue
+            if rejection is None:
+                pending = {**decision, "qty": decision.get("qty", self.qty), "side": decision.get("side", "buy").lower()}
+
+        if position is not None:
+            realized += self._close(position, times[-1], closes[-1], "end_of_data", trades)
+            pnl[-1] = realized
+        return trades, pnl
+
+    @staticmethod
+    def _check_exit(position, open_, high, low):
+        """Bracket legs against this bar; gaps fill at the open, stop wins if both are touched"""
+        stop, target = position["stop_loss"], position["take_profit"]
+        if position["side"] == "buy":
+            if open_ <= stop:
+                return open_, "stop_loss"
+            if open_ >= target:
+                return open_, "take_profit"
+            if low <= stop:
+                return stop, "stop_loss"
+            if high >= target:
+                return target, "take_profit"
+        else:
+            if open_ >= stop:
+                return open_, "stop_loss"
+            if open_ <= target:
+                return open_, "take_profit"
+            if high >= stop:
+                return stop, "stop_loss"
+            if low <= target:
+                return target, "take_profit"
+        return None, None
+
+    @staticmethod
+    def _pnl(position, price):
+        direction = 1 if position["side"] == "buy" else -1
+        return (price - position["entry_price"]) * position["qty"] * direction
+
+    def _close(self, position, time, price, reason, trades):
+        price = self._fill(price, position["side"], False)
+        pnl = self._pnl(position, price)
+        trades.append({**position, "exit_time": time, "exit_price": price, "exit_reason": reason, "pnl": pnl})
+        return pnl
+
+    def run(self, bars, start_time=None):
+        """Backtest {symbol: bars} and return a BacktestResult"""
+        trades = []
+        curves = []
+        for symbol, data in bars.items():
+            times = _times(data)
+            if len(times) == 0:
+                continue
+            symbol_trades, pnl = self.run_symbol(symbol, data, start_time)
+            trades.extend(symbol_trades)
+            curves.append(pd.Series(pnl, index=times, name=symbol))
+
+        if curves:
+            # Carry each symbol's P&L forward across timestamps where it has no bar
+            combined = pd.concat(curves, axis=1).sort_index().ffill().fillna(0.0).sum(axis=1)
+        else:
+            combined = pd.Series(dtype=np.float64)
+        return BacktestResult(trades, self.initial_cash + combined, self.initial_cash)
+
+
+class BacktestResult:
+    """Trade log, equity curve and summary statistics of a backtest"""
+
+    def __init__(self, trades, equity: pd.Series, initial_cash: float):
+        self.trades = pd.DataFrame(trades)
+        self.equity = equity
+        self.initial_cash = initial_cash
+
+    @property
+    def drawdown(self) -> pd.Series:
+        return self.equity - self.equity.cummax()
+
+    def summary(self):
+        pnl = self.trades["pnl"] if len(self.trades) else pd.Series(dtype=np.float64)
+        wins = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        peak = self.equity.cummax() if len(self.equity) else self.equity
+        return {
+            "trades": int(len(pnl)),
+            "total_pnl": float(pnl.sum()),
+            "return_pct": float(pnl.sum() / self.initial_cash * 100),
+            "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+            "profit_factor": float(wins / losses) if losses else (math.inf if wins else 0.0),
+            "max_drawdown": float(-self.drawdown.min()) if len(self.equity) else 0.0,
+            "max_drawdown_pct": float(-(self.drawdown / peak).min() * 100) if len(self.equity) else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the bot over bars in the local bar store")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--llm", default="rules", help="'rules' or a JSONL file recorded by RecordingLLM")
+    parser.add_argument("--qty", type=int, default=1)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--trades", help="write the trade log to this CSV")
+    args = parser.parse_args()
+
+    from app.bar_store import get_store
+
+    store = get_store()
+    bars = {symbol.upper(): store.frame(symbol) for symbol in args.symbols}
+    llm = RuleBasedLLM() if args.llm == "rules" else RecordedLLM(args.llm)
+    result = Backtester(llm=llm, qty=args.qty, slippage_bps=args.slippage_bps).run(bars)
+
+    for key, value in result.summary().items():
+        print(f"{key:>18}: {value}")
+    if args.trades:
+        result.trades.to_csv(args.trades, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# Local columnar bar store
+# Persists bars per symbol as append-only column files read back through np.memmap, and only
+# asks Alpaca for the missing tail since the last stored bar. Many symbols share one
+# StockBarsRequest, so a bot cycle costs one small delta request instead of a week of bars each.
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.bars import BarArray, _epoch
+from app.clients import registry
+from app.metrics import span
+
+# column -> dtype; timestamps are UTC epoch seconds of the bar open
+COLUMNS = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "trade_count": np.float64,
+    "vwap": np.float64,
+}
+BAR_COLUMNS = [c for c in COLUMNS if c != "timestamp"]
+
+DEFAULT_ROOT = os.getenv("BAR_STORE_DIR", os.path.join("data", "bars"))
+DEFAULT_LOOKBACK = timedelta(days=7)
+# Symbols per StockBarsRequest, keeps the query string a sane length
+BATCH_SIZE = 100
+# "15min" downloads 15-minute bars; "1min" resamples them from 1-minute bars (app.timeframes)
+BAR_SOURCE = os.getenv("BAR_SOURCE", "15min")
+
+
+class BarStore:
+    """Append-only, memory-mapped bar history for one timeframe"""
+
+    def __init__(self, root: str = DEFAULT_ROOT, minutes: int = 15):
+        self.minutes = minutes
+        self.root = os.path.join(root, f"{minutes}min")
+        self.requests = 0
+        # symbol -> last cutoff already asked for; a symbol without new bars (halted, illiquid)
+        # then joins the others' delta window instead of re-requesting its own every cycle
+        self._checked = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def timeframe(self) -> "TimeFrame":
+        from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+        return TimeFrame(amount=self.minutes, unit=TimeFrameUnit.Minute)
+
+    def _path(self, symbol: str, column: str) -> str:
+        return os.path.join(self.root, symbol.upper(), f"{column}.bin")
+
+    def symbols(self):
+        return sorted(os.listdir(self.root))
+
+    def count(self, symbol: str) -> int:
+        """Number of complete bars stored for `symbol`"""
+        sizes = []
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, column)
+            if not os.path.exists(path):
+                return 0
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        # A crash mid-append can leave columns uneven; only the common prefix is valid
+        return min(sizes)
+
+    def last_timestamp(self, symbol: str):
+        """Open time of the newest stored bar (epoch seconds) or None"""
+        n = self.count(symbol)
+        if n == 0:
+            return None
+        return int(self._column(symbol, "timestamp", n)[-1])
+
+    def _column(self, symbol: str, column: str, n: int):
+        if n == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._path(symbol, column), dtype=COLUMNS[column], mode="r", shape=(n,))
+
+    def columns(self, symbol: str, since: int = None):
+        """Zero-copy memmap views of every column, optionally from epoch second `since`"""
+        n = self.count(symbol)
+        data = {column: self._column(symbol, column, n) for column in COLUMNS}
+        if since is not None:
+            start = int(np.searchsorted(data["timestamp"], since, side="left"))
+            data = {column: values[start:] for column, values in data.items()}
+        return data
+
+    def rows(self, symbol: str, start: int, stop: int):
+        """Copies of bars [start, stop) of every column, read directly instead of memory-mapped"""
+        data = {}
+        for column, dtype in COLUMNS.items():
+            dtype = np.dtype(dtype)
+            data[column] = np.fromfile(self._path(symbol, column), dtype=dtype, count=max(stop - start, 0),
+                                       offset=start * dtype.itemsize) if stop > start else np.empty(0, dtype)
+        return data
+
+    def append(self, symbol: str, bars):
+        """Append bars (dicts or SDK Bar objects, oldest first) newer than the last stored bar"""
+        last = self.last_timestamp(symbol)
+        rows = {column: [] for column in COLUMNS}
+        for bar in bars:
+            get = bar.get if isinstance(bar, dict) else lambda key: getattr(bar, key)
+            ts = _epoch(get("timestamp"))
+            if last is not None and ts <= last:
+                continue
+            last = ts
+            rows["timestamp"].append(ts)
+            for column in BAR_COLUMNS:
+                value = get(column)
+                rows[column].append(np.nan if value is None else value)
+
+        if not rows["timestamp"]:
+            return 0
+        return self.append_columns(symbol, rows)
+
+    def append_columns(self, symbol: str, data):
+        """Append {column: array} bars, oldest first, skipping any not newer than the last stored bar"""
+        timestamps = np.asarray(data["timestamp"], dtype=COLUMNS["timestamp"])
+        last = self.last_timestamp(symbol)
+        keep = slice(None) if last is None else timestamps > last
+        timestamps = timestamps[keep]
+        if len(timestamps) == 0:
+            return 0
+
+        os.makedirs(os.path.dirname(self._path(symbol, "timestamp")), exist_ok=True)
+        n = self.count(symbol)
+        # Timestamps are written last so a partial append is ignored by count()
+        for column in BAR_COLUMNS + ["timestamp"]:
+            values = timestamps if column == "timestamp" else np.asarray(data[column], dtype=COLUMNS[column])[keep]
+            path = self._path(symbol, column)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.truncate(n * np.dtype(COLUMNS[column]).itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        return len(timestamps)
+
+    def sync(self, symbols, client=None, lookback: timedelta = DEFAULT_LOOKBACK, end: datetime = None):
+        """
+        Fetch only the missing tail for each symbol, batching symbols that share a start time.
+        Bars whose period hasn't closed yet are not stored. Returns new bars per symbol.
+        """
+        symbols = [s.upper() for s in symbols]
+        end = end or datetime.now(timezone.utc)
+        step = self.minutes * 60
+        # Open time of the newest bar that has closed by `end`; later bars are still forming.
+        # Kept on the bar grid so the next sync starts at the bar that was open this time
+        cutoff = (int(end.timestamp()) - step) // step * step
+
+        # The lock covers reading and writing the files, never the download, so concurrent
+        # syncs of different batches overlap; append() drops bars another sync already stored
+        with self._lock:
+            groups = {}
+            for symbol in symbols:
+                last = self.last_timestamp(symbol)
+                start = int((end - lookback).timestamp()) if last is None else last + step
+                if symbol in self._checked:
+                    start = max(start, self._checked[symbol] + step)
+                if start <= cutoff:
+                    groups.setdefault(start, []).append(symbol)
+
+        added = {symbol: 0 for symbol in symbols}
+        if not groups:
+            return added
+
+        client = client or registry.data()
+        from alpaca.data.requests import StockBarsRequest
+        for start, group in sorted(groups.items()):
+            for i in range(0, len(group), BATCH_SIZE):
+                batch = group[i:i + BATCH_SIZE]
+                request = StockBarsRequest(
+                    symbol_or_symbols=batch,
+                    timeframe=self.timeframe,
+                    start=datetime.fromtimestamp(start, tz=timezone.utc),
+                    end=end,
+                )
+                bars = client.get_stock_bars(request)
+                with self._lock:
+                    self.requests += 1
+                    for symbol in batch:
+                        complete = [
+                            bar for bar in bars.data.get(symbol, [])
+                            if bar.timestamp.timestamp() <= cutoff
+                        ]
+                        added[symbol] = self.append(symbol, complete)
+                        self._checked[symbol] = max(self._checked.get(symbol, cutoff), cutoff)
+        return added
+
+    def frame(self, symbol: str, since: int = None) -> "pd.DataFrame":
+        """Bars as the DataFrame shape get_15min_data returns, built straight from the columns"""
+        import pandas as pd
+        data = self.columns(symbol, since)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(data["timestamp"]), unit="s", utc=True), name="timestamp")
+        df = pd.DataFrame({column: np.asarray(data[column]) for column in BAR_COLUMNS}, index=index)
+        df["symbol"] = symbol.upper()
+        return df
+
+    def bars(self, symbol: str, since: int = None) -> BarArray:
+        """Bars as a BarArray; prices stay memory-mapped, counts are converted to int64"""
+        return BarArray.from_columns(symbol, self.columns(symbol, since))
+
+    def matrix(self, symbols, bars: int, column: str = "close"):
+        """Aligned (symbols x bars) array of the last `bars` values, for app.batch_indicators"""
+        out = np.full((len(symbols), bars), np.nan)
+        dtype = np.dtype(COLUMNS[column])
+        for i, symbol in enumerate(symbols):
+            n = self.count(symbol)
+            if n == 0:
+                continue
+            # Read just the tail of the one column; a memmap per column costs more than the read
+            k = min(n, bars)
+            values = np.fromfile(self._path(symbol, column), dtype=dtype, count=k, offset=(n - k) * dtype.itemsize)
+            if len(values):
+                out[i, -len(values):] = values
+        return out
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BarStore:
+    """Process-wide 15-minute bar store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if BAR_SOURCE == "1min":
+                from app.timeframes import get_timeframes
+                _store = get_timeframes().store(15)
+            else:
+                _store = BarStore()
+        return _store
+
+
+def get_recent_bars(symbol: str, lookback: timedelta = DEFAULT_LOOKBACK, frame: bool = True):
+    """
+    Delta-sync `symbol` and return its trailing window, a cached stand-in for get_15min_data.
+    With frame=False the window comes back as a BarArray, skipping the DataFrame build.
+    """
+    store = get_store()
+    with span("fetch", symbol):
+        store.sync([symbol], lookback=lookback)
+    since = int((datetime.now(timezone.utc) - lookback).timestamp())
+    if not frame:
+        return store.bars(symbol, since=since)
+    with span("dataframe", symbol):
+        return store.frame(symbol, since=since)
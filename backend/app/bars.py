@@ -0,0 +1,176 @@
+# Compact bar container
+# Typed, array-backed OHLCV history for one symbol: int64 epoch-second timestamps, float64 (or
+# float32) prices and int64 volumes in growable numpy buffers. Built straight from the SDK bars
+# without the per-bar dicts and repeated symbol strings, column access returns zero-copy views
+# for the indicator functions, and appends are amortized O(1).
+#
+#   bars = BarArray.from_bars(barset["SPY"], "SPY")
+#   sma_20 = calculate_sma(bars["close"], 20)   # view, no copy
+#   bars.append(bar)                             # new bar from the stream
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "vwap")
+COUNT_COLUMNS = ("volume", "trade_count")
+COLUMNS = ("timestamp",) + PRICE_COLUMNS + COUNT_COLUMNS
+MIN_CAPACITY = 64
+
+
+def _epoch(value) -> int:
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        # RFC 3339 from the REST/stream payloads; naive strings are UTC, as pandas reads them
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+    import pandas as pd
+    return int(pd.Timestamp(value).timestamp())
+
+
+class BarArray:
+    """Growable columnar bar history for one symbol"""
+
+    def __init__(self, symbol: str, capacity: int = 0, price_dtype=np.float64):
+        self.symbol = symbol.upper()
+        self.price_dtype = np.dtype(price_dtype)
+        self._n = 0
+        self._data = self._allocate(max(capacity, 0))
+
+    def _dtype(self, column: str):
+        if column in PRICE_COLUMNS:
+            return self.price_dtype
+        return np.dtype(np.int64)
+
+    def _allocate(self, capacity: int):
+        return {column: np.empty(capacity, dtype=self._dtype(column)) for column in COLUMNS}
+
+    # Construction
+    @classmethod
+    def from_bars(cls, bars, symbol: str, price_dtype=np.float64):
+        """From SDK Bar objects (e.g. BarSet[symbol]), oldest first"""
+        bars = list(bars)
+        n = len(bars)
+        array = cls(symbol, 0, price_dtype)
+        data = {
+            "timestamp": np.fromiter((int(b.timestamp.timestamp()) for b in bars), np.int64, n),
+            "volume": np.fromiter((b.volume for b in bars), np.float64, n).astype(np.int64),
+            "trade_count": np.fromiter((b.trade_count or 0 for b in bars), np.int64, n),
+        }
+        for column in PRICE_COLUMNS:
+            values = (np.nan if getattr(b, column) is None else getattr(b, column) for b in bars)
+            data[column] = np.fromiter(values, array.price_dtype, n)
+        array._data, array._n = data, n
+        return array
+
+    @classmethod
+    def from_records(cls, records, symbol: str, price_dtype=np.float64):
+        """From Alpaca's raw JSON bars ({"t", "o", "h", "l", "c", "v", "n", "vw"})"""
+        records = list(records)
+        n = len(records)
+        array = cls(symbol, 0, price_dtype)
+        data = {
+            "timestamp": np.fromiter((_epoch(r["t"]) for r in records), np.int64, n),
+            "volume": np.fromiter((r["v"] for r in records), np.float64, n).astype(np.int64),
+            "trade_count": np.fromiter((r.get("n", 0) for r in records), np.int64, n),
+        }
+        for column, key in zip(PRICE_COLUMNS, ("o", "h", "l", "c", "vw")):
+            data[column] = np.fromiter((r.get(key, np.nan) for r in records), array.price_dtype, n)
+        array._data, array._n = data, n
+        return array
+
+    @classmethod
+    def from_columns(cls, symbol: str, columns, price_dtype=np.float64):
+        """Wrap existing column arrays (e.g. BarStore.columns); no copy when dtypes already match"""
+        array = cls(symbol, 0, price_dtype)
+        array._data = {c: np.asarray(columns[c], dtype=array._dtype(c)) for c in COLUMNS}
+        array._n = len(array._data["timestamp"])
+        return array
+
+    # Growth
+    @property
+    def capacity(self) -> int:
+        return len(self._data["timestamp"])
+
+    def reserve(self, capacity: int):
+        """Grow the buffers to hold at least `capacity` bars (copies the existing bars once)"""
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, MIN_CAPACITY, self.capacity * 2)
+        data = self._allocate(capacity)
+        for column in COLUMNS:
+            data[column][:self._n] = self._data[column][:self._n]
+        self._data = data
+
+    def append(self, bar):
+        """Append one SDK Bar or dict with timestamp/open/high/low/close/volume/trade_count/vwap"""
+        get = bar.get if isinstance(bar, dict) else lambda key, default=None: getattr(bar, key, default)
+        ts = _epoch(get("timestamp"))
+        if self._n and ts <= self._data["timestamp"][self._n - 1]:
+            return False
+        if self._n == self.capacity:
+            self.reserve(self._n + 1)
+        i = self._n
+        self._data["timestamp"][i] = ts
+        for column in PRICE_COLUMNS:
+            value = get(column)
+            self._data[column][i] = np.nan if value is None else value
+        self._data["volume"][i] = get("volume") or 0
+        self._data["trade_count"][i] = get("trade_count") or 0
+        self._n += 1
+        return True
+
+    def extend(self, bars):
+        """Append bars newer than the last one; returns how many were added"""
+        bars = list(bars)
+        self.reserve(self._n + len(bars))
+        return sum(self.append(bar) for bar in bars)
+
+    # Views
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Zero-copy view of one column"""
+        return self._data[column][:self._n]
+
+    def since(self, ts: int) -> "BarArray":
+        """Bars from epoch second `ts` on, sharing memory with this array"""
+        start = int(np.searchsorted(self["timestamp"], ts, side="left"))
+        return self.tail(self._n - start)
+
+    def tail(self, n: int) -> "BarArray":
+        """The last `n` bars, sharing memory with this array"""
+        view = BarArray(self.symbol, 0, self.price_dtype)
+        start = max(self._n - n, 0)
+        view._data = {c: self._data[c][start:self._n] for c in COLUMNS}
+        view._n = self._n - start
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self[c].nbytes for c in COLUMNS)
+
+    # Conversion
+    def to_frame(self) -> "pd.DataFrame":
+        """DataFrame in the shape get_15min_data has always returned"""
+        import pandas as pd
+        index = pd.DatetimeIndex(pd.to_datetime(self["timestamp"], unit="s", utc=True), name="timestamp")
+        frame = pd.DataFrame({c: self[c] for c in PRICE_COLUMNS[:4] + COUNT_COLUMNS + ("vwap",)}, index=index)
+        frame["symbol"] = self.symbol
+        return frame
+
+    def records(self):
+        """JSON-ready dicts with native Python values, one per bar"""
+        columns = {c: self[c].tolist() for c in COLUMNS}
+        stamps = [datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() for ts in columns["timestamp"]]
+        names = PRICE_COLUMNS[:4] + COUNT_COLUMNS + ("vwap",)
+        return [
+            {"timestamp": stamp, **{c: columns[c][i] for c in names}, "symbol": self.symbol}
+            for i, stamp in enumerate(stamps)
+        ]
@@ -0,0 +1,169 @@
+# Vectorized multi-symbol indicators
+# Computes the same indicators and signals llm_strategy builds per symbol, but for a whole
+# universe at once from an aligned (symbols x bars) matrix of closes and volumes.
+#
+# NaNs follow pandas: a rolling mean is NaN while its window holds a NaN, and an EMA skips NaNs
+# (keeping its last value) without resetting. BarStore.matrix left-pads symbols with shorter
+# histories with NaN, so each row matches the pandas result on that symbol's own bars.
+
+import numpy as np
+
+FEATURES = (
+    "price",
+    "sma_20",
+    "sma_50",
+    "rsi_9",
+    "macd",
+    "signal",
+    "histogram",
+    "price_vs_sma20",
+    "price_vs_sma50",
+    "crossover_detected",
+    "trend_reversal",
+    "rsi_zone",
+    "volume_trend",
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# Codes used in the rsi_zone / volume_trend columns, in the order get_rsi_zone / get_volume_trend check them
+RSI_ZONES = ("oversold", "weak_oversold", "neutral", "weak_overbought", "overbought")
+RSI_ZONE_BOUNDS = np.array([30, 40, 60, 70])
+VOLUME_TRENDS = ("insufficient_data", "decreasing", "stable", "increasing")
+
+
+def rolling_mean(values, period: int):
+    """Row-wise rolling mean, NaN until `period` values are available (matches calculate_sma)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] < period:
+        return out
+    missing = np.isnan(values)
+    # Window sums of the values and of their NaNs; a window with any NaN stays NaN
+    sums = np.cumsum(np.where(missing, 0.0, values), axis=1)
+    gaps = np.cumsum(missing, axis=1)
+    out[:, period - 1] = sums[:, period - 1]
+    out[:, period:] = sums[:, period:] - sums[:, :-period]
+    window_gaps = gaps[:, period - 1:].copy()
+    window_gaps[:, 1:] -= gaps[:, :-period]
+    out[:, period - 1:][window_gaps > 0] = np.nan
+    return out / period
+
+
+def rsi(closes, period: int = 14):
+    """Row-wise RSI from rolling mean gain/loss (matches calculate_rsi)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    delta = np.zeros_like(closes)
+    delta[:, 1:] = np.diff(closes, axis=1)
+    gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def ema(values, span: int):
+    """Row-wise EMA with pandas' adjust=True weighting (matches Series.ewm(span).mean())"""
+    values = np.asarray(values, dtype=np.float64)
+    decay = 1 - 2 / (span + 1)
+    out = np.empty_like(values)
+    numerator = np.zeros(values.shape[0])
+    denominator = np.zeros(values.shape[0])
+    # Sequential over bars, vectorized over symbols
+    for t in range(values.shape[1]):
+        column = values[:, t]
+        valid = ~np.isnan(column)
+        # A NaN adds no weight but still ages the earlier values (pandas' ignore_na=False)
+        numerator = np.where(valid, column, 0.0) + decay * numerator
+        denominator = valid + decay * denominator
+        with np.errstate(invalid="ignore"):
+            out[:, t] = numerator / denominator
+    return out
+
+
+def macd(closes, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Row-wise MACD line, signal line and histogram (matches calculate_macd)"""
+    macd_line = ema(closes, fast) - ema(closes, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def sma_crossover(sma_fast, sma_slow):
+    """Per-symbol detect_sma_crossover on the last two bars"""
+    if sma_fast.shape[1] < 2:
+        return np.zeros(sma_fast.shape[0], dtype=bool)
+    return (sma_fast[:, -2] <= sma_slow[:, -2]) & (sma_fast[:, -1] > sma_slow[:, -1])
+
+
+def trend_reversal(sma_fast, sma_slow):
+    """Per-symbol check_trend_reversal on the last two bars"""
+    if sma_fast.shape[1] < 2:
+        return np.zeros(sma_fast.shape[0], dtype=bool)
+    return (sma_fast[:, -2] >= sma_slow[:, -2]) & (sma_fast[:, -1] < sma_slow[:, -1])
+
+
+def rsi_zone(values):
+    """get_rsi_zone as integer codes into RSI_ZONES"""
+    # NaN sorts past every bound, landing in "overbought" like get_rsi_zone(nan) does
+    return np.searchsorted(RSI_ZONE_BOUNDS, values, side="right")
+
+
+def volume_trend(volumes, recent: int = 10):
+    """get_volume_trend over the last `recent` bars as integer codes into VOLUME_TRENDS"""
+    volumes = np.asarray(volumes, dtype=np.float64)[:, -recent:]
+    codes = np.full(volumes.shape[0], VOLUME_TRENDS.index("stable"))
+    if volumes.shape[1] < 5:
+        codes[:] = VOLUME_TRENDS.index("insufficient_data")
+        return codes
+    recent_avg = volumes[:, -3:].sum(axis=1) / 3
+    earlier_avg = volumes[:, -6:-3].sum(axis=1) / 3
+    codes[recent_avg > earlier_avg * 1.2] = VOLUME_TRENDS.index("increasing")
+    codes[recent_avg < earlier_avg * 0.8] = VOLUME_TRENDS.index("decreasing")
+    return codes
+
+
+def compute_features(closes, volumes, sma_fast: int = 20, sma_slow: int = 50,
+                     rsi_period: int = 9, macd_periods=(12, 26, 9)):
+    """
+    Compute llm_strategy's technical features for every symbol in one pass.
+
+    `closes` and `volumes` are aligned (symbols x bars) arrays, oldest bar first.
+    Returns a (symbols x len(FEATURES)) float64 array; see FEATURES for the columns.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    if closes.ndim != 2 or closes.shape != volumes.shape:
+        raise ValueError("closes and volumes must be aligned (symbols x bars) arrays")
+
+    sma_20 = rolling_mean(closes, sma_fast)
+    sma_50 = rolling_mean(closes, sma_slow)
+    rsi_9 = rsi(closes, rsi_period)
+    macd_line, signal_line, histogram = macd(closes, *macd_periods)
+
+    price = closes[:, -1]
+    features = np.empty((closes.shape[0], len(FEATURES)))
+    features[:, FEATURE_INDEX["price"]] = price
+    features[:, FEATURE_INDEX["sma_20"]] = sma_20[:, -1]
+    features[:, FEATURE_INDEX["sma_50"]] = sma_50[:, -1]
+    features[:, FEATURE_INDEX["rsi_9"]] = rsi_9[:, -1]
+    features[:, FEATURE_INDEX["macd"]] = macd_line[:, -1]
+    features[:, FEATURE_INDEX["signal"]] = signal_line[:, -1]
+    features[:, FEATURE_INDEX["histogram"]] = histogram[:, -1]
+    features[:, FEATURE_INDEX["price_vs_sma20"]] = (price - sma_20[:, -1]) / sma_20[:, -1] * 100
+    features[:, FEATURE_INDEX["price_vs_sma50"]] = (price - sma_50[:, -1]) / sma_50[:, -1] * 100
+    features[:, FEATURE_INDEX["crossover_detected"]] = sma_crossover(sma_20, sma_50)
+    features[:, FEATURE_INDEX["trend_reversal"]] = trend_reversal(sma_20, sma_50)
+    features[:, FEATURE_INDEX["rsi_zone"]] = rsi_zone(rsi_9[:, -1])
+    features[:, FEATURE_INDEX["volume_trend"]] = volume_trend(volumes)
+    return features
+
+
+def feature_dict(row, symbol: str = None):
+    """Decode one feature row into the keys and labels llm_strategy uses in technical_data"""
+    data = {name: float(row[i]) for i, name in enumerate(FEATURES)}
+    data["crossover_detected"] = bool(row[FEATURE_INDEX["crossover_detected"]])
+    data["trend_reversal"] = bool(row[FEATURE_INDEX["trend_reversal"]])
+    data["rsi_zone"] = RSI_ZONES[int(row[FEATURE_INDEX["rsi_zone"]])]
+    data["volume_trend"] = VOLUME_TRENDS[int(row[FEATURE_INDEX["volume_trend"]])]
+    data["sma_20_trend"] = "above" if data["sma_20"] > data["sma_50"] else "below"
+    if symbol is not None:
+        data["symbol"] = symbol
+    return data
@@ -0,0 +1,82 @@
+# Batch order submission and cancellation
+# Fans a list of orders or order IDs out over the broker thread pool with bounded parallelism,
+# so rebalancing many positions costs a few round-trips of wall time instead of one per order.
+# Every call still goes through app.broker, which keeps it inside the upstream request budget.
+# One failed order never fails the batch; each item gets its own result.
+
+import asyncio
+import os
+
+from app.alpaca_client import market_order, limit_order, bracket_order, cancel_order_direct
+from app.broker import broker_call, BROKER_WORKERS, BrokerTimeout
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_ORDER_CONCURRENCY", BROKER_WORKERS))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 500))
+
+
+def order_call(order: dict):
+    """(function, args) placing one batch item; raises ValueError on an unknown type"""
+    kind = order.get("type", "market")
+    symbol, qty, side = order["symbol"], order["qty"], order["side"]
+    if kind == "market":
+        return market_order, (symbol, qty, side)
+    if kind == "limit":
+        return limit_order, (symbol, qty, side, order.get("limit_price"))
+    if kind == "bracket":
+        if order.get("stop_loss") is None or order.get("take_profit") is None:
+            raise ValueError("bracket orders need stop_loss and take_profit")
+        return bracket_order, (
+            symbol, qty, side, order["stop_loss"], order["take_profit"],
+            order.get("order_type", "market"), order.get("limit_price"),
+        )
+    raise ValueError(f"Unknown order type: {kind}")
+
+
+def _error(e: Exception) -> dict:
+    status = getattr(e, "status_code", None)
+    if isinstance(e, BrokerTimeout):
+        status = 504
+    return {"ok": False, "error": str(e), "status_code": status}
+
+
+async def _fan_out(route: str, calls, concurrency: int):
+    """Run (fn, args) pairs under `route`, at most `concurrency` at a time, in input order"""
+    if len(calls) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch of {len(calls)} exceeds the limit of {MAX_BATCH_SIZE}")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, fn, args):
+        async with semaphore:
+            try:
+                return {"index": index, "ok": True, "result": await broker_call(route, fn, *args)}
+            except Exception as e:
+                return {"index": index, **_error(e)}
+
+    return await asyncio.gather(*(run(i, fn, args) for i, (fn, args) in enumerate(calls)))
+
+
+async def submit_batch(orders, concurrency: int = None):
+    """Place every order concurrently; returns one result dict per order"""
+    calls, invalid = [], {}
+    for index, order in enumerate(orders):
+        try:
+            calls.append(order_call(order))
+        except (KeyError, ValueError) as e:
+            invalid[index] = {"index": index, "ok": False, "error": f"Invalid order: {e}", "status_code": 400}
+            calls.append(None)
+
+    valid = [(i, call) for i, call in enumerate(calls) if call is not None]
+    placed = await _fan_out("order-batch", [call for _, call in valid], concurrency or BATCH_CONCURRENCY)
+    results = dict(invalid)
+    for (index, _), result in zip(valid, placed):
+        results[index] = {**result, "index": index}
+    return [results[i] for i in range(len(orders))]
+
+
+async def cancel_batch(order_ids, concurrency: int = None):
+    """Cancel every order concurrently with one broker round-trip each"""
+    results = await _fan_out(
+        "order-cancel-batch", [(cancel_order_direct, (order_id,)) for order_id in order_ids],
+        concurrency or BATCH_CONCURRENCY,
+    )
+    return [{**result, "order_id": order_id} for order_id, result in zip(order_ids, results)]
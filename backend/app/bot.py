@@ -1,26 +1,80 @@
-from tracemalloc import stop
-from alpaca.data import BarSet
-from app.alpaca_client import market_order, bracket_order, get_15min_data
+import logging
+from app.alpaca_client import market_order, bracket_order
+from app.bar_store import get_recent_bars
+from app.ledger import ledger
+from app.metrics import span, symbol_scope, trace_cycle
+from app.risk import portfolio_risk
 from app.strategy import llm_strategy
 
+logger = logging.getLogger(__name__)
+
 def run_bot(symbol="SPY", qty=1):
-    # Get last 10 days of data
-    df = get_15min_data(symbol)
+    with trace_cycle(f"run_bot:{symbol}"), symbol_scope(symbol), span("cycle"):
+        # Last 7 days of 15-minute bars; only the bars since the previous cycle are downloaded
+        bars = get_recent_bars(symbol, frame=False)
 
-    decision = llm_strategy(df, symbol, qty)
+        decision = llm_strategy(bars, symbol, qty)
+        levels = None
+        if decision.get("decision") != "HOLD":
+            # Gate first: sizing reads the account from the broker, so only plans that pass pay for it
+            levels = trade_levels(decision)
+            _, rejection = confidence_gate(decision, levels=levels)
+            if rejection is not None:
+                decision = rejection
+            else:
+                # Share count from the account's risk limits, not the strategy's qty
+                with span("risk", symbol):
+                    decision = portfolio_risk.size_batch([(symbol, decision)])[0]
 
-    if decision.get("decision") == "HOLD":
-        print(f"No trade (HOLD): {decision['reason']}")
-        return decision
+        return execute_decision(decision, symbol, qty, levels)
 
+def trade_levels(decision):
+    """Stop, target, entry price and risk/reward of a trade plan"""
     stop_loss = decision["stop_loss"]
     take_profit = decision["take_profit"]
     entry_price = decision.get("technical_context").get("entry_price")
-    risk_reward = (take_profit - entry_price) / (entry_price - stop_loss)
+    return {
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "entry_price": entry_price,
+        "risk_reward": (take_profit - entry_price) / (entry_price - stop_loss),
+    }
+
+def confidence_gate(decision, scale: float = 1.0, levels=None):
+    """
+    Require confidence >= scale / (1 + risk_reward) for a trade plan.
+    Returns (risk_reward, None) when it passes, or (risk_reward, HOLD decision) when it doesn't.
+    Pass `levels` when trade_levels(decision) is already at hand.
+    """
+    risk_reward = (levels or trade_levels(decision))["risk_reward"]
     confidence = decision.get("confidence")
-    CONFIDENCE_THRESHOLD = 1 / (1 + risk_reward)
+    CONFIDENCE_THRESHOLD = scale / (1 + risk_reward)
     if confidence < CONFIDENCE_THRESHOLD:
-        return {"decision": "HOLD", "reason": f"Confidence {confidence:.2f} below required threshold {CONFIDENCE_THRESHOLD:.2f}"}
+        return risk_reward, {"decision": "HOLD", "reason": f"Confidence {confidence:.2f} below required threshold {CONFIDENCE_THRESHOLD:.2f}"}
+    return risk_reward, None
+
+def execute_decision(decision, symbol, qty=1, levels=None):
+    """
+    Apply the confidence / risk-reward gate to an llm_strategy decision and place the trade.
+    `levels` (from trade_levels) means the caller has already gated the decision.
+    """
+    with span("order", symbol):
+        return _execute_decision(decision, symbol, qty, levels)
+
+def _execute_decision(decision, symbol, qty, levels):
+    if decision.get("decision") == "HOLD":
+        logger.info("No trade for %s (HOLD): %s", symbol, decision["reason"])
+        return decision
+
+    if levels is None:
+        levels = trade_levels(decision)
+        _, rejection = confidence_gate(decision, levels=levels)
+        if rejection is not None:
+            return rejection
+
+    # Pre-trade check against the local ledger, no broker round-trip
+    if ledger.seeded and ledger.open_orders(symbol):
+        return {"decision": "HOLD", "reason": f"{symbol} already has an open order"}
         
     # Extract trade plan
     side = decision["side"]
@@ -31,13 +85,13 @@ def run_bot(symbol="SPY", qty=1):
     confidence = decision.get("confidence", 0.0)
     
     
-    print(f"🚀 Placing {side.upper()} order for {qty} {symbol}")
-    print(f"   Stop Loss: ${stop_loss:.2f}")
-    print(f"   Take Profit: ${take_profit:.2f}")
-    print(f"   Entry Price: {entry_price}")
-    print(f"   Confidence: {confidence:.2f}")
-    print(f"   Reasoning: {reasoning}")
-    print(f"   Risk/Reward Ratio: {risk_reward}")
+    # The decision itself is journaled by the strategy; this is the human-readable trail
+    logger.info(
+        "Placing %s order for %s %s: stop %.2f, target %.2f, entry %s, confidence %.2f, R/R %.2f, position %s. %s",
+        side.upper(), qty, symbol, levels["stop_loss"], levels["take_profit"], levels["entry_price"],
+        confidence, levels["risk_reward"],
+        ledger.position_qty(symbol) if ledger.seeded else "unknown", reasoning,
+    )
     
     # order = bracket_order(
     #     symbol=symbol,
@@ -0,0 +1,93 @@
+# Async execution layer for broker calls
+# The Alpaca SDK is synchronous, so route handlers offload every call to a bounded
+# thread pool instead of blocking the event loop. Each route gets its own concurrency
+# limit and timeout so one slow endpoint can't starve the others.
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.clients import registry
+from app.ratelimit import limiter
+
+# Worker threads default to the HTTP pool size so every worker can hold a keep-alive connection
+BROKER_WORKERS = int(os.getenv("BROKER_WORKERS", registry.pool_size))
+DEFAULT_TIMEOUT = float(os.getenv("BROKER_TIMEOUT", 10))
+
+# route -> (max in-flight broker calls, timeout in seconds)
+ROUTE_LIMITS = {
+    "account": (2, 5.0),
+    "positions": (4, 5.0),
+    "orders": (4, 5.0),
+    "order-status": (4, 5.0),
+    "market-data": (2, 15.0),
+    "order-submit": (4, 10.0),
+    "order-cancel": (4, 10.0),
+    # Batch endpoints fan out over the whole pool
+    "order-batch": (BROKER_WORKERS, 10.0),
+    "order-cancel-batch": (BROKER_WORKERS, 10.0),
+}
+DEFAULT_LIMIT = (4, DEFAULT_TIMEOUT)
+
+_executor = ThreadPoolExecutor(max_workers=BROKER_WORKERS, thread_name_prefix="broker")
+_semaphores = {}
+# route -> {"in_flight": calls holding a slot, "queued": calls waiting for one}
+_counts = {}
+
+
+class BrokerTimeout(Exception):
+    """A broker call did not finish within its route timeout"""
+
+
+def _semaphore(route: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(route)
+    if semaphore is None:
+        limit, _ = ROUTE_LIMITS.get(route, DEFAULT_LIMIT)
+        semaphore = _semaphores[route] = asyncio.Semaphore(limit)
+        _counts[route] = {"in_flight": 0, "queued": 0}
+    return semaphore
+
+
+async def _run(route: str, call):
+    semaphore = _semaphore(route)
+    counts = _counts[route]
+    counts["queued"] += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        counts["queued"] -= 1
+    counts["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, call)
+    finally:
+        counts["in_flight"] -= 1
+        semaphore.release()
+
+
+async def broker_call(route: str, fn, *args, timeout: float = None, **kwargs):
+    """Run a blocking broker function off the event loop under the route's limits"""
+    if timeout is None:
+        _, timeout = ROUTE_LIMITS.get(route, DEFAULT_LIMIT)
+
+    try:
+        # The timeout covers waiting for a slot as well as the call itself. A timed-out
+        # call keeps running in its worker thread, but the caller is released.
+        return await asyncio.wait_for(_run(route, partial(fn, *args, **kwargs)), timeout)
+    except asyncio.TimeoutError:
+        raise BrokerTimeout(f"{route} broker call timed out after {timeout:.1f}s")
+
+
+def broker_stats():
+    """In-flight / queued calls per route"""
+    stats = {}
+    for route, counts in list(_counts.items()):
+        limit, timeout = ROUTE_LIMITS.get(route, DEFAULT_LIMIT)
+        stats[route] = {"limit": limit, "timeout": timeout, **counts}
+    return stats
+
+
+def rate_stats():
+    """Token bucket, lane queues and retries per upstream (app.ratelimit)"""
+    return limiter.stats()
@@ -0,0 +1,154 @@
+# Response cache for the API routes
+# Bounded LRU cache with per-key TTLs, single-flight refresh (concurrent misses share one
+# broker call) and stale-while-revalidate. Order routes invalidate the affected keys; a fetch
+# already running for an invalidated key is detached, and its (pre-order) result is handed to
+# the callers that were already waiting but never cached.
+
+import asyncio
+import time
+from collections import OrderedDict
+
+# key namespace (text before ":") -> (ttl, stale window) in seconds. Within the stale window
+# the old value is served immediately while one background refresh runs.
+CACHE_POLICIES = {
+    "account": (10.0, 50.0),
+    "positions": (2.0, 10.0),
+    "orders": (2.0, 10.0),
+    "market-data": (60.0, 300.0),
+}
+DEFAULT_POLICY = (60.0, 0.0)
+DEFAULT_MAXSIZE = 512
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class AsyncTTLCache:
+    """LRU + TTL cache for coroutine results with single-flight and stale-while-revalidate"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, policies=None):
+        self.maxsize = maxsize
+        self.policies = dict(CACHE_POLICIES if policies is None else policies)
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}  # key -> Future
+        self._generations = {}  # key -> times invalidated; a fetch only stores if unchanged
+        self._refreshing = set()  # keys with a background refresh scheduled or running
+        self._stats = {}
+
+    def _counter(self, key: str):
+        namespace = _namespace(key)
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = {
+                "hits": 0, "stale_hits": 0, "misses": 0, "joins": 0, "refreshes": 0,
+                "errors": 0, "evictions": 0, "invalidations": 0, "discarded": 0,
+                "fetch_count": 0, "fetch_seconds": 0.0, "fetch_max": 0.0,
+            }
+        return stats
+
+    def policy(self, key: str):
+        return self.policies.get(_namespace(key), DEFAULT_POLICY)
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._counter(evicted)["evictions"] += 1
+
+    async def _fetch(self, key, fetch):
+        """Run fetch once for `key`; concurrent callers await the same future"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self._counter(key)["joins"] += 1
+            return await asyncio.shield(future)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        generation = self._generations.get(key, 0)
+        stats = self._counter(key)
+        start = time.perf_counter()
+        try:
+            value = await fetch()
+        except BaseException as e:
+            stats["errors"] += 1
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            elapsed = time.perf_counter() - start
+            stats["fetch_count"] += 1
+            stats["fetch_seconds"] += elapsed
+            stats["fetch_max"] = max(stats["fetch_max"], elapsed)
+
+        if self._generations.get(key, 0) == generation:
+            self._store(key, value)
+        else:
+            # Invalidated while fetching: the value may predate the change
+            stats["discarded"] += 1
+        future.set_result(value)
+        return value
+
+    async def _refresh(self, key, fetch):
+        try:
+            await self._fetch(key, fetch)
+        except Exception:
+            # Keep serving the stale value; the error is counted in _fetch
+            pass
+        finally:
+            self._refreshing.discard(key)
+
+    async def get_or_fetch(self, key: str, fetch):
+        """Cached value for `key`, or the result of `await fetch()`"""
+        stats = self._counter(key)
+        ttl, stale = self.policy(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < ttl:
+                stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < ttl + stale:
+                stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                # The refresh task registers in _inflight only once it runs
+                if key not in self._inflight and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    stats["refreshes"] += 1
+                    asyncio.ensure_future(self._refresh(key, fetch))
+                return value
+
+        if key not in self._inflight:
+            stats["misses"] += 1
+        return await self._fetch(key, fetch)
+
+    def invalidate(self, *keys: str):
+        """Drop exact keys, or every key in a namespace when given "namespace:*" """
+        for key in keys:
+            if key.endswith(":*"):
+                prefix = key[:-1]
+                matches = {k for k in list(self._entries) + list(self._inflight) if k.startswith(prefix)}
+            else:
+                matches = {key}
+            for match in matches:
+                # Later callers start a fresh fetch instead of joining one that began before the change
+                if self._inflight.pop(match, None) is not None:
+                    self._generations[match] = self._generations.get(match, 0) + 1
+                if self._entries.pop(match, None) is not None:
+                    self._counter(match)["invalidations"] += 1
+
+    def stats(self):
+        result = {"size": len(self._entries), "maxsize": self.maxsize, "namespaces": {}}
+        for namespace, stats in self._stats.items():
+            lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["joins"]
+            result["namespaces"][namespace] = {
+                **stats,
+                "hit_rate": (stats["hits"] + stats["stale_hits"] + stats["joins"]) / lookups if lookups else 0.0,
+                "fetch_avg": stats["fetch_seconds"] / stats["fetch_count"] if stats["fetch_count"] else 0.0,
+            }
+        return result
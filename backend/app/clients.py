@@ -0,0 +1,164 @@
+# Shared Alpaca clients
+# Keeps one long-lived TradingClient / StockHistoricalDataClient per process so every
+# request reuses the same keep-alive HTTP session instead of paying a new TLS handshake.
+# Each session sends through its app.ratelimit upstream, which also owns retries.
+#
+# The pool sizing and connection counters reach into SDK internals (RESTClient._session, the
+# requests adapters' urllib3 pools), which alpaca-py doesn't document. Each access is guarded:
+# if an SDK bump removes one, clients keep working with the SDK defaults and stats() reports
+# what it can.
+
+import logging
+
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from app.ratelimit import limiter
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+
+
+def _read_credentials():
+    api_key = os.getenv('APCA-API-KEY-ID')
+    secret_key = os.getenv('APCA-API-SECRET-KEY')
+
+    if not api_key or not secret_key:
+        raise ValueError("Missing Alpaca API credentials")
+
+    return api_key, secret_key
+
+
+class ClientRegistry:
+    """Thread-safe registry handing out shared, pooled Alpaca clients"""
+
+    def __init__(self, pool_size: int = None):
+        self.pool_size = pool_size or int(os.getenv("ALPACA_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reuses = 0
+
+    def _build(self, kind: str):
+        api_key, secret_key = _read_credentials()
+        # SDK imported on first use so importing the app stays cheap
+        from alpaca.trading.client import TradingClient
+        from alpaca.data.historical import StockHistoricalDataClient
+        from requests.adapters import HTTPAdapter
+
+        if kind == "trading":
+            client = TradingClient(
+                api_key, secret_key, paper=True,
+                url_override=os.getenv("ALPACA_TRADING_URL") or None
+            )
+        elif kind == "data":
+            client = StockHistoricalDataClient(
+                api_key, secret_key,
+                url_override=os.getenv("ALPACA_DATA_URL") or None
+            )
+        else:
+            raise ValueError(f"Unknown client kind: {kind}")
+
+        session = getattr(client, "_session", None)
+        if session is None or not hasattr(session, "mount"):
+            logger.warning("%s client has no requests session; pool size and rate limits not applied", kind)
+            return client
+        # Size the keep-alive pool so concurrent callers don't open throwaway connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # Rate limiting and jittered retries happen in the session; the SDK's own loop would
+        # sleep a fixed 3s on every 429 on top of that
+        limiter[kind].install(session)
+        if hasattr(client, "_retry"):
+            client._retry = 0
+        else:
+            logger.warning("%s client has no _retry attribute; SDK retries stack on the limiter's", kind)
+        return client
+
+    def get(self, kind: str):
+        """Return the shared client for `kind` ("trading" or "data"), creating it once"""
+        with self._lock:
+            client = self._clients.get(kind)
+            if client is not None:
+                self._reuses += 1
+                return client
+
+            client = self._build(kind)
+            self._clients[kind] = client
+            self._created += 1
+            return client
+
+    def trading(self) -> "TradingClient":
+        return self.get("trading")
+
+    def data(self) -> "StockHistoricalDataClient":
+        return self.get("data")
+
+    def stats(self):
+        """Client reuse and connection counters for every pooled client"""
+        with self._lock:
+            clients = dict(self._clients)
+            stats = {
+                "pool_size": self.pool_size,
+                "clients_created": self._created,
+                "client_reuses": self._reuses,
+                "handshakes": 0,
+                "requests": 0,
+            }
+
+        for client in clients.values():
+            try:
+                handshakes, requests = _pool_counters(client)
+            except (AttributeError, TypeError):
+                stats["pool_counters"] = "unavailable"
+                continue
+            stats["handshakes"] += handshakes
+            stats["requests"] += requests
+
+        stats["connection_reuses"] = max(stats["requests"] - stats["handshakes"], 0)
+        return stats
+
+    def reset(self):
+        """Close all pooled sessions, e.g. after credentials change"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._created = 0
+            self._reuses = 0
+
+        for client in clients:
+            session = getattr(client, "_session", None)
+            if session is not None:
+                session.close()
+
+
+def _pool_counters(client):
+    """(new connections, requests served) over a client's urllib3 pools"""
+    session = getattr(client, "_session", None)
+    if session is None:
+        return 0, 0
+    handshakes = requests = 0
+    # The same adapter is mounted for http:// and https://, count it once
+    adapters = {id(a): a for a in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # urllib3 counts every new (TLS) connection and every request it serves
+            handshakes += getattr(pool, "num_connections", 0)
+            requests += getattr(pool, "num_requests", 0)
+    return handshakes, requests
+
+
+# Process-wide registry shared by the FastAPI routes and the bot
+registry = ClientRegistry()
@@ -0,0 +1,160 @@
+# LLM decision cache
+# Keys llm_strategy decisions on a canonical, quantized view of technical_data so re-running
+# within the same bar (or on practically identical inputs) reuses the last answer, and
+# concurrent callers with the same key share a single in-flight OpenAI request.
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_TTL = float(os.getenv("DECISION_CACHE_TTL", 15 * 60))  # one 15-minute bar
+DEFAULT_MAXSIZE = int(os.getenv("DECISION_CACHE_SIZE", 1024))
+
+# Significant digits kept per technical_data field before hashing
+DEFAULT_PRECISION = 4
+FIELD_PRECISION = {
+    "rsi_9": 3,
+    "macd": 2,
+    "signal": 2,
+    "price_vs_sma20": 2,
+    "price_vs_sma50": 2,
+    "recent_volumes": 2,
+}
+
+
+def _quantize(value, digits: int):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_quantize(v, digits) for v in value]
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        return str(value)
+    return float(f"{value:.{digits}g}")
+
+
+def decision_key(technical_data: dict, *extra) -> str:
+    """Stable hash of the quantized feature vector plus any extra inputs (qty, model, ...)"""
+    canonical = {
+        name: _quantize(value, FIELD_PRECISION.get(name, DEFAULT_PRECISION))
+        for name, value in sorted(technical_data.items())
+    }
+    payload = json.dumps([canonical, list(extra)], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class DecisionCache:
+    """Thread-safe TTL + LRU cache with in-flight request deduplication"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.joins = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        """Cached value or None; counts as a hit/miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: str, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: str, compute):
+        """Return the cached value for `key`, joining or starting a single computation on a miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.joins += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            # Failures are not cached; waiters see the same error
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if value is not None:
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: str = None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.joins
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight_joins": self.joins,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "inflight": len(self._inflight),
+                # Joined requests avoided an LLM call too, so they count towards the hit rate
+                "hit_rate": (self.hits + self.joins) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,128 @@
+# Startup health check
+# Config checks plus one round trip each to the broker and the journal database. The API runs it
+# in the background at startup, which also builds the SDK clients and the journal engine before
+# the first request needs them, and serves the result at /health. A scheduled bot job can run it
+# first and bail out early:
+#
+#   python -m app.health             # exit status 1 when a check fails
+#   python -m app.health --imports   # also time cold imports of the entry points
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from app.clients import registry
+from app.journal import journal
+
+REQUIRED_ENV = ("APCA-API-KEY-ID", "APCA-API-SECRET-KEY", "OPENAI_API_KEY")
+ENTRY_POINTS = ("app.main", "app.bot", "app.scheduler")
+
+CHECKS = {}
+# Result of the most recent deep run_checks(), served by /health
+last_report = None
+
+
+def check(name: str, deep: bool = False):
+    """Register fn() that raises on failure; deep checks make network or database calls"""
+    def register(fn):
+        CHECKS[name] = (fn, deep)
+        return fn
+    return register
+
+
+@check("config")
+def _config():
+    missing = [name for name in REQUIRED_ENV if not os.getenv(name)]
+    if missing:
+        raise RuntimeError(f"missing {', '.join(missing)}")
+
+
+@check("broker", deep=True)
+def _broker():
+    registry.trading().get_account()
+
+
+@check("journal", deep=True)
+def _journal():
+    with journal.engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+@check("bar_store")
+def _bar_store():
+    from app.bar_store import get_store
+    root = get_store().root
+    if not os.access(root, os.W_OK):
+        raise RuntimeError(f"{root} is not writable")
+
+
+@check("strategy_backend")
+def _strategy_backend():
+    from app.backends import LocalModelBackend, get_backend
+    backend = get_backend()
+    for part in (getattr(backend, "primary", backend), getattr(backend, "shadow", None)):
+        if isinstance(part, LocalModelBackend):
+            part.model  # loads and validates the model file
+
+
+def run_checks(deep: bool = True):
+    """
+    {"ok", "ts", "checks": {name: {"ok", "ms", "error"}}}; never raises. Only a deep run
+    replaces last_report, so a shallow /health call can't stand in for the full check.
+    """
+    global last_report
+    results = {}
+    for name, (fn, is_deep) in CHECKS.items():
+        if is_deep and not deep:
+            continue
+        start = time.perf_counter()
+        try:
+            fn()
+            results[name] = {"ok": True}
+        except Exception as e:
+            results[name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        results[name]["ms"] = round((time.perf_counter() - start) * 1000, 2)
+    report = {
+        "ok": all(r["ok"] for r in results.values()),
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "checks": results,
+    }
+    if deep:
+        last_report = report
+    return report
+
+
+def import_times(modules=ENTRY_POINTS, repeats: int = 3):
+    """Best-of-`repeats` cold import time in ms for each module, each in a fresh interpreter"""
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, time; t = time.perf_counter(); __import__(sys.argv[1]); print(time.perf_counter() - t)"
+    times = {}
+    for module in modules:
+        runs = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", code, module], cwd=backend,
+                                 capture_output=True, text=True, check=True).stdout
+            runs.append(float(out.strip().splitlines()[-1]))
+        times[module] = round(min(runs) * 1000, 1)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup health check")
+    parser.add_argument("--shallow", action="store_true", help="skip the broker and database round trips")
+    parser.add_argument("--imports", action="store_true", help="also time cold imports of the entry points")
+    args = parser.parse_args()
+
+    report = run_checks(deep=not args.shallow)
+    if args.imports:
+        report["import_ms"] = import_times()
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
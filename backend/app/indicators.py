@@ -0,0 +1,255 @@
+# Incremental indicators
+# Streaming versions of calculate_sma / calculate_rsi / calculate_macd from strategy.py.
+# Each new 15-minute bar is an O(1) update instead of recomputing the whole window with pandas,
+# and the state can be saved and restored so a restart doesn't need a full re-warm.
+
+import json
+import math
+from collections import deque
+
+# Running sums are rebuilt from the window this often to stop float drift from accumulating
+RESUM_INTERVAL = 1000
+
+
+class RollingSMA:
+    """Simple moving average over the last `period` values (matches calculate_sma)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value: float) -> float:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+
+        self.updates += 1
+        if self.updates % RESUM_INTERVAL == 0:
+            self.total = math.fsum(self.window)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if len(self.window) < self.period:
+            return math.nan
+        return self.total / self.period
+
+    def state(self):
+        return {"period": self.period, "window": list(self.window), "updates": self.updates}
+
+    @classmethod
+    def from_state(cls, state):
+        sma = cls(state["period"])
+        sma.window.extend(state["window"])
+        sma.total = math.fsum(sma.window)
+        sma.updates = state["updates"]
+        return sma
+
+
+class RollingRSI:
+    """RSI from rolling average gain/loss over the last `period` deltas (matches calculate_rsi)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.gains = RollingSMA(period)
+        self.losses = RollingSMA(period)
+        self.last_price = None
+
+    def update(self, price: float) -> float:
+        # calculate_rsi counts the first (NaN) delta as a zero gain and zero loss
+        delta = 0.0 if self.last_price is None else price - self.last_price
+        self.gains.update(delta if delta > 0 else 0.0)
+        self.losses.update(-delta if delta < 0 else 0.0)
+        self.last_price = price
+        return self.value
+
+    @property
+    def value(self) -> float:
+        gain, loss = self.gains.value, self.losses.value
+        if math.isnan(gain) or math.isnan(loss):
+            return math.nan
+        if loss == 0:
+            # Same limits pandas produces for gain / 0
+            return math.nan if gain == 0 else 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+    def state(self):
+        return {
+            "period": self.period,
+            "gains": self.gains.state(),
+            "losses": self.losses.state(),
+            "last_price": self.last_price,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        rsi = cls(state["period"])
+        rsi.gains = RollingSMA.from_state(state["gains"])
+        rsi.losses = RollingSMA.from_state(state["losses"])
+        rsi.last_price = state["last_price"]
+        return rsi
+
+
+class EMA:
+    """Exponential moving average with pandas' default adjust=True weighting"""
+
+    def __init__(self, span: int):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def update(self, value: float) -> float:
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.denominator == 0:
+            return math.nan
+        return self.numerator / self.denominator
+
+    def state(self):
+        return {"span": self.span, "numerator": self.numerator, "denominator": self.denominator}
+
+    @classmethod
+    def from_state(cls, state):
+        ema = cls(state["span"])
+        ema.numerator = state["numerator"]
+        ema.denominator = state["denominator"]
+        return ema
+
+
+class IncrementalMACD:
+    """MACD line, signal and histogram (matches calculate_macd)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def update(self, price: float):
+        macd_line = self.fast.update(price) - self.slow.update(price)
+        signal_line = self.signal.update(macd_line)
+        return macd_line, signal_line, macd_line - signal_line
+
+    @property
+    def value(self):
+        macd_line = self.fast.value - self.slow.value
+        signal_line = self.signal.value
+        return macd_line, signal_line, macd_line - signal_line
+
+    def state(self):
+        return {"fast": self.fast.state(), "slow": self.slow.state(), "signal": self.signal.state()}
+
+    @classmethod
+    def from_state(cls, state):
+        macd = cls()
+        macd.fast = EMA.from_state(state["fast"])
+        macd.slow = EMA.from_state(state["slow"])
+        macd.signal = EMA.from_state(state["signal"])
+        return macd
+
+
+class IncrementalIndicators:
+    """Per-symbol indicator state used by llm_strategy, updated one bar at a time"""
+
+    def __init__(self, sma_fast: int = 20, sma_slow: int = 50, rsi_period: int = 9,
+                 macd=(12, 26, 9), recent: int = 10):
+        self.sma_fast = RollingSMA(sma_fast)
+        self.sma_slow = RollingSMA(sma_slow)
+        self.rsi = RollingRSI(rsi_period)
+        self.macd = IncrementalMACD(*macd)
+        self.recent_closes = deque(maxlen=recent)
+        self.recent_volumes = deque(maxlen=recent)
+        # Previous SMA values for crossover / reversal detection
+        self.prev_sma_fast = math.nan
+        self.prev_sma_slow = math.nan
+        self.bars = 0
+        self.last_timestamp = None
+
+    def update(self, close: float, volume: float = 0.0, timestamp=None):
+        """Feed one closed bar and return the latest indicator snapshot"""
+        self.prev_sma_fast = self.sma_fast.value
+        self.prev_sma_slow = self.sma_slow.value
+        self.sma_fast.update(close)
+        self.sma_slow.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.recent_closes.append(close)
+        self.recent_volumes.append(volume)
+        self.bars += 1
+        if timestamp is not None:
+            self.last_timestamp = str(timestamp)
+        return self.snapshot()
+
+    def warm(self, closes, volumes=None):
+        """Replay a history of bars, e.g. from get_15min_data"""
+        if volumes is None:
+            volumes = [0.0] * len(closes)
+        for close, volume in zip(closes, volumes):
+            self.update(float(close), float(volume))
+        return self.snapshot()
+
+    def snapshot(self):
+        macd_line, signal_line, histogram = self.macd.value
+        sma_fast, sma_slow = self.sma_fast.value, self.sma_slow.value
+        return {
+            "bars": self.bars,
+            "current_price": self.recent_closes[-1] if self.recent_closes else math.nan,
+            "sma_20": sma_fast,
+            "sma_50": sma_slow,
+            "rsi_9": self.rsi.value,
+            "macd": macd_line,
+            "signal": signal_line,
+            "histogram": histogram,
+            "recent_closes": list(self.recent_closes),
+            "recent_volumes": list(self.recent_volumes),
+            # Same comparisons as detect_sma_crossover / check_trend_reversal
+            "crossover_detected": self.prev_sma_fast <= self.prev_sma_slow and sma_fast > sma_slow,
+            "trend_reversal": self.prev_sma_fast >= self.prev_sma_slow and sma_fast < sma_slow,
+        }
+
+    # Persistence
+    def state(self):
+        return {
+            "sma_fast": self.sma_fast.state(),
+            "sma_slow": self.sma_slow.state(),
+            "rsi": self.rsi.state(),
+            "macd": self.macd.state(),
+            "recent_closes": list(self.recent_closes),
+            "recent_volumes": list(self.recent_volumes),
+            "recent": self.recent_closes.maxlen,
+            "prev_sma_fast": self.prev_sma_fast,
+            "prev_sma_slow": self.prev_sma_slow,
+            "bars": self.bars,
+            "last_timestamp": self.last_timestamp,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(recent=state["recent"])
+        engine.sma_fast = RollingSMA.from_state(state["sma_fast"])
+        engine.sma_slow = RollingSMA.from_state(state["sma_slow"])
+        engine.rsi = RollingRSI.from_state(state["rsi"])
+        engine.macd = IncrementalMACD.from_state(state["macd"])
+        engine.recent_closes.extend(state["recent_closes"])
+        engine.recent_volumes.extend(state["recent_volumes"])
+        engine.prev_sma_fast = state["prev_sma_fast"]
+        engine.prev_sma_slow = state["prev_sma_slow"]
+        engine.bars = state["bars"]
+        engine.last_timestamp = state["last_timestamp"]
+        return engine
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.state(), f)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as f:
+            return cls.from_state(json.load(f))
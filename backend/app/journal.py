@@ -0,0 +1,283 @@
+# Trade and decision journal
+# Persists every decision (with its prompt, raw LLM answer and latency), every submitted order
+# and every fill to SQL through SQLAlchemy. The trading path only enqueues rows; a background
+# thread writes them in batches, so a slow disk or database never delays an order.
+#
+# Rows are append-only with autoincrement ids, so newer rows always have larger ids. History
+# queries page by id ("cursor") over (symbol, id) indexes and never use OFFSET, which keeps
+# every page equally fast however large the tables grow. The models live in journal_tables.py
+# and SQLAlchemy is only imported once the database is first used.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+DEFAULT_URL = f"sqlite:///{os.path.join(os.path.dirname(__file__), '..', 'data', 'journal.db')}"
+JOURNAL_URL = os.getenv("JOURNAL_URL", DEFAULT_URL)
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+# Rows buffered before new ones are dropped (and counted) rather than blocking the caller
+QUEUE_SIZE = 100_000
+MAX_PAGE = 500
+# A failed batch is written again this many times (after WRITE_RETRY_DELAY) before it is dropped
+WRITE_RETRIES = 1
+WRITE_RETRY_DELAY = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+
+def _text(value):
+    # Enum members serialize as their value ("buy", not "OrderSide.BUY")
+    value = getattr(value, "value", value)
+    return None if value is None else str(value)
+
+
+def _features(technical_data):
+    # numpy scalars and arrays as plain JSON numbers and lists
+    if not technical_data:
+        return None
+    return json.dumps(technical_data, default=lambda v: v.tolist() if hasattr(v, "tolist") else str(v))
+
+
+def _make_engine(url: str):
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import StaticPool
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection so the writer thread and readers see the same in-memory database
+        return create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    if url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(os.path.abspath(url[len("sqlite:///"):])), exist_ok=True)
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _pragmas(connection, _):
+            # WAL lets history reads run while the writer appends
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+    return create_engine(url, pool_pre_ping=True)
+
+
+class Journal:
+    """Queue-fed batched writer plus paginated readers over the journal tables"""
+
+    def __init__(self, url: str = JOURNAL_URL, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, queue_size: int = QUEUE_SIZE):
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._engine = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                from app.journal_tables import Base, add_missing_columns
+                self._engine = _make_engine(self.url)
+                Base.metadata.create_all(self._engine)
+                add_missing_columns(self._engine)
+            return self._engine
+
+    # Writing
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, table: str, **row):
+        """Queue one row for `table`; never blocks"""
+        if self._thread is None:
+            self._start()
+        row.setdefault("ts", _now())
+        if row.get("symbol"):
+            row["symbol"] = row["symbol"].upper()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, rows):
+        from sqlalchemy import insert
+        from app.journal_tables import TABLES
+
+        by_table = {}
+        for table, row in rows:
+            by_table.setdefault(table, []).append(row)
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                with self.engine.begin() as connection:
+                    for table, batch in by_table.items():
+                        connection.execute(insert(TABLES[table]), batch)
+                self.written += len(rows)
+                return
+            except Exception:
+                self.errors += 1
+                if attempt < WRITE_RETRIES:
+                    logger.warning("Journal write failed (%d rows), retrying", len(rows), exc_info=True)
+                    time.sleep(WRITE_RETRY_DELAY)
+                else:
+                    self.dropped += len(rows)
+                    logger.exception("Journal write failed (%d rows dropped)", len(rows))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            rows = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather a batch: whatever arrives within flush_interval, up to batch_size rows
+            while len(rows) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(timeout, 0)) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # handled after this batch is written
+                    self._queue.task_done()
+                    break
+                rows.append(item)
+            self._write(rows)
+            for _ in rows:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued row has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    # Typed helpers used by the trading path
+    def record_decision(self, symbol: str, result: dict, prompt=None, response=None,
+                        latency: float = None, model: str = None, gated: bool = False,
+                        technical_data: dict = None, ts: datetime = None):
+        context = result.get("technical_context") or {}
+        self.record(
+            "decisions",
+            ts=ts or _now(),
+            symbol=symbol,
+            decision=str(result.get("decision", "HOLD")).upper()[:8],
+            confidence=_optional_float(result.get("confidence")),
+            entry_price=_optional_float(context.get("entry_price")),
+            stop_loss=_optional_float(result.get("stop_loss")),
+            take_profit=_optional_float(result.get("take_profit")),
+            reason=result.get("reason") or result.get("reasoning"),
+            gated=gated,
+            model=model,
+            prompt=prompt,
+            response=response,
+            llm_latency_ms=None if latency is None else latency * 1000,
+            features=_features(technical_data),
+        )
+
+    def record_order(self, order: dict):
+        """Record an order as returned by the broker (ledger record or SDK model fields)"""
+        self.record(
+            "orders",
+            order_id=str(order.get("id")),
+            symbol=order.get("symbol"),
+            side=_text(order.get("side")),
+            qty=_optional_float(order.get("qty")),
+            order_type=_text(order.get("order_type") or order.get("type")),
+            order_class=_text(order.get("order_class")),
+            status=_text(order.get("status")),
+            limit_price=_optional_float(order.get("limit_price")),
+            stop_price=_optional_float(order.get("stop_price")),
+            raw=json.dumps(order, default=str),
+        )
+
+    def record_fill(self, order: dict, event: str, qty, price, position_qty=None):
+        self.record(
+            "fills",
+            order_id=str(order.get("id")),
+            symbol=order.get("symbol"),
+            side=_text(order.get("side")),
+            event=event,
+            qty=_optional_float(qty),
+            price=_optional_float(price),
+            position_qty=_optional_float(position_qty),
+        )
+
+    # Reading
+    def history(self, table: str, symbol: str = None, since: datetime = None, until: datetime = None,
+                cursor: int = None, limit: int = 100, columns=None):
+        """
+        Newest-first page of `table`. Pass the returned next_cursor back as `cursor` for the
+        following page; it is None on the last page.
+        """
+        from sqlalchemy import select
+        from app.journal_tables import TABLES
+
+        model = TABLES[table]
+        limit = max(1, min(limit, MAX_PAGE))
+        selected = [getattr(model, c) for c in columns] if columns else list(model.__table__.columns)
+        query = select(*selected)
+        if symbol is not None:
+            query = query.where(model.symbol == symbol.upper())
+        if since is not None:
+            query = query.where(model.ts >= since)
+        if until is not None:
+            query = query.where(model.ts < until)
+        if cursor is not None:
+            query = query.where(model.id < cursor)
+        query = query.order_by(model.id.desc()).limit(limit + 1)
+
+        with self.engine.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(query)]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return {"items": rows[:limit], "next_cursor": next_cursor}
+
+    def get(self, table: str, row_id: int):
+        """One full row by id, or None"""
+        from sqlalchemy import select
+        from app.journal_tables import TABLES
+
+        model = TABLES[table]
+        with self.engine.connect() as connection:
+            row = connection.execute(select(model.__table__).where(model.id == row_id)).first()
+        return None if row is None else dict(row._mapping)
+
+    def stats(self):
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+# Process-wide journal; rows still queued at exit are written before the process ends
+journal = Journal()
+atexit.register(journal.close)
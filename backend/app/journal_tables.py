@@ -0,0 +1,83 @@
+# Journal tables
+# SQLAlchemy models behind app.journal. Kept apart so that importing the journal (every trading
+# module does) only costs a queue; SQLAlchemy loads when the writer thread or a history query
+# first touches the database.
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text, inspect
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class Decision(Base):
+    __tablename__ = "decisions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(DateTime(timezone=True), nullable=False, index=True)
+    symbol = Column(String(16), nullable=False)
+    decision = Column(String(8), nullable=False)  # BUY, SELL or HOLD
+    confidence = Column(Float)
+    entry_price = Column(Float)
+    stop_loss = Column(Float)
+    take_profit = Column(Float)
+    reason = Column(Text)
+    gated = Column(Boolean, default=False)  # HOLD from the signal gate, no LLM call
+    model = Column(String(64))
+    prompt = Column(Text)
+    response = Column(Text)
+    llm_latency_ms = Column(Float)
+    features = Column(Text)  # technical_data as JSON, training input for app.local_model
+
+    __table_args__ = (Index("ix_decisions_symbol_id", "symbol", "id"),)
+
+
+class Order(Base):
+    __tablename__ = "orders"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(DateTime(timezone=True), nullable=False, index=True)
+    order_id = Column(String(64), nullable=False, index=True)
+    symbol = Column(String(16), nullable=False)
+    side = Column(String(8))
+    qty = Column(Float)
+    order_type = Column(String(16))
+    order_class = Column(String(16))
+    status = Column(String(24))
+    limit_price = Column(Float)
+    stop_price = Column(Float)
+    raw = Column(Text)
+
+    __table_args__ = (Index("ix_orders_symbol_id", "symbol", "id"),)
+
+
+class Fill(Base):
+    __tablename__ = "fills"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ts = Column(DateTime(timezone=True), nullable=False, index=True)
+    order_id = Column(String(64), nullable=False, index=True)
+    symbol = Column(String(16), nullable=False)
+    side = Column(String(8))
+    event = Column(String(16))  # fill or partial_fill
+    qty = Column(Float)
+    price = Column(Float)
+    position_qty = Column(Float)
+
+    __table_args__ = (Index("ix_fills_symbol_id", "symbol", "id"),)
+
+
+TABLES = {"decisions": Decision, "orders": Order, "fills": Fill}
+
+
+def add_missing_columns(engine):
+    """ALTER TABLE ADD COLUMN for nullable columns added to the models after a table was created"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
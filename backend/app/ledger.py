@@ -0,0 +1,333 @@
+# Local order book and position ledger
+# Mirrors the account's orders and positions in process so status checks, route reads and
+# pre-trade checks are dictionary lookups instead of broker calls. Seeded once from the broker,
+# kept current from order responses and the Alpaca trade_updates stream, and reconciled against
+# the broker periodically to repair anything missed (e.g. events lost while disconnected).
+#
+#   await ledger.start()   # seed, listen to trade updates, reconcile every LEDGER_RECONCILE_INTERVAL
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from app.clients import registry
+from app.journal import journal
+from app.ratelimit import priority
+
+DEFAULT_TRADE_STREAM_URL = "wss://paper-api.alpaca.markets/stream"
+RECONCILE_INTERVAL = float(os.getenv("LEDGER_RECONCILE_INTERVAL", 60))
+TERMINAL_STATUSES = {"filled", "canceled", "expired", "rejected", "replaced", "done_for_day"}
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+# Closed orders kept for local status lookups; older ones fall back to the broker
+MAX_CLOSED_ORDERS = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def _record(obj) -> dict:
+    """Plain JSON-friendly dict for an SDK model or payload"""
+    # Imported here so the bot process doesn't load FastAPI just for the encoder
+    from fastapi.encoders import jsonable_encoder
+    record = jsonable_encoder(obj)
+    if "id" in record:
+        record["id"] = str(record["id"])
+    return record
+
+
+def _float(value, default=0.0) -> float:
+    return default if value is None else float(value)
+
+
+class TradingLedger:
+    """Thread-safe in-process mirror of open orders and positions"""
+
+    def __init__(self, reconcile_interval: float = RECONCILE_INTERVAL, stream_url: str = None):
+        self.reconcile_interval = reconcile_interval
+        self.stream_url = stream_url or os.getenv("ALPACA_TRADE_STREAM_URL", DEFAULT_TRADE_STREAM_URL)
+        self.orders = {}  # order id -> order
+        self.open_by_symbol = {}  # symbol -> {order id}
+        self.positions = {}  # symbol -> position
+        self.seeded = False
+        self.stream_connected = False
+        self.last_reconcile = None
+        self.counters = {"local_reads": 0, "events": 0, "reconciles": 0, "corrections": 0}
+        # Local changes are numbered so a reconcile can tell which ones its broker snapshot may
+        # predate: order id / symbol -> number of the last local change
+        self._version = 0
+        self._order_versions = {}
+        self._position_versions = {}
+        self._lock = threading.RLock()
+        self._tasks = []
+
+    # Local reads
+    @property
+    def live(self) -> bool:
+        """True when local reads can replace broker reads (seeded and receiving trade updates)"""
+        return self.seeded and self.stream_connected
+
+    def order(self, order_id: str):
+        with self._lock:
+            self.counters["local_reads"] += 1
+            return self.orders.get(str(order_id))
+
+    def order_status(self, order_id: str):
+        order = self.order(order_id)
+        return None if order is None else order.get("status")
+
+    def position(self, symbol: str):
+        with self._lock:
+            self.counters["local_reads"] += 1
+            return self.positions.get(symbol.upper())
+
+    def position_qty(self, symbol: str) -> float:
+        position = self.position(symbol)
+        return 0.0 if position is None else _float(position.get("qty"))
+
+    def open_orders(self, symbol: str = None):
+        with self._lock:
+            self.counters["local_reads"] += 1
+            if symbol is None:
+                ids = [i for i, o in self.orders.items() if o.get("status") not in TERMINAL_STATUSES]
+            else:
+                ids = self.open_by_symbol.get(symbol.upper(), ())
+            return [self.orders[i] for i in ids]
+
+    def all_positions(self):
+        with self._lock:
+            self.counters["local_reads"] += 1
+            return list(self.positions.values())
+
+    def exposure(self, symbol: str = None) -> float:
+        """Signed market value of one position, or gross market value across all of them"""
+        with self._lock:
+            if symbol is not None:
+                position = self.positions.get(symbol.upper())
+                return 0.0 if position is None else _float(position.get("market_value"))
+            return sum(abs(_float(p.get("market_value"))) for p in self.positions.values())
+
+    # Updates
+    def _touch_order(self, order_id: str):
+        self._version += 1
+        self._order_versions[order_id] = self._version
+
+    def _index_order(self, order: dict):
+        order_id = order["id"]
+        symbol = order.get("symbol")
+        self.orders[order_id] = order
+        if not symbol:
+            return
+        open_ids = self.open_by_symbol.setdefault(symbol, set())
+        if order.get("status") in TERMINAL_STATUSES:
+            open_ids.discard(order_id)
+            if not open_ids:
+                del self.open_by_symbol[symbol]
+        else:
+            open_ids.add(order_id)
+
+    def apply_order(self, order):
+        """Record an order returned by the broker (submit, replace, get)"""
+        record = _record(order)
+        with self._lock:
+            self._touch_order(record["id"])
+            self._index_order(record)
+            # Bracket legs are orders of their own
+            for leg in record.get("legs") or ():
+                leg = _record(leg)
+                self._touch_order(leg["id"])
+                self._index_order(leg)
+        return record
+
+    def mark_status(self, order_id: str, status: str):
+        with self._lock:
+            order = self.orders.get(str(order_id))
+            if order is not None:
+                self._touch_order(order["id"])
+                self._index_order({**order, "status": status})
+
+    def _apply_fill(self, symbol: str, side: str, fill_qty: float, price: float, position_qty=None):
+        self._version += 1
+        self._position_versions[symbol] = self._version
+        position = self.positions.get(symbol)
+        old_qty = 0.0 if position is None else _float(position.get("qty"))
+        signed = fill_qty if side == "buy" else -fill_qty
+        new_qty = _float(position_qty, old_qty + signed)
+        if new_qty == 0:
+            self.positions.pop(symbol, None)
+            return
+
+        avg = price
+        if position is not None and old_qty * new_qty > 0:
+            old_avg = _float(position.get("avg_entry_price"), price)
+            # Adding to a position moves the average entry; reducing it doesn't
+            avg = (old_avg * abs(old_qty) + price * fill_qty) / abs(new_qty) if abs(new_qty) > abs(old_qty) else old_avg
+        self.positions[symbol] = {
+            **(position or {"symbol": symbol}),
+            "qty": str(new_qty),
+            "side": "long" if new_qty > 0 else "short",
+            "avg_entry_price": str(avg),
+            "current_price": str(price),
+            "market_value": str(new_qty * price),
+        }
+
+    def apply_trade_update(self, update: dict):
+        """Apply one trade_updates event: {"event", "order", "qty", "price", "position_qty"}"""
+        order = _record(update["order"])
+        event = update.get("event")
+        with self._lock:
+            self.counters["events"] += 1
+            self._touch_order(order["id"])
+            self._index_order(order)
+            if event in ("fill", "partial_fill") and update.get("qty") is not None:
+                journal.record_fill(order, event, update["qty"], update.get("price"), update.get("position_qty"))
+                self._apply_fill(
+                    order["symbol"], str(order.get("side", "buy")), _float(update["qty"]),
+                    _float(update.get("price"), _float(order.get("filled_avg_price"))),
+                    update.get("position_qty"),
+                )
+
+    # Broker sync
+    def _fetch(self):
+        from alpaca.trading.enums import QueryOrderStatus
+        from alpaca.trading.requests import GetOrdersRequest
+
+        client = registry.trading()
+        # Reconciliation can wait behind orders and reads
+        with priority("background"):
+            positions = client.get_all_positions()
+            orders = client.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, nested=True))
+        return [_record(p) for p in positions], [_record(o) for o in orders]
+
+    def reconcile(self):
+        """Replace local state with the broker's; returns the number of records that differed"""
+        with self._lock:
+            # Local changes made after this point may be missing from the snapshot fetched next
+            version = self._version
+        positions, orders = self._fetch()
+        with self._lock:
+            newer_orders = {i for i, v in self._order_versions.items() if v > version}
+            newer_positions = {s for s, v in self._position_versions.items() if v > version}
+            broker_positions = {p["symbol"]: p for p in positions if p["symbol"] not in newer_positions}
+            broker_open = {o["id"]: o for o in orders if o["id"] not in newer_orders}
+            local_open = {
+                i: o for i, o in self.orders.items()
+                if o.get("status") not in TERMINAL_STATUSES and i not in newer_orders
+            }
+            corrections = 0
+            if self.seeded:
+                corrections += sum(
+                    1 for s in (broker_positions.keys() | self.positions.keys()) - newer_positions
+                    if _float((self.positions.get(s) or {}).get("qty")) != _float((broker_positions.get(s) or {}).get("qty"))
+                )
+                corrections += len(broker_open.keys() ^ local_open.keys())
+            # Positions and orders changed locally since the snapshot keep their local state
+            for symbol in newer_positions & self.positions.keys():
+                broker_positions[symbol] = self.positions[symbol]
+            self.positions = broker_positions
+            # Locally open orders the broker no longer reports are closed; drop them
+            for order_id in local_open.keys() - broker_open.keys():
+                self.orders.pop(order_id, None)
+            self.open_by_symbol = {}
+            for order in self.orders.values():
+                if order.get("status") not in TERMINAL_STATUSES:
+                    self._index_order(order)
+            for order in broker_open.values():
+                self._index_order(order)
+                for leg in order.get("legs") or ():
+                    leg = _record(leg)
+                    if leg["id"] not in newer_orders:
+                        self._index_order(leg)
+            closed = [i for i, o in self.orders.items() if o.get("status") in TERMINAL_STATUSES]
+            for order_id in closed[:max(len(closed) - MAX_CLOSED_ORDERS, 0)]:
+                del self.orders[order_id]
+            # Changes the snapshot already covers need no protecting from the next reconcile
+            self._order_versions = {i: v for i, v in self._order_versions.items() if v > version}
+            self._position_versions = {s: v for s, v in self._position_versions.items() if v > version}
+            self.seeded = True
+            self.last_reconcile = time.time()
+            self.counters["reconciles"] += 1
+            self.counters["corrections"] += corrections
+        return corrections
+
+    async def _reconcile_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await loop.run_in_executor(None, self.reconcile)
+            except Exception:
+                logger.exception("Ledger reconcile failed")
+
+    async def _listen(self):
+        import websockets
+        async with websockets.connect(self.stream_url) as ws:
+            await ws.send(json.dumps({
+                "action": "auth",
+                "key": os.getenv("APCA-API-KEY-ID", ""),
+                "secret": os.getenv("APCA-API-SECRET-KEY", ""),
+            }))
+            reply = json.loads(await ws.recv())
+            if reply.get("data", {}).get("status") != "authorized":
+                raise PermissionError(f"Trade stream authentication failed: {reply}")
+            await ws.send(json.dumps({"action": "listen", "data": {"streams": ["trade_updates"]}}))
+            self.stream_connected = True
+            try:
+                # Events missed while disconnected are picked up by a reconcile
+                await asyncio.get_running_loop().run_in_executor(None, self.reconcile)
+                async for raw in ws:
+                    message = json.loads(raw)
+                    if message.get("stream") == "trade_updates":
+                        self.apply_trade_update(message["data"])
+            finally:
+                self.stream_connected = False
+
+    async def _listen_forever(self):
+        # The submodule itself: not every websockets version loads it on `import websockets`
+        from websockets.exceptions import WebSocketException
+        attempt = 0
+        while True:
+            try:
+                await self._listen()
+                attempt = 0
+            except (OSError, WebSocketException) as e:
+                logger.warning("Trade stream disconnected: %s", e)
+            except Exception:
+                # An event we couldn't apply must not end the stream for good; the reconcile on
+                # reconnect repairs whatever it would have changed
+                logger.exception("Trade stream failed, reconnecting")
+            await asyncio.sleep(RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)])
+            attempt += 1
+
+    async def start(self, stream: bool = True):
+        """Seed from the broker, then keep the ledger current in background tasks"""
+        await asyncio.get_running_loop().run_in_executor(None, self.reconcile)
+        self._tasks.append(asyncio.ensure_future(self._reconcile_forever()))
+        if stream:
+            self._tasks.append(asyncio.ensure_future(self._listen_forever()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.stream_connected = False
+
+    def stats(self):
+        with self._lock:
+            open_orders = sum(1 for o in self.orders.values() if o.get("status") not in TERMINAL_STATUSES)
+            return {
+                **self.counters,
+                "live": self.live,
+                "seeded": self.seeded,
+                "stream_connected": self.stream_connected,
+                "last_reconcile": self.last_reconcile,
+                "orders": len(self.orders),
+                "open_orders": open_orders,
+                "positions": len(self.positions),
+            }
+
+
+# Process-wide ledger shared by the routes, the bot and alpaca_client
+ledger = TradingLedger()
@@ -0,0 +1,138 @@
+# Live account feed
+# One shared background poller reads account, positions and open orders from the broker and
+# fans the changes out to every connected dashboard (WebSocket or SSE). Broker load depends on
+# the poll interval only, not on how many dashboards are open, and clients receive diffs
+# instead of full snapshots.
+
+import asyncio
+import json
+import os
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.alpaca_client import get_account, get_positions, get_orders
+from app.broker import broker_call
+
+POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", 2.0))
+# Updates buffered per client before it is considered too slow and resynced with a snapshot
+CLIENT_QUEUE_SIZE = 100
+
+# topic -> (fetch function, record key); keyed topics are diffed record by record
+TOPICS = {
+    "account": (get_account, None),
+    "positions": (get_positions, "symbol"),
+    "orders": (get_orders, "id"),
+}
+
+
+def _index(records, key):
+    return {str(record[key]): record for record in records}
+
+
+def diff_topic(old, new, keyed: bool):
+    """Changes between two states of a topic, or None when nothing changed"""
+    if not keyed:
+        changed = {k: v for k, v in new.items() if old.get(k) != v}
+        removed = [k for k in old if k not in new]
+        return {"set": changed, "remove": removed} if changed or removed else None
+
+    upsert = {k: v for k, v in new.items() if old.get(k) != v}
+    remove = [k for k in old if k not in new]
+    return {"upsert": upsert, "remove": remove} if upsert or remove else None
+
+
+class LiveFeed:
+    """Shared broker poller with per-client queues of pre-serialized messages"""
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self.state = {}
+        self.seq = 0
+        self.polls = 0
+        self.broker_calls = 0
+        self.errors = 0
+        self._subscribers = set()
+        self._task = None
+        self._wake = None
+
+    async def _fetch(self):
+        state = {}
+        for topic, (fetch, key) in TOPICS.items():
+            data = jsonable_encoder(await broker_call(topic, fetch))
+            self.broker_calls += 1
+            state[topic] = data if key is None else _index(data, key)
+        return state
+
+    def snapshot_message(self) -> str:
+        return json.dumps({"type": "snapshot", "seq": self.seq, "data": self.state})
+
+    async def _poll_once(self):
+        state = await self._fetch()
+        self.polls += 1
+        changes = {}
+        for topic, (_, key) in TOPICS.items():
+            change = diff_topic(self.state.get(topic, {}), state[topic], key is not None)
+            if change is not None:
+                changes[topic] = change
+        self.state = state
+        if changes:
+            self.seq += 1
+            self._publish(json.dumps({"type": "diff", "seq": self.seq, "ts": time.time(), "changes": changes}))
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                await self._poll_once()
+            except Exception as e:
+                self.errors += 1
+                self._publish(json.dumps({"type": "error", "detail": str(e)}))
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+        self._task = None
+
+    def _publish(self, message: str):
+        # Serialized once, shared by every client
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: drop what it hasn't read and resync it from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_message())
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client; its queue starts with a full snapshot"""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        queue.put_nowait(self.snapshot_message())
+        self._subscribers.add(queue)
+        if self._task is None:
+            # First subscriber starts the poller; its first poll arrives as a diff
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def notify(self):
+        """Poll now instead of waiting for the interval, e.g. after an order was placed"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "interval": self.interval,
+            "polls": self.polls,
+            "broker_calls": self.broker_calls,
+            "errors": self.errors,
+            "seq": self.seq,
+        }
+
+
+live_feed = LiveFeed()
@@ -0,0 +1,290 @@
+# Local decision model
+# Logistic model on scale-free versions of the technical features llm_strategy sends to the LLM,
+# trained offline with scikit-learn on journaled decisions (every decision row stores its
+# technical_data) labelled with what the bar store shows happened next: did a bracket of
+# -stop_pct / +target_pct entered at the next bar's open hit its target first?
+#
+# The fitted scaler and coefficients are exported to a small .npz file, so inference is a dot
+# product in numpy, needs no scikit-learn import and takes microseconds per symbol; a whole
+# universe is scored in one matrix product.
+#
+#   cd backend && python -m app.local_model --out data/local_model.npz
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.batch_indicators import FEATURES, FEATURE_INDEX, RSI_ZONES, VOLUME_TRENDS
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "local_model.npz")
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", DEFAULT_PATH)
+# Model inputs, all comparable across symbols and price levels
+MODEL_FEATURES = (
+    "price_vs_sma20", "price_vs_sma50", "sma_spread", "rsi_9", "macd_pct", "signal_pct",
+    "histogram_pct", "crossover_detected", "trend_reversal", "rsi_zone", "volume_trend",
+)
+# Bars after the decision a bracket gets to resolve: five trading days of 15-minute bars
+DEFAULT_HORIZON = 26 * 5
+# Order price increments: cents from $1.00, hundredths of a cent below (Alpaca's sub-dollar rule)
+PRICE_DECIMALS, SUB_DOLLAR_DECIMALS = 2, 4
+# volume_trend code -> direction: decreasing -1, increasing +1, otherwise 0
+VOLUME_DIRECTION = np.array([{"decreasing": -1.0, "increasing": 1.0}.get(t, 0.0) for t in VOLUME_TRENDS])
+
+
+def raw_row(technical_data) -> list:
+    """technical_data (from build_technical_data or batch_indicators.feature_dict) as a FEATURES row"""
+    t = technical_data
+    price = t["current_price"] if "current_price" in t else t["price"]
+    values = {
+        "price": price,
+        "histogram": t["histogram"] if "histogram" in t else t["macd"] - t["signal"],
+        "rsi_zone": RSI_ZONES.index(t["rsi_zone"]),
+        "volume_trend": VOLUME_TRENDS.index(t["volume_trend"]),
+    }
+    return [float(values[name] if name in values else t[name]) for name in FEATURES]
+
+
+def model_features(features) -> np.ndarray:
+    """(n x len(FEATURES)) compute_features rows -> (n x len(MODEL_FEATURES)) model inputs"""
+    f = np.atleast_2d(np.asarray(features, dtype=np.float64))
+    price = f[:, FEATURE_INDEX["price"]]
+    volume = f[:, FEATURE_INDEX["volume_trend"]].astype(int)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns = (
+            f[:, FEATURE_INDEX["price_vs_sma20"]],
+            f[:, FEATURE_INDEX["price_vs_sma50"]],
+            (f[:, FEATURE_INDEX["sma_20"]] / f[:, FEATURE_INDEX["sma_50"]] - 1) * 100,
+            # Flat stretches give a NaN RSI; treat them as neutral
+            np.where(np.isnan(f[:, FEATURE_INDEX["rsi_9"]]), 50.0, f[:, FEATURE_INDEX["rsi_9"]]),
+            f[:, FEATURE_INDEX["macd"]] / price * 100,
+            f[:, FEATURE_INDEX["signal"]] / price * 100,
+            f[:, FEATURE_INDEX["histogram"]] / price * 100,
+            f[:, FEATURE_INDEX["crossover_detected"]],
+            f[:, FEATURE_INDEX["trend_reversal"]],
+            f[:, FEATURE_INDEX["rsi_zone"]],
+            VOLUME_DIRECTION[volume],
+        )
+    return np.nan_to_num(np.column_stack(columns), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _finite(value: float) -> float:
+    # nan_to_num's mapping: NaN and +-inf become 0
+    return value if math.isfinite(value) else 0.0
+
+
+def _ratio(a: float, b: float, offset: float = 0.0) -> float:
+    try:
+        return _finite((a / b - offset) * 100)
+    except ZeroDivisionError:
+        return 0.0
+
+
+def scalar_features(row) -> list:
+    """model_features for a single FEATURES row in plain Python; numpy costs ~50us at n=1"""
+    f = dict(zip(FEATURES, row))
+    return [
+        _finite(f["price_vs_sma20"]),
+        _finite(f["price_vs_sma50"]),
+        _ratio(f["sma_20"], f["sma_50"], 1.0),
+        50.0 if math.isnan(f["rsi_9"]) else _finite(f["rsi_9"]),
+        _ratio(f["macd"], f["price"]),
+        _ratio(f["signal"], f["price"]),
+        _ratio(f["histogram"], f["price"]),
+        f["crossover_detected"],
+        f["trend_reversal"],
+        f["rsi_zone"],
+        float(VOLUME_DIRECTION[int(f["volume_trend"])]),
+    ]
+
+
+class LocalModel:
+    """Standardized logistic regression exported from scikit-learn, plus its bracket settings"""
+
+    def __init__(self, mean, scale, coef, intercept: float, stop_pct: float, target_pct: float,
+                 threshold: float = None, meta: dict = None):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.stop_pct = stop_pct
+        self.target_pct = target_pct
+        # Break-even win rate of the bracket, the same bar bot.confidence_gate applies
+        self.threshold = threshold if threshold is not None else stop_pct / (stop_pct + target_pct)
+        self.meta = meta or {}
+        # Fold the scaler into the weights: p = sigmoid(x . w + b)
+        self._weights = self.coef / self.scale
+        self._bias = self.intercept - float(np.dot(self.mean, self._weights))
+        self._weights_list = self._weights.tolist()
+
+    @property
+    def name(self) -> str:
+        return self.meta.get("name", "local")
+
+    def probabilities(self, features) -> np.ndarray:
+        """P(target before stop) for each compute_features row"""
+        z = model_features(features) @ self._weights + self._bias
+        return 1 / (1 + np.exp(-z))
+
+    def probability(self, technical_data) -> float:
+        weights = self._weights_list
+        z = sum(w * x for w, x in zip(weights, scalar_features(raw_row(technical_data)))) + self._bias
+        return 1 / (1 + math.exp(-z))
+
+    def plan(self, price: float, probability: float, qty: int = None) -> dict:
+        """Trade-plan dict in llm_strategy's shape (without technical_context)"""
+        if probability < self.threshold:
+            return {"decision": "HOLD",
+                    "reason": f"Local model p={probability:.3f} below {self.threshold:.3f}"}
+        decimals = PRICE_DECIMALS if price >= 1 else SUB_DOLLAR_DECIMALS
+        stop_loss = round(price * (1 - self.stop_pct), decimals)
+        take_profit = round(price * (1 + self.target_pct), decimals)
+        if not 0 < stop_loss < price < take_profit:
+            # Too cheap for the bracket to span a price increment on both sides
+            return {"decision": "HOLD",
+                    "reason": f"Local model bracket collapses at price {price} "
+                              f"(stop {stop_loss}, target {take_profit})"}
+        plan = {
+            "decision": "BUY", "side": "buy", "order_type": "market",
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "confidence": probability,
+            "risk_reward": self.target_pct / self.stop_pct,
+            "reasoning": f"Local model {self.name}: p={probability:.3f}",
+        }
+        if qty is not None:
+            plan["qty"] = qty
+        return plan
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = {**self.meta, "stop_pct": self.stop_pct, "target_pct": self.target_pct,
+                "threshold": self.threshold, "features": list(MODEL_FEATURES)}
+        np.savez(path, mean=self.mean, scale=self.scale, coef=self.coef,
+                 intercept=np.array([self.intercept]), meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: str = LOCAL_MODEL_PATH) -> "LocalModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("features") != list(MODEL_FEATURES):
+                raise ValueError(f"{path} was trained on different features; retrain it")
+            return cls(data["mean"], data["scale"], data["coef"], float(data["intercept"][0]),
+                       meta["stop_pct"], meta["target_pct"], meta["threshold"], meta)
+
+
+# Training
+def journal_samples(journal, symbol: str = None):
+    """[(symbol, epoch seconds, technical_data)] for every journaled decision with features"""
+    samples, cursor = [], None
+    while True:
+        page = journal.history("decisions", symbol=symbol, cursor=cursor, limit=500,
+                               columns=("id", "ts", "symbol", "features"))
+        for row in page["items"]:
+            if row["features"]:
+                ts = row["ts"] if row["ts"].tzinfo else row["ts"].replace(tzinfo=timezone.utc)
+                samples.append((row["symbol"], int(ts.timestamp()), json.loads(row["features"])))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return samples[::-1]
+
+
+def bracket_outcome(bars, stop_pct: float, target_pct: float, horizon: int = DEFAULT_HORIZON):
+    """1 if a long entered at the first bar's open reaches +target before -stop, else 0; None without bars"""
+    if len(bars) == 0:
+        return None
+    entry = float(bars["open"][0])
+    stop, target = entry * (1 - stop_pct), entry * (1 + target_pct)
+    lows = np.asarray(bars["low"][:horizon])
+    highs = np.asarray(bars["high"][:horizon])
+    stopped = np.flatnonzero(lows <= stop)
+    hit = np.flatnonzero(highs >= target)
+    first_stop = stopped[0] if len(stopped) else len(lows)
+    first_hit = hit[0] if len(hit) else len(highs)
+    if first_stop == first_hit == len(lows):
+        # Neither leg within the horizon: judge by where it closed
+        return int(float(bars["close"][len(lows) - 1]) > entry)
+    # Like the backtester, the stop wins when both legs are touched in one bar
+    return int(first_hit < first_stop)
+
+
+def labelled(samples, store, stop_pct: float, target_pct: float, horizon: int = DEFAULT_HORIZON):
+    """(X raw FEATURES rows, y outcomes) for the samples the bar store has later bars for"""
+    rows, labels = [], []
+    for symbol, ts, technical_data in samples:
+        outcome = bracket_outcome(store.bars(symbol, since=ts + 1), stop_pct, target_pct, horizon)
+        if outcome is None:
+            continue
+        rows.append(raw_row(technical_data))
+        labels.append(outcome)
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES)), np.array(labels, dtype=int)
+
+
+def train(rows, labels, stop_pct: float, target_pct: float, threshold: float = None,
+          holdout: float = 0.2, name: str = None) -> "tuple[LocalModel, dict]":
+    """Fit on the oldest (1 - holdout) of the rows, score the rest, then refit on everything"""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import roc_auc_score
+    from sklearn.preprocessing import StandardScaler
+
+    X = model_features(rows)
+    y = np.asarray(labels)
+    if len(set(y.tolist())) < 2:
+        raise ValueError("need both winning and losing outcomes to train")
+
+    def fit(X, y):
+        # Constant columns (e.g. no crossovers in the sample) get scale 1, not a division by zero
+        scaler = StandardScaler().fit(X)
+        model = LogisticRegression(max_iter=1000).fit(scaler.transform(X), y)
+        return scaler, model
+
+    report = {"rows": int(len(y)), "positive_rate": float(y.mean())}
+    split = int(len(y) * (1 - holdout))
+    if 0 < split < len(y) and len(set(y[:split].tolist())) == 2:
+        scaler, model = fit(X[:split], y[:split])
+        p = model.predict_proba(scaler.transform(X[split:]))[:, 1]
+        cut = threshold if threshold is not None else stop_pct / (stop_pct + target_pct)
+        taken = p >= cut
+        report["holdout"] = {
+            "rows": int(len(p)),
+            "auc": float(roc_auc_score(y[split:], p)) if len(set(y[split:].tolist())) == 2 else None,
+            "buy_rate": float(taken.mean()),
+            "buy_win_rate": float(y[split:][taken].mean()) if taken.any() else None,
+        }
+
+    scaler, model = fit(X, y)
+    meta = {"name": name or f"local-{datetime.now(timezone.utc):%Y%m%d%H%M}", "rows": int(len(y)),
+            "trained_at": datetime.now(timezone.utc).isoformat()}
+    local = LocalModel(scaler.mean_, scaler.scale_, model.coef_[0], model.intercept_[0],
+                       stop_pct, target_pct, threshold, meta)
+    return local, report
+
+
+def main():
+    from app.bar_store import get_store
+    from app.journal import Journal, JOURNAL_URL
+
+    parser = argparse.ArgumentParser(description="Train the local decision model from the journal")
+    parser.add_argument("--journal", default=JOURNAL_URL, help="journal database URL")
+    parser.add_argument("--symbol", help="only this symbol's decisions")
+    parser.add_argument("--stop-pct", type=float, default=0.01)
+    parser.add_argument("--target-pct", type=float, default=0.02)
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="bars a bracket gets to resolve")
+    parser.add_argument("--threshold", type=float, help="minimum P(win) to BUY (default: break-even)")
+    parser.add_argument("--out", default=LOCAL_MODEL_PATH)
+    args = parser.parse_args()
+
+    samples = journal_samples(Journal(args.journal), args.symbol)
+    rows, labels = labelled(samples, get_store(), args.stop_pct, args.target_pct, args.horizon)
+    print(f"{len(samples)} journaled decisions, {len(labels)} with outcomes in the bar store")
+    model, report = train(rows, labels, args.stop_pct, args.target_pct, args.threshold)
+    model.save(args.out)
+    print(json.dumps(report, indent=2))
+    print(f"Saved {model.name} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
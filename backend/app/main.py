@@ -1,8 +1,41 @@
 # FastAPI app entrypoint
 # This file will contain the main FastAPI application setup 
 
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routes import api
+from app import health
+from app.journal import journal
+from app.ledger import ledger
+from app.routes import api, history, live, metrics
 
-app = FastAPI(title="Trading Bot")
-app.include_router(api.router)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+def _startup_check():
+    report = health.run_checks()
+    for name, result in report["checks"].items():
+        if not result["ok"]:
+            logger.warning("Startup check %s failed: %s", name, result["error"])
+
+@asynccontextmanager
+async def lifespan(app):
+    # Health check in the background: serving starts at once, and the broker and journal
+    # connections it opens are warm by the first request
+    app.state.startup_check = asyncio.create_task(asyncio.to_thread(_startup_check))
+    # Seed the local order/position ledger and keep it current from trade updates
+    if os.getenv("LEDGER_ENABLED", "1") == "1":
+        try:
+            await ledger.start()
+        except Exception:
+            logger.exception("Ledger disabled, reading from the broker")
+    yield
+    await ledger.stop()
+    journal.flush()
+
+app = FastAPI(title="Trading Bot", lifespan=lifespan)
+app.include_router(api.router)
+app.include_router(live.router)
+app.include_router(history.router)
+app.include_router(metrics.router)
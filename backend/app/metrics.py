@@ -0,0 +1,188 @@
+# Hot-path latency metrics
+# Timing spans around each stage of a bot cycle (bar fetch, DataFrame build, indicators, gate,
+# prompt, LLM call, order) feed per-stage and per-symbol latency histograms, rendered in the
+# Prometheus text format by the /metrics route. A span costs two perf_counter() calls and one
+# bucket lookup, so it stays on in production.
+#
+#   with symbol_scope("SPY"), span("indicators"):
+#       technical_data = build_technical_data(df, "SPY")
+#
+# Set METRICS_TRACE_DIR to also write every cycle's spans as one JSON line (see trace_cycle).
+
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Seconds; spans range from sub-millisecond indicator math to multi-second LLM calls
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TRACE_DIR = os.getenv("METRICS_TRACE_DIR")
+
+_symbol = contextvars.ContextVar("metrics_symbol", default=None)
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values"""
+
+    def __init__(self, name: str, help: str, labels=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def summary(self):
+        """{label values: {"count", "sum", "avg"}}"""
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        return {
+            labels: {"count": sum(s[:-1]), "sum": s[-1], "avg": s[-1] / max(sum(s[:-1]), 1)}
+            for labels, s in items
+        }
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _labels(self.labels, label_values, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Histograms plus collector callbacks rendered together for /metrics"""
+
+    def __init__(self):
+        self.histograms = []
+        self.collectors = []
+
+    def histogram(self, name: str, help: str, labels=(), buckets=STAGE_BUCKETS) -> Histogram:
+        histogram = Histogram(name, help, labels, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def collector(self, fn):
+        """Register fn() -> [(name, type, help, [(labels dict, value)])] evaluated on each scrape"""
+        self.collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.render())
+        for collect in self.collectors:
+            try:
+                families = collect()
+            except Exception:
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "bot_stage_seconds", "Latency of each bot pipeline stage", ("stage",))
+symbol_stage_seconds = metrics.histogram(
+    "bot_symbol_stage_seconds", "Latency of each bot pipeline stage per symbol", ("stage", "symbol"))
+
+
+@contextmanager
+def symbol_scope(symbol: str):
+    """Label spans opened inside this block (in this thread or task) with `symbol`"""
+    token = _symbol.set(symbol.upper() if symbol else None)
+    try:
+        yield
+    finally:
+        _symbol.reset(token)
+
+
+@contextmanager
+def span(stage: str, symbol: str = None):
+    """Time the block into the stage histograms and the current cycle trace, if any"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        symbol = symbol or _symbol.get()
+        stage_seconds.observe(elapsed, stage)
+        if symbol:
+            symbol_stage_seconds.observe(elapsed, stage, symbol.upper())
+        trace = _trace.get()
+        if trace is not None:
+            trace["spans"].append({
+                "stage": stage, "symbol": symbol,
+                "start_ms": round((start - trace["started"]) * 1000, 3),
+                "ms": round(elapsed * 1000, 3),
+            })
+
+
+@contextmanager
+def trace_cycle(name: str, trace_dir: str = None):
+    """
+    Collect every span of one cycle and append it to <trace_dir>/traces-YYYYMMDD.jsonl.
+    Off unless trace_dir or METRICS_TRACE_DIR is set. Worker threads only see the trace
+    when started through contextvars.copy_context() (see BotScheduler._in_thread).
+    """
+    trace_dir = trace_dir or TRACE_DIR
+    if not trace_dir:
+        yield None
+        return
+    trace = {"cycle": name, "started": time.perf_counter(), "spans": []}
+    token = _trace.set(trace)
+    wall = datetime.now(timezone.utc)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        os.makedirs(trace_dir, exist_ok=True)
+        record = {
+            "cycle": name,
+            "ts": wall.isoformat(),
+            "ms": round((time.perf_counter() - trace["started"]) * 1000, 3),
+            "spans": trace["spans"],
+        }
+        path = os.path.join(trace_dir, f"traces-{wall:%Y%m%d}.jsonl")
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
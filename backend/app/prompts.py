@@ -0,0 +1,274 @@
+# LLM prompt versions and decision validation
+# A prompt version is a static system prefix (built once; identical across calls, so the API's
+# prompt caching applies), a renderer for the per-call user message and an optional structured
+# output schema. v2 sends the features as one compact line at fixed precision and asks for
+# JSON-schema output; v1 is the original free-text prompt, kept for rollback and comparison
+# (see benchmarks/bench_prompts.py). LLM_PROMPT_VERSION picks the active one.
+#
+# Every answer, whatever the version, goes through TradeDecision.parse before it can become an
+# order: HOLD, or a long trade with stop_loss < entry < take_profit and confidence in [0, 1].
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+
+PROMPT_VERSION = os.getenv("LLM_PROMPT_VERSION", "v2")
+
+SYSTEM_PREFIX = """You are an expert day trader. Given a 15-minute technical snapshot of one US stock, decide whether to open a long position held days to weeks. Long only; trade only with favorable risk/reward. Weigh trend, momentum, volume confirmation and risk/reward.
+Fields: px last close; d20/d50 % from SMA20/50; x/rev 1 if SMA20 just crossed above/below SMA50; zone RSI zone; vol volume trend; c/v last 10 closes/volumes, oldest first.
+HOLD: other fields null. BUY: stop_loss < px < take_profit; confidence = probability (0-1) of profit; reasoning in one sentence."""
+
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decision": {"type": "string", "enum": ["BUY", "HOLD"]},
+        "side": {"type": ["string", "null"], "enum": ["buy", None]},
+        "order_type": {"type": ["string", "null"], "enum": ["market", "limit", None]},
+        "stop_loss": {"type": ["number", "null"]},
+        "take_profit": {"type": ["number", "null"]},
+        "confidence": {"type": ["number", "null"]},
+        "risk_reward": {"type": ["number", "null"]},
+        "reasoning": {"type": "string"},
+    },
+    "required": ["decision", "side", "order_type", "stop_loss", "take_profit", "confidence",
+                 "risk_reward", "reasoning"],
+    "additionalProperties": False,
+}
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "trade_decision", "strict": True, "schema": DECISION_SCHEMA},
+}
+
+
+def _price(value) -> str:
+    value = float(value)
+    return f"{value:.2f}" if abs(value) >= 1 else f"{value:.4f}"
+
+
+def _join(values, fmt) -> str:
+    return ",".join(fmt(v) for v in values)
+
+
+def compact_prompt(technical_data, symbol: str, qty: int) -> str:
+    """One line of features at fixed precision, plus the last closes and volumes"""
+    t = technical_data
+    return (
+        f"{symbol} qty={qty}\n"
+        f"px={_price(t['current_price'])} sma20={_price(t['sma_20'])} sma50={_price(t['sma_50'])} "
+        f"rsi9={float(t['rsi_9']):.1f} macd={float(t['macd']):.4g} sig={float(t['signal']):.4g} "
+        f"d20={float(t['price_vs_sma20']):.2f} d50={float(t['price_vs_sma50']):.2f} "
+        f"zone={t['rsi_zone']} vol={t['volume_trend']} "
+        f"x={int(bool(t['crossover_detected']))} rev={int(bool(t['trend_reversal']))}\n"
+        f"c={_join(t['recent_closes'], _price)}\n"
+        f"v={_join(t['recent_volumes'], lambda v: str(int(round(float(v)))))}"
+    )
+
+
+def legacy_prompt(technical_data, symbol, qty):
+    """Create comprehensive prompt with technical data"""
+    return f"""
+    You are an expert day trader analyzing {symbol} using technical analysis.
+    
+    CURRENT MARKET DATA:
+    - Symbol: {technical_data['symbol']}
+    - Current Price: ${technical_data['current_price']:.4f}
+    - SMA(20): ${technical_data['sma_20']:.4f}
+    - SMA(50): ${technical_data['sma_50']:.4f}
+    - RSI(9): {technical_data['rsi_9']:.4f}
+    - MACD: {technical_data['macd']:.2f}
+    - MACD Signal: {technical_data['signal']:.2f}
+    - Recent Closes: {technical_data['recent_closes']}
+    - Recent volumes: {technical_data['recent_volumes']}
+    - Price vs SMA(20): {technical_data['price_vs_sma20']:.4f}%
+    - Price vs SMA(50): {technical_data['price_vs_sma50']:.4f}%
+    - RSI Zone: {technical_data['rsi_zone']}
+    - Volume Trend: {technical_data['volume_trend']}
+    - SMA Crossover Detected: {technical_data['crossover_detected']}
+    - Trend Reversal: {technical_data['trend_reversal']}
+    
+    RECENT PRICE ACTION (Last 10 bars):
+    - Closes: {technical_data['recent_closes']}
+    - Volumes: {technical_data['recent_volumes']}
+    
+    RULES:
+    - Long only
+    
+    ANALYSIS REQUIRED:
+    1. Assess the current trend (bullish/bearish/neutral)
+    2. Evaluate momentum
+    3. Check for entry signals
+    4. Consider volume confirmation
+    5. Assess risk/reward ratio
+    
+    DECISION FORMAT:
+    DECISION FORMAT:
+    - If no trade: respond with exactly HOLD (no extra text).
+    - If trade: respond with JSON ONLY. Do not include code fences, or markdown. 
+    You must include a confidence level between 0 and 1 which indicates your confidence that the trade will return profit.
+    You must calculate the risk/reward ratio. Focus on finding trades with a favorable risk-to-reward ratio that can be held for several days to weeks.
+    Return ONLY the JSON object in the following format:
+    {{
+        "side": "buy",
+        "qty": {qty},
+        "order_type": "market",
+        "stop_loss": 435.5,
+        "take_profit": 450.0,
+        "reasoning": "Detailed explanation of your analysis including key support/resistance levels and momentum indicators",
+        "confidence": *indicate confidence level*,
+        "risk_reward": *indicate risk/reward ratio*
+    }}
+    """
+
+
+class PromptVersion:
+    """Static prefix + per-call renderer + optional response_format"""
+
+    def __init__(self, name: str, render, system: str = None, response_format: dict = None):
+        self.name = name
+        self.render = render
+        self.system = system
+        self.response_format = response_format
+
+    def messages(self, prompt: str):
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        return messages + [{"role": "user", "content": prompt}]
+
+    def request(self, prompt: str) -> dict:
+        """chat.completions.create keyword arguments other than the model"""
+        request = {"messages": self.messages(prompt)}
+        if self.response_format:
+            request["response_format"] = self.response_format
+        return request
+
+
+PROMPTS = {
+    "v1": PromptVersion("v1", legacy_prompt),
+    "v2": PromptVersion("v2", compact_prompt, SYSTEM_PREFIX, RESPONSE_FORMAT),
+}
+
+
+def get_prompt(version: str = None) -> PromptVersion:
+    return PROMPTS[version or PROMPT_VERSION]
+
+
+class InvalidDecision(ValueError):
+    """The model's answer is not a usable HOLD or trade plan"""
+
+
+def _number(data, field, required=True):
+    value = data.get(field)
+    if value is None:
+        if required:
+            raise InvalidDecision(f"{field} is missing")
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise InvalidDecision(f"{field} must be a finite number, got {value!r}")
+    return float(value)
+
+
+@dataclass
+class TradeDecision:
+    decision: str  # BUY or HOLD
+    side: str = None
+    order_type: str = "market"
+    stop_loss: float = None
+    take_profit: float = None
+    confidence: float = None
+    risk_reward: float = None
+    reasoning: str = ""
+    qty: int = None
+
+    @classmethod
+    def parse(cls, text: str, entry_price: float = None) -> "TradeDecision":
+        """Validate a raw answer (bare HOLD, or JSON in either prompt version's format)"""
+        text = (text or "").strip()
+        if text.startswith("```"):
+            # Free-text answers sometimes arrive fenced despite the instructions
+            text = text.strip("`").removeprefix("json").strip()
+        if text.upper() == "HOLD":
+            return cls("HOLD")
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise InvalidDecision(f"not JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise InvalidDecision("expected a JSON object")
+
+        # v1 answers carry no "decision" field: a trade plan is a BUY
+        decision = str(data.get("decision") or ("BUY" if data.get("side") else "HOLD")).upper()
+        reasoning = str(data.get("reasoning") or "")
+        if decision == "HOLD":
+            return cls("HOLD", reasoning=reasoning)
+        if decision != "BUY":
+            raise InvalidDecision(f"decision must be BUY or HOLD, got {decision!r}")
+        side = str(data.get("side") or "buy").lower()
+        if side != "buy":
+            raise InvalidDecision(f"long only, got side {side!r}")
+        order_type = str(data.get("order_type") or "market").lower()
+        if order_type not in ("market", "limit"):
+            raise InvalidDecision(f"unsupported order_type {order_type!r}")
+
+        stop_loss = _number(data, "stop_loss")
+        take_profit = _number(data, "take_profit")
+        confidence = _number(data, "confidence")
+        risk_reward = _number(data, "risk_reward", required=False)
+        if not 0 <= confidence <= 1:
+            raise InvalidDecision(f"confidence must be within [0, 1], got {confidence}")
+        if not 0 < stop_loss < take_profit:
+            raise InvalidDecision(f"need 0 < stop_loss < take_profit, got {stop_loss} / {take_profit}")
+        if entry_price is not None:
+            entry_price = float(entry_price)
+            if not stop_loss < entry_price < take_profit:
+                raise InvalidDecision(f"entry {entry_price} is not between stop_loss and take_profit")
+            # Recomputed rather than trusting the model's arithmetic
+            risk_reward = (take_profit - entry_price) / (entry_price - stop_loss)
+        qty = data.get("qty")
+        return cls("BUY", side, order_type, stop_loss, take_profit, confidence, risk_reward, reasoning,
+                   int(qty) if isinstance(qty, (int, float)) and qty > 0 else None)
+
+    def to_plan(self) -> dict:
+        """Trade plan dict in the shape bot.execute_decision reads"""
+        plan = {
+            "decision": self.decision, "side": self.side, "order_type": self.order_type,
+            "stop_loss": self.stop_loss, "take_profit": self.take_profit,
+            "confidence": self.confidence, "risk_reward": self.risk_reward, "reasoning": self.reasoning,
+        }
+        if self.qty is not None:
+            plan["qty"] = self.qty
+        return plan
+
+
+class LLMUsage:
+    """Token, call and invalid-answer counters for /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+                       "invalid": 0, "retries": 0}
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value or 0
+
+    def record(self, usage):
+        """Fold in an OpenAI `usage` object (missing on some stand-ins)"""
+        if usage is None:
+            self.add(calls=1)
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.add(calls=1, prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+                 cached_tokens=getattr(details, "cached_tokens", 0) if details else 0)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        calls = max(counts["calls"], 1)
+        counts["prompt_tokens_per_call"] = counts["prompt_tokens"] / calls
+        counts["completion_tokens_per_call"] = counts["completion_tokens"] / calls
+        return counts
+
+
+llm_usage = LLMUsage()
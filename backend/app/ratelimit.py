@@ -0,0 +1,291 @@
+# Client-side rate limiting and retries for upstream APIs
+# One token bucket per upstream (Alpaca trading, Alpaca data, OpenAI), shared by every thread in
+# the process: the routes, the bot, the scheduler and the ledger's reconciliation all draw on the
+# same budget, so adding symbols or dashboards makes callers wait instead of collecting 429s.
+# Alpaca clients are limited at their HTTP session (app.clients installs it), so every SDK
+# request counts, pagination included; OpenAI calls go through Upstream.call in strategy.ask_llm.
+#
+# Waiters are served by priority lane, then arrival: order submission ("order"), then reads a
+# user or the bot is waiting on ("interactive"), then housekeeping ("background"). Requests that
+# write to the trading API default to the order lane; `with priority("background"):` demotes a
+# block of work.
+#
+# 429s, 5xx and connection errors are retried with full-jitter exponential backoff, waiting at
+# least as long as Retry-After / X-RateLimit-Reset asks; a 429 also pauses the whole bucket.
+# Requests that aren't safe to repeat (order submission) are only retried when the upstream
+# cannot have acted on them: a 429, or a failure to connect.
+#
+#   ALPACA_TRADING_RATE / ALPACA_DATA_RATE / OPENAI_RATE   requests per minute (200 / 200 / 500)
+#   RATE_LIMIT_RETRIES                                     retries per request (4)
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+LANES = ("order", "interactive", "background")
+RATES = {
+    "trading": float(os.getenv("ALPACA_TRADING_RATE", 200)),
+    "data": float(os.getenv("ALPACA_DATA_RATE", 200)),
+    "openai": float(os.getenv("OPENAI_RATE", 500)),
+}
+RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", 4))
+BASE_DELAY = 0.25
+MAX_DELAY = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+
+logger = logging.getLogger(__name__)
+
+_lane = contextvars.ContextVar("rate_limit_lane", default=None)
+
+
+@contextlib.contextmanager
+def priority(lane: str):
+    """Run upstream calls made in this block (and this thread) in `lane`"""
+    token = _lane.set(LANES.index(lane))
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def retry_after(headers) -> float:
+    """Seconds the upstream asked us to wait, from Retry-After or X-RateLimit-Reset, else 0"""
+    if not headers:
+        return 0.0
+    try:
+        value = headers.get("Retry-After")
+        if value is not None:
+            return min(max(float(value), 0.0), MAX_DELAY)
+        reset = headers.get("X-RateLimit-Reset")
+        if reset is not None:
+            return min(max(float(reset) - time.time(), 0.0), MAX_DELAY)
+    except ValueError:
+        pass
+    return 0.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket; waiters are served lowest lane first, then in arrival order"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []  # heap of (lane, arrival)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+        self.acquired = [0] * len(LANES)
+        self.waited = [0.0] * len(LANES)
+
+    def _refill(self, now: float):
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self.tokens = min(self.burst, self.tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def acquire(self, lane: int = 1) -> float:
+        """Block until a token is free for `lane`; returns the seconds waited"""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (lane, next(self._arrivals))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                    elif self.tokens >= 1 and now >= self._paused_until:
+                        self.tokens -= 1
+                        break
+                    else:
+                        self._cond.wait(max((1 - self.tokens) / self.rate, self._paused_until - now))
+            finally:
+                if self._waiters[0] == ticket:
+                    heapq.heappop(self._waiters)
+                else:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.acquired[lane] += 1
+            self.waited[lane] += waited
+        return waited
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds`, e.g. after the upstream answered 429"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+    def limit_to(self, remaining: float):
+        """Never hold more tokens than the upstream says are left in its window"""
+        with self._cond:
+            self.tokens = min(self.tokens, remaining)
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            queued = [0] * len(LANES)
+            for lane, _ in self._waiters:
+                queued[lane] += 1
+            return {
+                "rate_per_min": round(self.rate * 60, 1),
+                "tokens": round(self.tokens, 2),
+                "paused_s": round(max(self._paused_until - time.monotonic(), 0.0), 3),
+                "lanes": {
+                    name: {"queued": queued[i], "acquired": self.acquired[i], "waited_s": round(self.waited[i], 3)}
+                    for i, name in enumerate(LANES)
+                },
+            }
+
+
+class Upstream:
+    """Rate limit and retry policy for one upstream API"""
+
+    def __init__(self, name: str, rate_per_min: float, burst: float = None, retries: int = RETRIES,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY, safe_methods=SAFE_METHODS):
+        self.name = name
+        # Default burst: a tenth of the per-minute budget. Refilling at (budget - burst) per minute
+        # keeps any 60-second window, a full bucket at its start included, inside the budget.
+        burst = burst or max(rate_per_min / 10.0, 1.0)
+        self.bucket = TokenBucket(max(rate_per_min - burst, 1.0) / 60.0, burst)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.safe_methods = safe_methods
+        # Exception types for transient failures, and the subset raised before a request was sent;
+        # set by whoever installs the upstream on a client
+        self.transient = ()
+        self.unsent = ()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "throttled": 0, "retries": 0, "failures": 0}
+        self.retry_reasons = {}
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _lane(self, method: str) -> int:
+        lane = _lane.get()
+        if lane is not None:
+            return lane
+        # Submissions and cancels on the trading API jump the queue
+        return 0 if self.name == "trading" and method not in ("GET", "HEAD", "OPTIONS") else 1
+
+    def _count(self, key: str, reason: str = None):
+        with self._lock:
+            self.counters[key] += 1
+            if reason is not None:
+                self.retry_reasons[reason] = self.retry_reasons.get(reason, 0) + 1
+
+    def call(self, fn, method: str = "GET"):
+        """
+        fn() under the bucket, retried on transient failures. fn either returns a response with
+        status_code / headers (retried on RETRY_STATUSES and, once out of retries, returned as
+        is) or raises; exceptions carrying a status_code (SDK API errors) are treated like
+        responses.
+        """
+        method = method.upper()
+        safe = "*" in self.safe_methods or method in self.safe_methods
+        lane = self._lane(method)
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire(lane)
+            self._count("requests")
+            last = attempt == self.retries
+            try:
+                result = fn()
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status is None:
+                    if last or not isinstance(e, self.transient) or not (safe or isinstance(e, self.unsent)):
+                        self._count("failures")
+                        raise
+                    reason, wait = type(e).__name__, 0.0
+                else:
+                    headers = getattr(getattr(e, "response", None), "headers", None)
+                    if last or not self._retryable(status, safe):
+                        self._count("failures")
+                        raise
+                    reason, wait = str(status), self._throttled(status, headers)
+            else:
+                status = getattr(result, "status_code", None)
+                headers = getattr(result, "headers", None)
+                if status is None or not self._retryable(status, safe):
+                    self._observe(headers)
+                    return result
+                if last:
+                    self._count("failures")
+                    return result
+                reason, wait = str(status), self._throttled(status, headers)
+                result.close()
+            delay = max(self.backoff(attempt), wait)
+            self._count("retries", reason)
+            logger.info("%s upstream %s, retry %d/%d in %.2fs", self.name, reason, attempt + 1, self.retries, delay)
+            time.sleep(delay)
+
+    def _retryable(self, status: int, safe: bool) -> bool:
+        return status == 429 or (safe and status in RETRY_STATUSES)
+
+    def _throttled(self, status: int, headers) -> float:
+        wait = retry_after(headers)
+        if status == 429:
+            self._count("throttled")
+            # Everyone sharing this upstream backs off, not just the caller that was refused
+            self.bucket.pause(wait or self.base_delay)
+        return wait
+
+    def _observe(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining") if headers else None
+        if remaining is not None:
+            try:
+                self.bucket.limit_to(float(remaining))
+            except ValueError:
+                pass
+
+    def install(self, session):
+        """Send every request of a requests.Session through this upstream"""
+        import requests
+
+        self.transient = (requests.ConnectionError, requests.Timeout)
+        self.unsent = (requests.ConnectTimeout,)
+        send = session.request
+
+        def request(method, url, *args, **kwargs):
+            return self.call(lambda: send(method, url, *args, **kwargs), method)
+
+        session.request = request
+        return session
+
+    def stats(self):
+        with self._lock:
+            stats = {**self.counters, "retry_reasons": dict(self.retry_reasons)}
+        return {**stats, **self.bucket.stats()}
+
+
+class RateLimiter:
+    """Process-wide upstreams by name"""
+
+    def __init__(self, rates=None):
+        self.upstreams = {name: Upstream(name, rate) for name, rate in (rates or RATES).items()}
+        if "openai" in self.upstreams:
+            # OpenAI calls don't move money; a repeated completion only costs tokens
+            self.upstreams["openai"].safe_methods = {"*"}
+
+    def __getitem__(self, name: str) -> Upstream:
+        return self.upstreams[name]
+
+    def stats(self):
+        return {name: upstream.stats() for name, upstream in self.upstreams.items()}
+
+
+limiter = RateLimiter()
@@ -0,0 +1,234 @@
+# Portfolio risk and position sizing
+# Sizes a cycle's candidate trades together, against the account and the positions already
+# held, in one NumPy pass before any order goes out. Each trade starts from a fixed loss at its
+# stop, shared between candidates that are correlated bets, and is then cut to the per-symbol,
+# sector and gross exposure limits and to a portfolio volatility budget computed from the
+# covariance of recent 15-minute returns, held positions included. The strategy's qty is
+# replaced; a candidate sized to zero shares becomes a HOLD.
+#
+# Limits are fractions of account equity:
+#   RISK_PER_TRADE    loss at the stop for one trade                       (0.01)
+#   RISK_MAX_POSITION one symbol's exposure                                (0.10)
+#   RISK_MAX_SECTOR   one sector's gross exposure                          (0.25)
+#   RISK_MAX_GROSS    total gross exposure, also capped by buying power    (1.0)
+#   RISK_MAX_VOL      one-day portfolio volatility after the new trades    (0.02)
+# Sectors come from RISK_SECTORS_PATH, a JSON {symbol: sector} file; unlisted symbols are their
+# own sector.
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.bar_store import get_store
+from app.clients import registry
+from app.ledger import ledger
+
+RISK_PER_TRADE = float(os.getenv("RISK_PER_TRADE", 0.01))
+RISK_MAX_POSITION = float(os.getenv("RISK_MAX_POSITION", 0.10))
+RISK_MAX_SECTOR = float(os.getenv("RISK_MAX_SECTOR", 0.25))
+RISK_MAX_GROSS = float(os.getenv("RISK_MAX_GROSS", 1.0))
+RISK_MAX_VOL = float(os.getenv("RISK_MAX_VOL", 0.02))
+# About a week of 15-minute regular-session bars
+RISK_LOOKBACK_BARS = int(os.getenv("RISK_LOOKBACK_BARS", 130))
+RISK_SECTORS_PATH = os.getenv("RISK_SECTORS_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "sectors.json"))
+BARS_PER_DAY = 26
+
+# Which limit set a candidate's final size, in the order they are applied
+LIMITS = ("risk", "position", "sector", "gross", "volatility")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RiskLimits:
+    per_trade: float = RISK_PER_TRADE
+    max_position: float = RISK_MAX_POSITION
+    max_sector: float = RISK_MAX_SECTOR
+    max_gross: float = RISK_MAX_GROSS
+    max_vol: float = RISK_MAX_VOL
+
+
+def _value(obj, key: str, default=0.0) -> float:
+    """Float field of an SDK model or a ledger / JSON record"""
+    value = obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+    return default if value is None else float(value)
+
+
+def load_sectors(path: str = RISK_SECTORS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {symbol.upper(): sector for symbol, sector in json.load(f).items()}
+
+
+def returns_matrix(symbols, store=None, bars: int = RISK_LOOKBACK_BARS) -> np.ndarray:
+    """(bars x symbols) log returns of the last `bars` closes, right-aligned; missing bars are 0"""
+    closes = (store or get_store()).matrix(symbols, bars + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.diff(np.log(closes), axis=1)
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0).T
+
+
+def volatility_scale(held: np.ndarray, delta: np.ndarray, cov: np.ndarray, budget: float) -> float:
+    """
+    Largest a in [0, 1] with (held + a*delta)' cov (held + a*delta) <= budget, or 0 when no such
+    a exists (the book is already over budget and the new trades don't bring it back under).
+    """
+    a2 = delta @ cov @ delta
+    b = held @ cov @ delta
+    c = held @ cov @ held
+    if a2 + 2 * b + c <= budget:
+        return 1.0
+    if a2 <= 0:
+        return 0.0
+    discriminant = b * b - a2 * (c - budget)
+    if discriminant < 0:
+        return 0.0
+    root = (-b + np.sqrt(discriminant)) / a2
+    # f(1) is over budget, so 1 lies outside [r1, r2]: either r2 < 1, or the whole interval is above 1
+    return float(root) if 0 <= root < 1 else 0.0
+
+
+def size_arrays(entry, stop, direction, sector, candidate_index, held, sector_exposure,
+                gross: float, equity: float, buying_power: float, cov, limits: RiskLimits = None):
+    """
+    Share counts for n candidates in one pass.
+
+    entry, stop, direction (+1 buy / -1 sell), sector (ids into sector_exposure) and
+    candidate_index (columns of cov) are length-n arrays. held is the signed market value of
+    every cov column, sector_exposure the gross value held per sector, cov the per-bar return
+    covariance. Returns (qty, notional, limit index into LIMITS) arrays.
+    """
+    limits = limits or RiskLimits()
+    entry = np.asarray(entry, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+    per_share = np.abs(entry - np.asarray(stop, dtype=np.float64))
+
+    # Correlated bets in the same direction share one risk budget: each candidate's budget is
+    # divided by the sum of its positive correlations with the candidate set, itself included
+    std = np.sqrt(np.diag(cov))[candidate_index]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov[np.ix_(candidate_index, candidate_index)] / np.outer(std, std)
+    corr = np.nan_to_num(corr) * np.outer(direction, direction)
+    np.fill_diagonal(corr, 1.0)
+    crowding = np.clip(corr, 0, None).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        notional = np.nan_to_num(limits.per_trade * equity / crowding / per_share * entry, posinf=0.0)
+    bound = np.zeros(len(entry), dtype=np.int64)
+
+    def cap(new, code):
+        nonlocal notional
+        new = np.minimum(notional, np.maximum(new, 0.0))
+        bound[new < notional] = code
+        notional = new
+
+    cap(limits.max_position * equity - direction * held[candidate_index], 1)
+
+    demand = np.bincount(sector, weights=notional, minlength=len(sector_exposure))
+    room = np.maximum(limits.max_sector * equity - sector_exposure, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sector_scale = np.where(demand > room, room / demand, 1.0)
+    cap(notional * sector_scale[sector], 2)
+
+    room = max(min(limits.max_gross * equity - gross, buying_power), 0.0)
+    total = notional.sum()
+    if total > room:
+        cap(notional * (room / total), 3)
+
+    delta = np.zeros(len(held))
+    np.add.at(delta, candidate_index, direction * notional)
+    budget = (limits.max_vol * equity) ** 2
+    cap(notional * volatility_scale(held, delta, cov * BARS_PER_DAY, budget), 4)
+
+    qty = np.floor(notional / entry + 1e-9).astype(np.int64)
+    return qty, notional, bound
+
+
+class PortfolioRisk:
+    """Sizes candidate trades against the live account, positions and recent returns"""
+
+    def __init__(self, limits: RiskLimits = None, store=None, sectors=None,
+                 lookback_bars: int = RISK_LOOKBACK_BARS):
+        self.limits = limits or RiskLimits()
+        self.store = store
+        self._sectors = sectors
+        self.lookback_bars = lookback_bars
+        self._lock = threading.Lock()
+
+    @property
+    def sectors(self):
+        if self._sectors is None:
+            with self._lock:
+                if self._sectors is None:
+                    self._sectors = load_sectors()
+        return self._sectors
+
+    def sector(self, symbol: str) -> str:
+        return self.sectors.get(symbol.upper(), symbol.upper())
+
+    def snapshot(self):
+        """(account, positions) from the broker; positions from the ledger once it is seeded"""
+        client = registry.trading()
+        account = client.get_account()
+        positions = ledger.all_positions() if ledger.seeded else client.get_all_positions()
+        return account, positions
+
+    def size_batch(self, candidates, account=None, positions=None):
+        """
+        [(symbol, trade plan)] -> [plan with "qty" and "risk" set, or a HOLD], in input order.
+        HOLD plans pass through untouched.
+        """
+        trades = [(i, s.upper(), d) for i, (s, d) in enumerate(candidates) if d.get("decision") != "HOLD"]
+        results = [d for _, d in candidates]
+        if not trades:
+            return results
+        if account is None or positions is None:
+            fetched_account, fetched_positions = self.snapshot()
+            account = fetched_account if account is None else account
+            positions = fetched_positions if positions is None else positions
+
+        held = {}
+        for position in positions:
+            symbol = (position.get("symbol") if isinstance(position, dict) else position.symbol).upper()
+            held[symbol] = held.get(symbol, 0.0) + _value(position, "market_value")
+        symbols = list(dict.fromkeys([s for _, s, _ in trades] + list(held)))
+        column = {s: j for j, s in enumerate(symbols)}
+        sector_names = list(dict.fromkeys(self.sector(s) for s in symbols))
+        sector_id = {name: k for k, name in enumerate(sector_names)}
+        sector_exposure = np.zeros(len(sector_names))
+        for symbol, value in held.items():
+            sector_exposure[sector_id[self.sector(symbol)]] += abs(value)
+
+        returns = returns_matrix(symbols, self.store, self.lookback_bars)
+        cov = np.atleast_2d(np.cov(returns, rowvar=False)) if len(returns) > 1 else np.zeros((len(symbols),) * 2)
+        qty, notional, bound = size_arrays(
+            entry=[d["technical_context"]["entry_price"] for _, _, d in trades],
+            stop=[d["stop_loss"] for _, _, d in trades],
+            direction=[-1.0 if str(d.get("side", "buy")).lower() == "sell" else 1.0 for _, _, d in trades],
+            sector=np.array([sector_id[self.sector(s)] for _, s, _ in trades], dtype=np.int64),
+            candidate_index=np.array([column[s] for _, s, _ in trades], dtype=np.int64),
+            held=np.array([held.get(s, 0.0) for s in symbols]),
+            sector_exposure=sector_exposure,
+            gross=float(sum(abs(v) for v in held.values())),
+            equity=_value(account, "equity"),
+            buying_power=_value(account, "buying_power"),
+            cov=cov,
+            limits=self.limits,
+        )
+
+        for (i, symbol, decision), q, value, b in zip(trades, qty.tolist(), notional.tolist(), bound.tolist()):
+            risk = {"notional": round(value, 2), "limited_by": LIMITS[b]}
+            if q < 1:
+                logger.info("No trade for %s: sized to zero shares by the %s limit", symbol, LIMITS[b])
+                results[i] = {"decision": "HOLD", "reason": f"Sized to zero shares by the {LIMITS[b]} limit", "risk": risk}
+            else:
+                results[i] = {**decision, "qty": q, "risk": risk}
+        return results
+
+
+portfolio_risk = PortfolioRisk()
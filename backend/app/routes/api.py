@@ -1,31 +1,48 @@
 # /trades route
 # This file will contain all the API endpoints for the frontend
+import asyncio
 import time
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from typing import List
 from pydantic import BaseModel
+from app import health
+from app.batch_orders import submit_batch, cancel_batch
+from app.cache import AsyncTTLCache
+from app.broker import broker_call, broker_stats, rate_stats, BrokerTimeout
+from app.live_feed import live_feed
+from app.ledger import ledger
 from app.alpaca_client import (
     get_account, get_positions, get_orders, get_market_data,
     market_order, limit_order, bracket_order, stop_loss, take_profit,
-    cancel_order_by_id, get_order_status
+    cancel_order_direct, get_order_status, get_client_stats
 )
 
 router = APIRouter()
 
-# Simple in-memory cache
-cache = {}
-CACHE_TTL = 60
-
-def cached_call(key: str, fetch_fn):
-    """Check cache, otherwise call function and store result"""
-    now = time.time()
-    if key in cache:
-        data, timestamp = cache[key]
-        if now - timestamp < CACHE_TTL:
-            return data
-    # Refresh
-    data = fetch_fn()
-    cache[key] = (data, now)
-    return data
+# Bounded TTL cache with single-flight refresh; order routes invalidate what they change
+cache = AsyncTTLCache()
+# Keys invalidated after an order is placed or cancelled
+ORDER_INVALIDATES = ("account", "positions", "orders")
+
+async def cached_call(key: str, route: str, fn, *args):
+    """Serve from cache, otherwise call the broker once however many requests are waiting"""
+    return await cache.get_or_fetch(key, lambda: call_broker(route, fn, *args))
+
+async def call_broker(route: str, fn, *args):
+    """Run a blocking Alpaca call under the route's concurrency limit and timeout"""
+    try:
+        result = await broker_call(route, fn, *args)
+    except BrokerTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    if route in ("order-submit", "order-cancel"):
+        orders_changed()
+    return result
+
+def orders_changed():
+    cache.invalidate(*ORDER_INVALIDATES)
+    # Push the change to live dashboards without waiting for the next poll
+    live_feed.notify()
 
 # Pydantic models for request validation
 class MarketOrderRequest(BaseModel):
@@ -58,45 +75,72 @@ class TakeProfitRequest(BaseModel):
     qty: int
     limit_price: float
 
+class BatchOrderItem(BaseModel):
+    type: str = "market"  # "market", "limit" or "bracket"
+    symbol: str
+    qty: int
+    side: str
+    limit_price: float = None
+    stop_loss: float = None
+    take_profit: float = None
+    order_type: str = "market"  # entry type for bracket orders
+
+class BatchOrderRequest(BaseModel):
+    orders: List[BatchOrderItem]
+
+class CancelBatchRequest(BaseModel):
+    order_ids: List[str]
+
 @router.get("/account")
 async def account():
-    return cached_call("account", get_account)
+    return await cached_call("account", "account", get_account)
 
 @router.get("/positions")
 async def positions():
-    return get_positions()
+    return await cached_call("positions", "positions", get_positions)
 
 @router.get("/orders")
 async def orders():
-    return get_orders()
+    return await cached_call("orders", "orders", get_orders)
 
 @router.get("/market-data/{symbol}")
 async def market_data(symbol: str):
-    return get_market_data(symbol)
+    # BarArray.records() is already JSON-native; skip jsonable_encoder's per-value walk
+    return JSONResponse(await cached_call(f"market-data:{symbol.upper()}", "market-data", get_market_data, symbol))
 
 # Order Endpoints
 @router.post("/orders/market")
 async def place_market_order(order: MarketOrderRequest):
     try:
-        return market_order(order.symbol, order.qty, order.side)
+        return await call_broker("order-submit", market_order, order.symbol, order.qty, order.side)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/orders/limit")
 async def place_limit_order(order: LimitOrderRequest):
     try:
-        return limit_order(order.symbol, order.qty, order.side, order.limit_price)
+        return await call_broker(
+            "order-submit", limit_order,
+            order.symbol, order.qty, order.side, order.limit_price
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/orders/bracket")
 async def place_bracket_order(order: BracketOrderRequest):
     try:
-        return bracket_order(
+        return await call_broker(
+            "order-submit", bracket_order,
             order.symbol, order.qty, order.side, 
             order.stop_loss, order.take_profit, 
             order.order_type, order.limit_price
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -104,39 +148,87 @@ async def place_bracket_order(order: BracketOrderRequest):
 @router.post("/orders/stop-loss")
 async def place_stop_loss_order(order: StopLossRequest):
     try:
-        return stop_loss(order.symbol, order.qty, order.stop_price)
+        return await call_broker("order-submit", stop_loss, order.symbol, order.qty, order.stop_price)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/orders/take-profit")
 async def place_take_profit_order(order: TakeProfitRequest):
     try:
-        return take_profit(order.symbol, order.qty, order.limit_price)
+        return await call_broker("order-submit", take_profit, order.symbol, order.qty, order.limit_price)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Batch Orders: one result per item, the batch itself only fails on invalid input
+@router.post("/orders/batch")
+async def place_batch_orders(batch: BatchOrderRequest):
+    try:
+        results = await submit_batch([order.model_dump() for order in batch.orders])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    orders_changed()
+    return {"submitted": sum(r["ok"] for r in results), "failed": sum(not r["ok"] for r in results), "results": results}
+
+@router.post("/orders/cancel-batch")
+async def cancel_batch_orders(batch: CancelBatchRequest):
+    try:
+        results = await cancel_batch(batch.order_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    orders_changed()
+    return {"cancelled": sum(r["ok"] for r in results), "failed": sum(not r["ok"] for r in results), "results": results}
+
+
 # Order Management
 @router.delete("/orders/{order_id}")
 async def cancel_order_endpoint(order_id: str):
     try:
-        return cancel_order_by_id(order_id)
+        return await call_broker("order-cancel", cancel_order_direct, order_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/orders/{order_id}/status")
 async def get_order_status_endpoint(order_id: str):
     try:
-        status = get_order_status(order_id)
+        status = await call_broker("order-status", get_order_status, order_id)
         return {"order_id": order_id, "status": status}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/clients/stats")
+async def client_stats():
+    return {**get_client_stats(), "routes": broker_stats(), "rate_limits": rate_stats()}
+
+@router.get("/ledger/stats")
+async def ledger_stats():
+    return ledger.stats()
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return cache.stats()
+
+@router.get("/health")
+async def health_check(deep: bool = False):
+    """Startup check result, or a fresh run with ?deep=true; 503 when a check fails"""
+    report = health.last_report
+    if deep or report is None:
+        report = await asyncio.to_thread(health.run_checks, deep)
+    return JSONResponse(report, status_code=200 if report["ok"] else 503)
+
 # Bot Status (placeholder for future)
 @router.get("/status")
 async def get_bot_status():
     return {
         "status": "running",
         "last_update": time.time(),
-        "account": cached_call("account", get_account)
+        "account": await cached_call("account", "account", get_account)
     }
\ No newline at end of file
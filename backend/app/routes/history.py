@@ -0,0 +1,53 @@
+# Journal history routes
+# Paginated, newest-first reads of journaled decisions, orders and fills (see app/journal.py).
+# Pages are keyed by row id: pass a response's next_cursor as ?cursor= to get the next page.
+# Handlers are plain functions so FastAPI runs the database reads in its threadpool.
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.journal import journal, MAX_PAGE
+
+router = APIRouter(prefix="/history")
+
+# The decision list leaves out the prompt and raw answer; fetch one decision for those
+DECISION_COLUMNS = (
+    "id", "ts", "symbol", "decision", "confidence", "entry_price", "stop_loss",
+    "take_profit", "reason", "gated", "model", "llm_latency_ms",
+)
+ORDER_COLUMNS = (
+    "id", "ts", "order_id", "symbol", "side", "qty", "order_type", "order_class",
+    "status", "limit_price", "stop_price",
+)
+
+def _page(table, columns, symbol, since, until, cursor, limit):
+    return journal.history(table, symbol=symbol, since=since, until=until,
+                           cursor=cursor, limit=limit, columns=columns)
+
+@router.get("/decisions")
+def decision_history(symbol: Optional[str] = None, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, cursor: Optional[int] = None,
+                     limit: int = Query(100, ge=1, le=MAX_PAGE)):
+    return _page("decisions", DECISION_COLUMNS, symbol, since, until, cursor, limit)
+
+@router.get("/decisions/{decision_id}")
+def decision_detail(decision_id: int):
+    decision = journal.get("decisions", decision_id)
+    if decision is None:
+        raise HTTPException(status_code=404, detail=f"Decision {decision_id} not found")
+    return decision
+
+@router.get("/orders")
+def order_history(symbol: Optional[str] = None, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, cursor: Optional[int] = None,
+                  limit: int = Query(100, ge=1, le=MAX_PAGE)):
+    return _page("orders", ORDER_COLUMNS, symbol, since, until, cursor, limit)
+
+@router.get("/fills")
+def fill_history(symbol: Optional[str] = None, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, cursor: Optional[int] = None,
+                 limit: int = Query(100, ge=1, le=MAX_PAGE)):
+    return _page("fills", None, symbol, since, until, cursor, limit)
+
+@router.get("/stats")
+def journal_stats():
+    return journal.stats()
@@ -0,0 +1,47 @@
+# Server-push routes
+# WebSocket and Server-Sent Events endpoints streaming account, position and order diffs
+# from the shared live feed (see app/live_feed.py)
+import asyncio
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.live_feed import live_feed
+
+router = APIRouter()
+
+@router.websocket("/ws/live")
+async def live_websocket(websocket: WebSocket):
+    await websocket.accept()
+    queue = live_feed.subscribe()
+
+    async def pump():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender = asyncio.ensure_future(pump())
+    try:
+        # Reading is only for noticing the disconnect; client messages are ignored
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        live_feed.unsubscribe(queue)
+
+@router.get("/events")
+async def live_events(request: Request):
+    queue = live_feed.subscribe()
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                message = await queue.get()
+                yield f"data: {message}\n\n"
+        finally:
+            live_feed.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@router.get("/live/stats")
+async def live_stats():
+    return live_feed.stats()
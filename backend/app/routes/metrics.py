@@ -0,0 +1,98 @@
+# Prometheus metrics route
+# Stage latency histograms from app.metrics plus counters from the caches, journal and ledger,
+# in the Prometheus text exposition format
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.backends import ShadowBackend, get_backend
+from app.journal import journal
+from app.ledger import ledger
+from app.metrics import metrics
+from app.prompts import llm_usage
+from app.ratelimit import LANES, limiter
+from app.routes.api import cache
+from app.strategy import decision_cache
+
+router = APIRouter()
+
+@metrics.collector
+def _route_cache():
+    namespaces = cache.stats()["namespaces"]
+    return [
+        (f"api_cache_{key}_total", "counter", f"Route cache {key.replace('_', ' ')}",
+         [({"namespace": ns}, stats[key]) for ns, stats in namespaces.items()])
+        for key in ("hits", "stale_hits", "misses", "joins", "errors")
+    ]
+
+@metrics.collector
+def _decision_cache():
+    stats = decision_cache.stats()
+    return [
+        ("llm_decision_cache_lookups_total", "counter", "LLM decision cache lookups by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]),
+          ({"result": "join"}, stats["inflight_joins"])]),
+    ]
+
+@metrics.collector
+def _journal():
+    return [
+        ("journal_rows_written_total", "counter", "Journal rows written", [({}, journal.written)]),
+        ("journal_rows_dropped_total", "counter", "Journal rows dropped on a full queue or a failed write", [({}, journal.dropped)]),
+        ("journal_queue_depth", "gauge", "Journal rows waiting to be written", [({}, journal._queue.qsize())]),
+    ]
+
+@metrics.collector
+def _ledger():
+    stats = ledger.stats()
+    return [
+        ("ledger_live", "gauge", "1 when reads are served from the local ledger", [({}, stats["live"])]),
+        ("ledger_reconcile_corrections_total", "counter", "Records fixed by reconciliation", [({}, stats["corrections"])]),
+    ]
+
+@metrics.collector
+def _llm_usage():
+    stats = llm_usage.stats()
+    return [
+        ("llm_calls_total", "counter", "OpenAI chat completion calls", [({}, stats["calls"])]),
+        ("llm_tokens_total", "counter", "OpenAI tokens by kind",
+         [({"kind": kind}, stats[f"{kind}_tokens"]) for kind in ("prompt", "cached", "completion")]),
+        ("llm_invalid_responses_total", "counter", "Answers rejected by the decision validator", [({}, stats["invalid"])]),
+        ("llm_retries_total", "counter", "Re-asks after an invalid answer", [({}, stats["retries"])]),
+    ]
+
+@metrics.collector
+def _shadow():
+    backend = get_backend()
+    if not isinstance(backend, ShadowBackend):
+        return []
+    stats = backend.stats()
+    labels = {"primary": backend.primary.name, "shadow": backend.shadow.name}
+    return [
+        ("strategy_shadow_decisions_total", "counter", "Decisions by primary/shadow agreement",
+         [({**labels, "outcome": key}, stats[key]) for key in ("both_buy", "primary_only", "shadow_only")]
+         + [({**labels, "outcome": "both_hold"}, stats["agreed"] - stats["both_buy"])]),
+    ]
+
+@metrics.collector
+def _rate_limits():
+    stats = limiter.stats()
+
+    def by_lane(key):
+        return [({"upstream": name, "lane": lane}, s["lanes"][lane][key]) for name, s in stats.items() for lane in LANES]
+
+    return [
+        ("upstream_queue_depth", "gauge", "Calls waiting for a rate limit token", by_lane("queued")),
+        ("upstream_acquired_total", "counter", "Rate limit tokens handed out", by_lane("acquired")),
+        ("upstream_wait_seconds_total", "counter", "Time spent waiting for a rate limit token", by_lane("waited_s")),
+        ("upstream_requests_total", "counter", "Upstream requests sent, retries included",
+         [({"upstream": name}, s["requests"]) for name, s in stats.items()]),
+        ("upstream_throttled_total", "counter", "Upstream 429 responses",
+         [({"upstream": name}, s["throttled"]) for name, s in stats.items()]),
+        ("upstream_retries_total", "counter", "Upstream retries by reason",
+         [({"upstream": name, "reason": reason}, n) for name, s in stats.items() for reason, n in s["retry_reasons"].items()]),
+        ("upstream_failures_total", "counter", "Upstream calls that failed after retries",
+         [({"upstream": name}, s["failures"]) for name, s in stats.items()]),
+    ]
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,184 @@
+# Multi-symbol bot scheduler
+# Runs run_bot's pipeline (fetch bars -> llm_strategy -> confidence gate / order) for a whole
+# universe each bar close. Data fetches, LLM calls and order submission each have their own
+# concurrency limit, results are yielded as symbols finish, and a per-cycle deadline stops
+# slow symbols from holding up the rest. The trades that survive the strategy phase are sized
+# together by app.risk in one pass, then placed.
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from app.bar_store import get_store, BATCH_SIZE, DEFAULT_LOOKBACK
+from app.bot import confidence_gate, execute_decision
+from app.ledger import ledger
+from app.metrics import span, trace_cycle
+from app.risk import portfolio_risk
+from app.strategy import llm_strategy, signal_gate
+
+FETCH_LIMIT = int(os.getenv("SCHEDULER_FETCH_LIMIT", 4))
+LLM_LIMIT = int(os.getenv("SCHEDULER_LLM_LIMIT", 16))
+ORDER_LIMIT = int(os.getenv("SCHEDULER_ORDER_LIMIT", 4))
+# Leave headroom inside a 15-minute bar for order fills and the next fetch
+CYCLE_DEADLINE = float(os.getenv("SCHEDULER_DEADLINE", 10 * 60))
+
+logger = logging.getLogger(__name__)
+
+
+def seconds_until_next_bar(minutes: int = 15, delay: float = 5.0, now: datetime = None) -> float:
+    """Seconds until `delay` after the next bar close"""
+    now = now or datetime.now(timezone.utc)
+    step = minutes * 60
+    next_close = (int(now.timestamp()) // step + 1) * step
+    return next_close + delay - now.timestamp()
+
+
+def _outcome(result):
+    return result.get("decision") if isinstance(result, dict) else "ORDER"
+
+
+class BotScheduler:
+    """Evaluate a universe of symbols concurrently, one cycle per bar close"""
+
+    def __init__(self, symbols, qty: int = 1, store=None, fetch_limit: int = FETCH_LIMIT,
+                 llm_limit: int = LLM_LIMIT, order_limit: int = ORDER_LIMIT,
+                 deadline: float = CYCLE_DEADLINE, strategy=llm_strategy, executor=execute_decision,
+                 sizer=portfolio_risk.size_batch):
+        self.symbols = [s.upper() for s in symbols]
+        self.qty = qty
+        self.store = store or get_store()
+        self.limits = {"fetch": fetch_limit, "llm": llm_limit, "order": order_limit}
+        self.deadline = deadline
+        self.strategy = strategy
+        self.execute = executor
+        self.size = sizer
+        self._pool = ThreadPoolExecutor(max_workers=fetch_limit + llm_limit + order_limit,
+                                        thread_name_prefix="scheduler")
+        self.last_cycle = {}
+
+    async def _in_thread(self, semaphore, fn, *args):
+        async with semaphore:
+            # Carry the metrics symbol / cycle trace into the worker thread
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self._pool, context.run, fn, *args)
+
+    async def _fetch(self, semaphore):
+        """Delta-sync every symbol, BATCH_SIZE symbols per bars request"""
+        batches = [self.symbols[i:i + BATCH_SIZE] for i in range(0, len(self.symbols), BATCH_SIZE)]
+        with span("fetch"):
+            await asyncio.gather(*(self._in_thread(semaphore, self.store.sync, batch) for batch in batches))
+
+    async def _evaluate(self, symbol, semaphores):
+        since = int((datetime.now(timezone.utc) - DEFAULT_LOOKBACK).timestamp())
+        # Strategies get a BarArray: typed column views, no DataFrame build per symbol. The file
+        # reads run in a thread so they don't stall the other symbols' coroutines.
+        with span("bars", symbol):
+            bars = await asyncio.to_thread(self.store.bars, symbol, since=since)
+        return await self._in_thread(semaphores["llm"], self.strategy, bars, symbol, self.qty)
+
+    def _size(self, candidates):
+        with span("risk"):
+            return self.size(candidates)
+
+    async def stream_cycle(self):
+        """Run one cycle, yielding (symbol, result) as each symbol completes"""
+        # Semaphores are created per cycle so they bind to the running loop
+        semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.limits.items()}
+        started = time.monotonic()
+        deadline = started + self.deadline
+
+        try:
+            await asyncio.wait_for(self._fetch(semaphores["fetch"]), self.deadline)
+        except asyncio.TimeoutError:
+            for symbol in self.symbols:
+                yield symbol, {"decision": "SKIPPED", "reason": "Bar fetch missed the cycle deadline"}
+            return
+
+        tasks = {asyncio.ensure_future(self._evaluate(symbol, semaphores)): symbol for symbol in self.symbols}
+        candidates = []
+        pending = set(tasks)
+        while pending:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                symbol = tasks[task]
+                if task.exception() is not None:
+                    yield symbol, {"decision": "ERROR", "reason": str(task.exception())}
+                    continue
+                decision = task.result()
+                if decision.get("decision") != "HOLD":
+                    _, rejection = confidence_gate(decision)
+                    if rejection is None:
+                        candidates.append((symbol, decision))
+                        continue
+                    decision = rejection
+                yield symbol, decision
+
+        # Anything still running is dropped from this cycle; its thread finishes in the background
+        for task in pending:
+            task.cancel()
+            yield tasks[task], {"decision": "SKIPPED", "reason": "Missed the cycle deadline"}
+        if not candidates:
+            return
+
+        # Every trade of the cycle is sized in one pass, against the same account snapshot,
+        # before the first order is placed
+        try:
+            sized = await self._in_thread(semaphores["order"], self._size, candidates)
+        except Exception as e:
+            for symbol, _ in candidates:
+                yield symbol, {"decision": "ERROR", "reason": f"Risk sizing failed: {e}"}
+            return
+        orders = {}
+        for (symbol, _), decision in zip(candidates, sized):
+            if decision.get("decision") == "HOLD":
+                yield symbol, decision
+            else:
+                order = self._in_thread(semaphores["order"], self.execute, decision, symbol, self.qty)
+                orders[asyncio.ensure_future(order)] = symbol
+        # Orders already sent are not abandoned at the deadline
+        pending = set(orders)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    yield orders[task], {"decision": "ERROR", "reason": str(task.exception())}
+                else:
+                    yield orders[task], task.result()
+
+    async def run_cycle(self):
+        """Run one cycle and return {symbol: result}"""
+        started = time.monotonic()
+        results = {}
+        with trace_cycle(f"scheduler:{len(self.symbols)}"), span("cycle"):
+            async for symbol, result in self.stream_cycle():
+                results[symbol] = result
+        self.last_cycle = {
+            "symbols": len(self.symbols),
+            "seconds": time.monotonic() - started,
+            "skipped": sum(1 for r in results.values() if _outcome(r) == "SKIPPED"),
+            "errors": sum(1 for r in results.values() if _outcome(r) == "ERROR"),
+            # Pass rate and LLM latency / spend saved by the pre-LLM gate this cycle
+            "gate": signal_gate.start_cycle(),
+        }
+        return results
+
+    async def run_forever(self, minutes: int = 15):
+        """Run a cycle shortly after every bar close"""
+        if not ledger.seeded:
+            # Pre-trade checks read open orders and positions from the local ledger
+            await ledger.start()
+        while True:
+            await asyncio.sleep(seconds_until_next_bar(minutes))
+            results = await self.run_cycle()
+            logger.info("Cycle done: %s", self.last_cycle)
+            yield results
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,131 @@
+# Pre-LLM signal gate
+# Cheap rule-based prefilter on llm_strategy's technical_data. Symbols with nothing interesting
+# going on (no crossover, neutral RSI, flat volume) are held locally and only candidates are
+# escalated to the LLM. Tracks pass rates and the latency / spend saved per cycle.
+
+import math
+import os
+import threading
+
+import numpy as np
+
+from app.batch_indicators import FEATURE_INDEX, RSI_ZONES, VOLUME_TRENDS
+
+# Rough gpt-4o-mini cost of one decision (~1k prompt + ~300 completion tokens), in USD
+LLM_COST_PER_CALL = float(os.getenv("LLM_COST_PER_CALL", 0.0004))
+# Used for "latency saved" until real LLM calls have been timed
+DEFAULT_LLM_LATENCY = 2.0
+# Escalate on RSI outside the 40-60 neutral band, on either side; a missing (NaN) RSI never fires
+DEFAULT_RSI_ZONES = ("oversold", "weak_oversold", "weak_overbought", "overbought")
+
+
+def _finite(value) -> bool:
+    try:
+        return math.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+
+class SignalGate:
+    """Escalate a symbol to the LLM only when at least `min_signals` rules fire"""
+
+    def __init__(self, crossover: bool = True, trend_reversal: bool = True,
+                 rsi_zones=DEFAULT_RSI_ZONES,
+                 volume_trends=("increasing",), min_signals: int = 1, enabled: bool = None):
+        self.crossover = crossover
+        self.trend_reversal = trend_reversal
+        self.rsi_zones = set(rsi_zones)
+        self.volume_trends = set(volume_trends)
+        self.min_signals = min_signals
+        self.enabled = os.getenv("SIGNAL_GATE", "1") != "0" if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._llm_calls = 0
+        self._llm_seconds = 0.0
+        self.totals = self._counters()
+        self.cycle = self._counters()
+
+    @staticmethod
+    def _counters():
+        return {"evaluated": 0, "escalated": 0, "held": 0}
+
+    def signals(self, technical_data):
+        """Names of the rules that fire for one symbol's technical_data"""
+        fired = []
+        if self.crossover and technical_data.get("crossover_detected"):
+            fired.append("crossover")
+        if self.trend_reversal and technical_data.get("trend_reversal"):
+            fired.append("trend_reversal")
+        if _finite(technical_data.get("rsi_9")) and technical_data.get("rsi_zone") in self.rsi_zones:
+            fired.append(f"rsi_{technical_data['rsi_zone']}")
+        if technical_data.get("volume_trend") in self.volume_trends:
+            fired.append(f"volume_{technical_data['volume_trend']}")
+        return fired
+
+    def check(self, technical_data):
+        """Return (escalate, fired_signals) and record the outcome"""
+        if not self.enabled:
+            return True, []
+        fired = self.signals(technical_data)
+        escalate = len(fired) >= self.min_signals
+        self._record(1, int(escalate))
+        return escalate, fired
+
+    def check_features(self, features):
+        """Vectorized check over app.batch_indicators feature rows; returns a boolean mask"""
+        features = np.atleast_2d(features)
+        if not self.enabled:
+            return np.ones(features.shape[0], dtype=bool)
+
+        count = np.zeros(features.shape[0], dtype=int)
+        if self.crossover:
+            count += features[:, FEATURE_INDEX["crossover_detected"]] > 0
+        if self.trend_reversal:
+            count += features[:, FEATURE_INDEX["trend_reversal"]] > 0
+        zones = [RSI_ZONES.index(z) for z in self.rsi_zones]
+        # get_rsi_zone files a NaN RSI (too little history) under "overbought"; that is no signal
+        count += np.isin(features[:, FEATURE_INDEX["rsi_zone"]], zones) & np.isfinite(features[:, FEATURE_INDEX["rsi_9"]])
+        trends = [VOLUME_TRENDS.index(t) for t in self.volume_trends]
+        count += np.isin(features[:, FEATURE_INDEX["volume_trend"]], trends)
+
+        mask = count >= self.min_signals
+        self._record(len(mask), int(mask.sum()))
+        return mask
+
+    def _record(self, evaluated: int, escalated: int):
+        with self._lock:
+            for counters in (self.totals, self.cycle):
+                counters["evaluated"] += evaluated
+                counters["escalated"] += escalated
+                counters["held"] += evaluated - escalated
+
+    def record_llm_call(self, seconds: float):
+        """Time of a real LLM round-trip, used to estimate the latency saved by held symbols"""
+        with self._lock:
+            self._llm_calls += 1
+            self._llm_seconds += seconds
+
+    def start_cycle(self):
+        """Reset the per-cycle counters and return the previous cycle's stats"""
+        stats = self.stats()["cycle"]
+        with self._lock:
+            self.cycle = self._counters()
+        return stats
+
+    def _summary(self, counters, llm_latency):
+        evaluated = counters["evaluated"]
+        return {
+            **counters,
+            "pass_rate": counters["escalated"] / evaluated if evaluated else 0.0,
+            "latency_saved_s": counters["held"] * llm_latency,
+            "cost_saved_usd": counters["held"] * LLM_COST_PER_CALL,
+        }
+
+    def stats(self):
+        with self._lock:
+            llm_latency = self._llm_seconds / self._llm_calls if self._llm_calls else DEFAULT_LLM_LATENCY
+            return {
+                "enabled": self.enabled,
+                "avg_llm_latency_s": llm_latency,
+                "cycle": self._summary(dict(self.cycle), llm_latency),
+                "total": self._summary(dict(self.totals), llm_latency),
+            }
@@ -1,19 +1,52 @@
 # strategies.py
-from openai import OpenAI
-import json
 import os
-import pandas as pd
+import threading
 import numpy as np
+import time
+from app.backends import get_backend
+from app.decision_cache import DecisionCache, decision_key
+from app.journal import journal
+from app.metrics import span, symbol_scope
+from app.prompts import InvalidDecision, TradeDecision, get_prompt, llm_usage
+from app.ratelimit import limiter
+from app.signal_gate import SignalGate
 
-# Create client once
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+LLM_MODEL = "gpt-4o-mini"
+# Enough 15-minute bars for SMA(50) plus a crossover check
+MIN_BARS = 70
+# Re-asks after an answer fails validation; structured output makes them rare
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", 1))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", 400))
+
+# Shared across callers so repeat cycles within a bar and concurrent scans reuse one LLM answer
+decision_cache = DecisionCache()
+# Holds quiet symbols locally so only candidates reach the LLM
+signal_gate = SignalGate()
+
+# Created on first use: importing the OpenAI SDK alone takes about half a second
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+def get_llm_client():
+    """Shared OpenAI client, built on the first LLM call"""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                from openai import APIConnectionError, OpenAI
+                # Retries are app.ratelimit's, under the shared OpenAI budget
+                limiter["openai"].transient = (APIConnectionError,)
+                _llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _llm_client
 
 def calculate_sma(prices, period):
     """Calculate Simple Moving Average"""
+    import pandas as pd
     return pd.Series(prices).rolling(window=period, min_periods=period).mean()
 
 def calculate_rsi(prices, period=14):
     """Calculate Relative Strength Index"""
+    import pandas as pd
     prices = pd.Series(prices)
     delta = prices.diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period, min_periods=period).mean()
@@ -24,6 +57,7 @@ def calculate_rsi(prices, period=14):
 
 def calculate_macd(prices, fast=12, slow=26, signal=9):
     """Calculate MACD"""
+    import pandas as pd
     ema_fast = pd.Series(prices).ewm(span=fast).mean()
     ema_slow = pd.Series(prices).ewm(span=slow).mean()
     macd_line = ema_fast - ema_slow
@@ -58,16 +92,27 @@ def check_trend_reversal(sma_20, sma_50):
     # SMA(20) crosses below SMA(50)
     return (prev_sma20 >= prev_sma50) and (current_sma20 < current_sma50)
 
-def llm_strategy(df, symbol: str, qty: int):
+def llm_strategy(df, symbol: str, qty: int, llm=None):
     """
-    Send technical analysis data to LLM for decision making
+    Send technical analysis data to the strategy backend (the LLM unless STRATEGY_BACKEND says
+    otherwise, see app.backends); `llm` forces decide() with that stand-in, as backtests do
     """
-    if len(df) < 70:
+    if len(df) < MIN_BARS:
         return {"decision": "HOLD", "reason": "Insufficient data"}
-    
+
+    with symbol_scope(symbol):
+        with span("indicators"):
+            technical_data = build_technical_data(df, symbol)
+        if llm is not None:
+            return decide(technical_data, symbol, qty, llm)
+        return get_backend().decide(technical_data, symbol, qty)
+
+def build_technical_data(df, symbol: str):
+    """Indicator snapshot for the latest bar of `df`"""
     # Extract OHLCV data
-    closes = df['close'].values
-    volumes = df['volume'].values
+    # DataFrame columns or BarArray views, no copy either way
+    closes = np.asarray(df['close'])
+    volumes = np.asarray(df['volume'])
     
     # Calculate technical indicators
     sma_20 = calculate_sma(closes, 20)
@@ -92,7 +137,7 @@ def llm_strategy(df, symbol: str, qty: int):
     trend_reversal = check_trend_reversal(sma_20, sma_50)
     
     # Prepare comprehensive data for LLM
-    technical_data = {
+    return {
         "symbol": symbol,
         "current_price": current_price,
         "sma_20": current_sma20,
@@ -110,33 +155,117 @@ def llm_strategy(df, symbol: str, qty: int):
         "crossover_detected": detect_sma_crossover(closes, sma_20, sma_50),
         "trend_reversal": trend_reversal
     }
-    
-    # Create LLM prompt with technical data
-    prompt = create_prompt(technical_data, symbol, qty)
-    # Get LLM response
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    print(response)
-    decision = response.choices[0].message.content.strip()
-    if decision.upper() == "HOLD":
-        return {"decision": "HOLD", "reason": "LLM recommended HOLD"}
-    
+
+def technical_data_from_snapshot(snapshot, symbol: str):
+    """Same technical_data as build_technical_data, from an IncrementalIndicators snapshot"""
+    current_price = snapshot["current_price"]
+    current_sma20 = snapshot["sma_20"]
+    current_sma50 = snapshot["sma_50"]
+    return {
+        "symbol": symbol,
+        "current_price": current_price,
+        "sma_20": current_sma20,
+        "sma_50": current_sma50,
+        "rsi_9": snapshot["rsi_9"],
+        "macd": snapshot["macd"],
+        "signal": snapshot["signal"],
+        "recent_closes": np.array(snapshot["recent_closes"]),
+        "recent_volumes": np.array(snapshot["recent_volumes"]),
+        "sma_20_trend": "above" if current_sma20 > current_sma50 else "below",
+        "rsi_zone": get_rsi_zone(snapshot["rsi_9"]),
+        "price_vs_sma20": ((current_price - current_sma20) / current_sma20) * 100,
+        "price_vs_sma50": ((current_price - current_sma50) / current_sma50) * 100,
+        "volume_trend": get_volume_trend(snapshot["recent_volumes"]),
+        "crossover_detected": snapshot["crossover_detected"],
+        "trend_reversal": snapshot["trend_reversal"]
+    }
+
+def decide(technical_data, symbol: str, qty: int, llm=None, gate: SignalGate = None):
+    """
+    Gate, prompt and parse one decision. `llm` optionally replaces the OpenAI call with an
+    object exposing respond(prompt, technical_data) -> str (see app.backtest); `gate` replaces
+    the process-wide signal_gate, so offline runs don't count in the live gate stats.
+    """
+    with span("gate", symbol):
+        escalate, signals = (gate or signal_gate).check(technical_data)
+    if not escalate:
+        result = {"decision": "HOLD", "reason": "No entry signals (gated before LLM)"}
+        if llm is None:
+            journal.record_decision(symbol, result, gated=True, technical_data=technical_data)
+        return result
+
+    # Create LLM prompt with technical data (offline stand-ins that ignore it skip the formatting)
+    prompt = None
+    if llm is None or getattr(llm, "uses_prompt", True):
+        with span("prompt", symbol):
+            prompt = create_prompt(technical_data, symbol, qty)
+    if llm is not None:
+        # Backtests and sweeps are not journaled
+        return parse_decision(llm.respond(prompt, technical_data).strip(), technical_data)
+
+    # Get LLM response, reusing a cached decision for equivalent inputs
+    start = time.perf_counter()
+    key = decision_key(technical_data, qty, LLM_MODEL, get_prompt().name)
+    with span("llm", symbol):
+        decision = decision_cache.get_or_compute(key, lambda: ask_validated(prompt, technical_data))
+    result = parse_decision(decision, technical_data)
+    journal.record_decision(symbol, result, prompt=prompt, response=decision,
+                            latency=time.perf_counter() - start, model=LLM_MODEL,
+                            technical_data=technical_data)
+    return result
+
+def parse_decision(decision: str, technical_data):
+    """Trade plan dict from the model's answer, or a HOLD"""
     try:
-        trade_plan = json.loads(decision)
-        
-        # Add technical context to the trade plan
-        trade_plan["technical_context"] = {
-            "entry_price": current_price,
-            "sma20": current_sma20,
-            "sma50": current_sma50,
-            "rsi": current_rsi,
-            "crossover_detected": technical_data["crossover_detected"]
-        }
-        return trade_plan
-    except Exception:
+        parsed = TradeDecision.parse(decision, technical_data["current_price"])
+    except InvalidDecision:
         return {"decision": "HOLD", "reason": "Invalid LLM response"}
+    if parsed.decision == "HOLD":
+        reason = "LLM recommended HOLD"
+        return {"decision": "HOLD", "reason": f"{reason}: {parsed.reasoning}" if parsed.reasoning else reason}
+
+    # Add technical context to the trade plan
+    trade_plan = parsed.to_plan()
+    trade_plan["technical_context"] = technical_context(technical_data)
+    return trade_plan
+
+def technical_context(technical_data):
+    """Entry price and indicators attached to every trade plan (read by bot.confidence_gate)"""
+    return {
+        "entry_price": technical_data["current_price"],
+        "sma20": technical_data["sma_20"],
+        "sma50": technical_data["sma_50"],
+        "rsi": technical_data["rsi_9"],
+        "crossover_detected": technical_data["crossover_detected"]
+    }
+
+def ask_validated(prompt, technical_data):
+    """ask_llm, re-asking up to LLM_RETRIES times with the validation error when the answer is unusable"""
+    answer = ask_llm(prompt)
+    for attempt in range(LLM_RETRIES + 1):
+        try:
+            TradeDecision.parse(answer, technical_data["current_price"])
+            return answer
+        except InvalidDecision as e:
+            llm_usage.add(invalid=1)
+            if attempt == LLM_RETRIES:
+                break
+            llm_usage.add(retries=1)
+            answer = ask_llm(f"{prompt}\nYour previous answer was rejected ({e}). Answer again.")
+    return answer
+
+def ask_llm(prompt):
+    """Send the prompt to the model and return the raw text answer"""
+    start = time.perf_counter()
+    client = get_llm_client()
+    response = limiter["openai"].call(lambda: client.chat.completions.create(
+        model=LLM_MODEL,
+        max_tokens=LLM_MAX_TOKENS,
+        **get_prompt().request(prompt)
+    ), "POST")
+    signal_gate.record_llm_call(time.perf_counter() - start)
+    llm_usage.record(getattr(response, "usage", None))
+    return response.choices[0].message.content.strip()
 
 def get_rsi_zone(rsi):
     """Categorize RSI into zones"""
@@ -167,56 +296,5 @@ def get_volume_trend(volumes):
         return "stable"
 
 def create_prompt(technical_data, symbol, qty):
-    """Create comprehensive prompt with technical data"""
-    return f"""
-    You are an expert day trader analyzing {symbol} using technical analysis.
-    
-    CURRENT MARKET DATA:
-    - Symbol: {technical_data['symbol']}
-    - Current Price: ${technical_data['current_price']:.4f}
-    - SMA(20): ${technical_data['sma_20']:.4f}
-    - SMA(50): ${technical_data['sma_50']:.4f}
-    - RSI(9): {technical_data['rsi_9']:.4f}
-    - MACD: {technical_data['macd']:.2f}
-    - MACD Signal: {technical_data['signal']:.2f}
-    - Recent Closes: {technical_data['recent_closes']}
-    - Recent volumes: {technical_data['recent_volumes']}
-    - Price vs SMA(20): {technical_data['price_vs_sma20']:.4f}%
-    - Price vs SMA(50): {technical_data['price_vs_sma50']:.4f}%
-    - RSI Zone: {technical_data['rsi_zone']}
-    - Volume Trend: {technical_data['volume_trend']}
-    - SMA Crossover Detected: {technical_data['crossover_detected']}
-    - Trend Reversal: {technical_data['trend_reversal']}
-    
-    RECENT PRICE ACTION (Last 10 bars):
-    - Closes: {technical_data['recent_closes']}
-    - Volumes: {technical_data['recent_volumes']}
-    
-    RULES:
-    - Long only
-    
-    ANALYSIS REQUIRED:
-    1. Assess the current trend (bullish/bearish/neutral)
-    2. Evaluate momentum
-    3. Check for entry signals
-    4. Consider volume confirmation
-    5. Assess risk/reward ratio
-    
-    DECISION FORMAT:
-    DECISION FORMAT:
-    - If no trade: respond with exactly HOLD (no extra text).
-    - If trade: respond with JSON ONLY. Do not include code fences, or markdown. 
-    You must include a confidence level between 0 and 1 which indicates your confidence that the trade will return profit.
-    You must calculate the risk/reward ratio. Focus on finding trades with a favorable risk-to-reward ratio that can be held for several days to weeks.
-    Return ONLY the JSON object in the following format:
-    {{
-        "side": "buy",
-        "qty": {qty},
-        "order_type": "market",
-        "stop_loss": 435.5,
-        "take_profit": 450.0,
-        "reasoning": "Detailed explanation of your analysis including key support/resistance levels and momentum indicators",
-        "confidence": *indicate confidence level*,
-        "risk_reward": *indicate risk/reward ratio*
-    }}
-    """
\ No newline at end of file
+    """Per-call prompt text for the active prompt version (see app.prompts)"""
+    return get_prompt().render(technical_data, symbol, qty)
@@ -0,0 +1,279 @@
+# Real-time market data streaming
+# Subscribes to the Alpaca market data websocket (trades and/or minute bars), aggregates
+# them into 15-minute bars in memory and pushes each bar close straight to handlers such as
+# the strategy. After a reconnect the missed bars are backfilled over REST through the bar
+# store, so consumers see a continuous series.
+#
+#   stream = MarketStream(["SPY", "AAPL"])
+#   attach_strategy(stream)
+#   asyncio.run(stream.run())
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+import websockets
+from websockets.exceptions import WebSocketException
+
+DEFAULT_STREAM_URL = "wss://stream.data.alpaca.markets/v2/iex"
+# Seconds after a bucket ends before it is closed without waiting for the next trade
+CLOSE_GRACE = 2.0
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return pd.Timestamp(value).timestamp()
+
+
+class BarAggregator:
+    """Builds fixed-interval OHLCV + VWAP bars per symbol from trades or smaller bars"""
+
+    def __init__(self, minutes: int = 15):
+        self.step = minutes * 60
+        self.bars = {}  # symbol -> open bar being built
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts) // self.step * self.step
+
+    def _merge(self, symbol, ts, open_, high, low, close, volume, trade_count, notional):
+        """Fold data into the symbol's open bar; returns the bar it closed, if any"""
+        bucket = self._bucket(ts)
+        bar = self.bars.get(symbol)
+        closed = None
+        if bar is not None and bucket < bar["bucket"]:
+            # Late print for a bar that has already been emitted
+            return None
+        if bar is not None and bucket > bar["bucket"]:
+            closed = self._finish(symbol, bar)
+            bar = None
+        if bar is None:
+            self.bars[symbol] = {
+                "bucket": bucket, "open": open_, "high": high, "low": low, "close": close,
+                "volume": volume, "trade_count": trade_count, "notional": notional,
+            }
+        else:
+            bar["high"] = max(bar["high"], high)
+            bar["low"] = min(bar["low"], low)
+            bar["close"] = close
+            bar["volume"] += volume
+            bar["trade_count"] += trade_count
+            bar["notional"] += notional
+        return closed
+
+    def add_trade(self, symbol: str, ts, price: float, size: float):
+        return self._merge(symbol, _epoch(ts), price, price, price, price, size, 1, price * size)
+
+    def add_bar(self, symbol: str, ts, open_, high, low, close, volume, trade_count=0, vwap=None):
+        vwap = vwap if vwap is not None else (high + low + close) / 3
+        return self._merge(symbol, _epoch(ts), open_, high, low, close, volume, trade_count, vwap * volume)
+
+    def _finish(self, symbol, bar):
+        del self.bars[symbol]
+        volume = bar["volume"]
+        return {
+            "symbol": symbol,
+            "timestamp": datetime.fromtimestamp(bar["bucket"], tz=timezone.utc),
+            "open": bar["open"],
+            "high": bar["high"],
+            "low": bar["low"],
+            "close": bar["close"],
+            "volume": volume,
+            "trade_count": bar["trade_count"],
+            "vwap": bar["notional"] / volume if volume else bar["close"],
+        }
+
+    def flush(self, now: float, grace: float = CLOSE_GRACE):
+        """Close every bar whose interval ended more than `grace` seconds ago"""
+        closed = []
+        for symbol, bar in list(self.bars.items()):
+            if now >= bar["bucket"] + self.step + grace:
+                closed.append(self._finish(symbol, bar))
+        return closed
+
+    def discard_until(self, symbol: str, ts: float):
+        """Drop a partial bar already covered by backfilled data"""
+        bar = self.bars.get(symbol)
+        if bar is not None and bar["bucket"] <= ts:
+            del self.bars[symbol]
+
+
+class MarketStream:
+    """Websocket client for the Alpaca v2 market data stream with REST gap backfill"""
+
+    def __init__(self, symbols, url: str = None, minutes: int = 15, trades: bool = True,
+                 bars: bool = False, store=None, record_path: str = None, backfill: bool = True):
+        self.symbols = [s.upper() for s in symbols]
+        self.url = url or os.getenv("ALPACA_STREAM_URL", DEFAULT_STREAM_URL)
+        self.aggregator = BarAggregator(minutes)
+        self.channels = {}
+        if trades:
+            self.channels["trades"] = self.symbols
+        if bars:
+            self.channels["bars"] = self.symbols
+        self.store = store
+        self.record_path = record_path
+        self.backfill_enabled = backfill
+        self.handlers = []
+        self.last_close = {}  # symbol -> epoch seconds of the last bar emitted
+        self.connects = 0
+        self.messages = 0
+        self._stopped = asyncio.Event()
+
+    def on_bar(self, handler):
+        """Register handler(bar) for every closed bar; coroutine functions are awaited"""
+        self.handlers.append(handler)
+        return handler
+
+    async def _emit(self, bar):
+        ts = bar["timestamp"].timestamp()
+        if ts <= self.last_close.get(bar["symbol"], float("-inf")):
+            return
+        self.last_close[bar["symbol"]] = ts
+        if self.store is not None:
+            self.store.append(bar["symbol"], [bar])
+        for handler in self.handlers:
+            result = handler(bar)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _authenticate(self, ws):
+        key = os.getenv("APCA-API-KEY-ID", "")
+        secret = os.getenv("APCA-API-SECRET-KEY", "")
+        await ws.recv()  # [{"T": "success", "msg": "connected"}]
+        await ws.send(json.dumps({"action": "auth", "key": key, "secret": secret}))
+        reply = json.loads(await ws.recv())
+        if not any(m.get("T") == "success" and m.get("msg") == "authenticated" for m in reply):
+            raise PermissionError(f"Stream authentication failed: {reply}")
+        await ws.send(json.dumps({"action": "subscribe", **self.channels}))
+
+    async def _handle(self, message):
+        self.messages += 1
+        kind = message.get("T")
+        closed = None
+        if kind == "t":
+            closed = self.aggregator.add_trade(message["S"], message["t"], message["p"], message["s"])
+        elif kind == "b":
+            closed = self.aggregator.add_bar(
+                message["S"], message["t"], message["o"], message["h"], message["l"], message["c"],
+                message["v"], message.get("n", 0), message.get("vw"),
+            )
+        elif kind == "error":
+            logger.warning("Stream error: %s", message)
+        if closed is not None:
+            await self._emit(closed)
+
+    async def _close_due_bars(self, interval: float = 1.0):
+        while True:
+            await asyncio.sleep(interval)
+            for bar in self.aggregator.flush(datetime.now(timezone.utc).timestamp()):
+                await self._emit(bar)
+
+    async def backfill(self):
+        """Fetch bars missed while disconnected through the bar store and emit them in order"""
+        if self.store is None:
+            from app.bar_store import get_store
+            self.store = get_store()
+        await asyncio.get_running_loop().run_in_executor(None, self.store.sync, self.symbols)
+        for symbol in self.symbols:
+            since = self.last_close.get(symbol)
+            if since is None:
+                continue
+            frame = self.store.frame(symbol, since=int(since) + 1)
+            for ts, row in frame.iterrows():
+                await self._emit({"symbol": symbol, "timestamp": ts.to_pydatetime(), **{
+                    k: row[k] for k in ("open", "high", "low", "close", "volume", "trade_count", "vwap")
+                }})
+            self.aggregator.discard_until(symbol, self.last_close.get(symbol, 0))
+
+    async def _session(self):
+        async with websockets.connect(self.url) as ws:
+            await self._authenticate(ws)
+            self.connects += 1
+            if self.connects > 1 and self.backfill_enabled:
+                await self.backfill()
+            record = open(self.record_path, "a") if self.record_path else None
+            try:
+                async for raw in ws:
+                    for message in json.loads(raw):
+                        if record is not None:
+                            record.write(json.dumps(message) + "\n")
+                        await self._handle(message)
+            finally:
+                if record is not None:
+                    record.close()
+
+    async def run(self):
+        """Stream until stop() is called, reconnecting with backoff"""
+        closer = asyncio.ensure_future(self._close_due_bars())
+        attempt = 0
+        try:
+            while not self._stopped.is_set():
+                try:
+                    session = asyncio.ensure_future(self._session())
+                    stopped = asyncio.ensure_future(self._stopped.wait())
+                    done, _ = await asyncio.wait({session, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                    if stopped in done:
+                        session.cancel()
+                        break
+                    stopped.cancel()
+                    session.result()
+                except (OSError, WebSocketException) as e:
+                    logger.warning("Stream disconnected: %s", e)
+                except Exception:
+                    # A message or handler we couldn't process must not end the stream for good
+                    logger.exception("Stream session failed, reconnecting")
+                else:
+                    attempt = 0
+                    continue
+                await asyncio.sleep(RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)])
+                attempt += 1
+        finally:
+            closer.cancel()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def attach_strategy(stream: MarketStream, qty: int = 1, execute: bool = True):
+    """
+    Feed every closed bar into a per-symbol IncrementalIndicators and run the strategy on it.
+    Indicators are warmed from the bar store the first time a symbol closes a bar.
+    """
+    from app.bar_store import get_store
+    from app.bot import execute_decision
+    from app.indicators import IncrementalIndicators
+    from app.strategy import decide, technical_data_from_snapshot, MIN_BARS
+
+    engines = {}
+    decisions = {}
+
+    async def handle(bar):
+        symbol = bar["symbol"]
+        engine = engines.get(symbol)
+        if engine is None:
+            engine = engines[symbol] = IncrementalIndicators()
+            history = get_store().columns(symbol)
+            # The store may already hold this bar if it was written by the stream
+            history_ts = history["timestamp"]
+            keep = history_ts < int(bar["timestamp"].timestamp())
+            engine.warm(history["close"][keep], history["volume"][keep])
+        engine.update(float(bar["close"]), float(bar["volume"]), bar["timestamp"])
+        if engine.bars < MIN_BARS:
+            return
+
+        technical_data = technical_data_from_snapshot(engine.snapshot(), symbol)
+        loop = asyncio.get_running_loop()
+        decision = await loop.run_in_executor(None, decide, technical_data, symbol, qty)
+        if execute:
+            decision = await loop.run_in_executor(None, execute_decision, decision, symbol, qty)
+        decisions[symbol] = decision
+
+    stream.on_bar(handle)
+    return decisions
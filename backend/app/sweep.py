@@ -0,0 +1,254 @@
+# Parameter sweep and walk-forward optimization
+# Evaluates grids of strategy parameters (SMA / RSI / MACD periods, minimum bars, the
+# confidence threshold scale and the stub LLM's bracket) with the backtester across all cores.
+# Bars are copied once into shared memory and every worker maps the same buffers, so nothing
+# but the parameter dicts and summary stats is pickled between processes.
+#
+#   cd backend && python -m app.sweep SPY AAPL --grid grid.json --folds 4 --out sweep.csv
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.backtest import Backtester, RuleBasedLLM
+from app.strategy import MIN_BARS
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Current hardcoded values in strategy.py / bot.py
+DEFAULT_PARAMS = {
+    "sma_fast": 20,
+    "sma_slow": 50,
+    "rsi_period": 9,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "min_bars": MIN_BARS,
+    "confidence_scale": 1.0,
+    "stop_pct": 0.01,
+    "target_pct": 0.02,
+}
+
+
+class SharedBars:
+    """Bars for many symbols laid out column-wise in shared memory blocks"""
+
+    def __init__(self, spec, blocks):
+        self.spec = spec
+        self._blocks = blocks
+        self.bars = {}
+        for symbol, (start, end) in spec["offsets"].items():
+            self.bars[symbol] = {
+                column: self._array(column)[start:end] for column in COLUMNS
+            }
+
+    def _array(self, column):
+        dtype = np.int64 if column == "timestamp" else np.float64
+        return np.ndarray((self.spec["length"],), dtype=dtype, buffer=self._blocks[column].buf)
+
+    @classmethod
+    def create(cls, bars):
+        """Copy {symbol: DataFrame} into new shared memory blocks"""
+        offsets = {}
+        length = 0
+        for symbol, df in bars.items():
+            offsets[symbol] = (length, length + len(df))
+            length += len(df)
+
+        blocks = {}
+        for column in COLUMNS:
+            block = shared_memory.SharedMemory(create=True, size=max(length, 1) * 8)
+            blocks[column] = block
+            dtype = np.int64 if column == "timestamp" else np.float64
+            target = np.ndarray((length,), dtype=dtype, buffer=block.buf)
+            for symbol, df in bars.items():
+                start, end = offsets[symbol]
+                if column == "timestamp":
+                    values = df.index.asi8 // 10**9 if isinstance(df.index, pd.DatetimeIndex) else df.index
+                else:
+                    values = df[column].to_numpy(dtype=np.float64)
+                target[start:end] = values
+
+        spec = {"length": length, "offsets": offsets, "names": {c: b.name for c, b in blocks.items()}}
+        return cls(spec, blocks)
+
+    @classmethod
+    def attach(cls, spec):
+        """Map existing blocks by name (in a worker process)"""
+        blocks = {column: shared_memory.SharedMemory(name=name) for column, name in spec["names"].items()}
+        return cls(spec, blocks)
+
+    def close(self, unlink: bool = False):
+        self.bars = {}
+        for block in self._blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+
+def parameter_grid(grid):
+    """Expand {name: [values]} into parameter dicts, dropping inconsistent combinations"""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = {**DEFAULT_PARAMS, **dict(zip(names, values))}
+        if params["sma_fast"] >= params["sma_slow"] or params["macd_fast"] >= params["macd_slow"]:
+            continue
+        yield params
+
+
+def walk_forward_splits(start: int, end: int, folds: int, train_fraction: float = 0.7, anchored: bool = False):
+    """
+    Split [start, end) epoch seconds into `folds` consecutive (train_start, train_end, test_end)
+    windows. Rolling by default; anchored splits keep the train window starting at `start`.
+    """
+    span = (end - start) / folds
+    splits = []
+    for fold in range(folds):
+        fold_start = start + int(span * fold)
+        fold_end = start + int(span * (fold + 1))
+        train_end = fold_start + int((fold_end - fold_start) * train_fraction)
+        splits.append((start if anchored else fold_start, train_end, fold_end))
+    return splits
+
+
+# Worker side
+_shared = None
+
+
+def _init_worker(spec):
+    global _shared
+    _shared = SharedBars.attach(spec)
+
+
+def _window(bars, start, end, warmup):
+    """Column views for [start, end) plus `warmup` bars before it, without copying"""
+    lo = int(np.searchsorted(bars["timestamp"], start, side="left")) if start is not None else 0
+    hi = int(np.searchsorted(bars["timestamp"], end, side="left")) if end is not None else len(bars["timestamp"])
+    lo = max(lo - warmup, 0)
+    return {column: values[lo:hi] for column, values in bars.items()}
+
+
+def evaluate(params, start=None, end=None, bars=None):
+    """Backtest one parameter set over [start, end) and return params + summary stats"""
+    bars = bars if bars is not None else _shared.bars
+    backtester = Backtester(
+        llm=RuleBasedLLM(stop_pct=params["stop_pct"], target_pct=params["target_pct"]),
+        min_bars=params["min_bars"],
+        confidence_scale=params["confidence_scale"],
+        indicator_params={
+            "sma_fast": params["sma_fast"],
+            "sma_slow": params["sma_slow"],
+            "rsi_period": params["rsi_period"],
+            "macd": (params["macd_fast"], params["macd_slow"], params["macd_signal"]),
+        },
+    )
+    # Enough history before the window for the slowest indicator to settle
+    warmup = max(params["min_bars"], params["sma_slow"], params["macd_slow"] * 3)
+    window = {symbol: _window(data, start, end, warmup) for symbol, data in bars.items()}
+    summary = backtester.run(window, start_time=start).summary()
+    return {**params, **summary}
+
+
+def _evaluate_task(task):
+    params, start, end = task
+    return evaluate(params, start, end)
+
+
+class SweepRunner:
+    """Runs parameter grids and walk-forward optimization over a process pool"""
+
+    def __init__(self, bars, workers: int = None, metric: str = "total_pnl"):
+        self.shared = SharedBars.create(bars)
+        self.metric = metric
+        self.workers = workers or os.cpu_count()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.shared.spec,)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+        self.shared.close(unlink=True)
+
+    def bounds(self):
+        timestamps = [b["timestamp"] for b in self.shared.bars.values() if len(b["timestamp"])]
+        return int(min(t[0] for t in timestamps)), int(max(t[-1] for t in timestamps)) + 1
+
+    def run_grid(self, grid, start=None, end=None) -> pd.DataFrame:
+        """Evaluate every combination and return them ranked by the metric"""
+        tasks = [(params, start, end) for params in parameter_grid(grid)]
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        results = list(self._pool.map(_evaluate_task, tasks, chunksize=chunksize))
+        table = pd.DataFrame(results)
+        if table.empty:
+            return table
+        return table.sort_values(self.metric, ascending=False, ignore_index=True)
+
+    def walk_forward(self, grid, folds: int = 4, train_fraction: float = 0.7, anchored: bool = False) -> pd.DataFrame:
+        """Pick the best parameters on each train window and score them out-of-sample"""
+        start, end = self.bounds()
+        rows = []
+        for fold, (train_start, train_end, test_end) in enumerate(
+            walk_forward_splits(start, end, folds, train_fraction, anchored)
+        ):
+            ranked = self.run_grid(grid, train_start, train_end)
+            if ranked.empty:
+                continue
+            # Back to plain Python types so the params match DEFAULT_PARAMS
+            best = {name: type(default)(ranked.iloc[0][name]) for name, default in DEFAULT_PARAMS.items()}
+            test = self._pool.submit(_evaluate_task, (best, train_end, test_end)).result()
+            rows.append({
+                "fold": fold,
+                "train_start": pd.to_datetime(train_start, unit="s", utc=True),
+                "train_end": pd.to_datetime(train_end, unit="s", utc=True),
+                "test_end": pd.to_datetime(test_end, unit="s", utc=True),
+                f"train_{self.metric}": ranked.iloc[0][self.metric],
+                **{f"test_{k}": v for k, v in test.items() if k not in DEFAULT_PARAMS},
+                **best,
+            })
+        return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over bars in the local bar store")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--grid", help="JSON file of {param: [values]}; defaults to a small SMA/RSI grid")
+    parser.add_argument("--folds", type=int, default=0, help="walk-forward folds (0 = full-period sweep)")
+    parser.add_argument("--anchored", action="store_true")
+    parser.add_argument("--metric", default="total_pnl")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    from app.bar_store import get_store
+
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    else:
+        grid = {"sma_fast": [10, 20, 30], "sma_slow": [50, 100], "rsi_period": [7, 9, 14]}
+
+    store = get_store()
+    bars = {symbol.upper(): store.frame(symbol) for symbol in args.symbols}
+    with SweepRunner(bars, workers=args.workers, metric=args.metric) as runner:
+        if args.folds:
+            table = runner.walk_forward(grid, folds=args.folds, anchored=args.anchored)
+        else:
+            table = runner.run_grid(grid)
+    table.to_csv(args.out, index=False)
+    print(table.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
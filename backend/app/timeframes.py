@@ -0,0 +1,259 @@
+# Multi-timeframe bars from one 1-minute source
+# Only 1-minute bars are downloaded (BarStore.sync, delta requests as for the 15-minute store);
+# 5-minute, 15-minute, hourly and daily OHLCV + VWAP bars are derived from them and persisted as
+# ordinary BarStore columns. Each timeframe is built from the next smaller one's closed bars,
+# which are kept in memory until their parent bar closes, so an update reads only the new
+# 1-minute rows and writes only bars that just closed: constant work per new minute whatever
+# the history. Only closed bars are stored; the still-open bar can be built on read.
+# The first bar of each timeframe covers only the part of its interval the 1-minute history has.
+#
+# Intraday buckets are aligned on UTC epoch multiples (hours line up with New York hours);
+# daily bars run from midnight to midnight New York time and take their timestamp from that
+# midnight, as Alpaca's daily bars do.
+#
+#   store = get_timeframes()
+#   store.sync(["SPY"])                         # one 1-minute delta request, then the cascade
+#   frames = store.multi("SPY", (15, 60, 1440)) # {minutes: BarArray}, no network
+#
+# BAR_SOURCE=1min makes app.bar_store.get_store() the derived 15-minute store, so the bot and
+# scheduler read resampled bars with the same BarStore calls.
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.bar_store import BarStore, COLUMNS, DEFAULT_LOOKBACK, DEFAULT_ROOT
+from app.bars import BarArray
+from app.metrics import span
+
+TIMEFRAMES = (5, 15, 60, 1440)
+DAY = 1440
+MARKET_TZ = ZoneInfo("America/New_York")
+RESAMPLED_ROOT = os.path.join(DEFAULT_ROOT, "resampled")
+
+
+def _midnights(days):
+    """UTC epoch of New York midnight for each New York calendar day number (days since epoch)"""
+    out = np.empty(len(days), dtype=np.int64)
+    for i, day in enumerate(days.tolist()):
+        date = datetime(1970, 1, 1) + timedelta(days=day)
+        out[i] = int(date.replace(tzinfo=MARKET_TZ).timestamp())
+    return out
+
+
+def buckets(timestamps: np.ndarray, minutes: int) -> np.ndarray:
+    """Open time of the `minutes` bar each timestamp falls in"""
+    if minutes < DAY:
+        step = minutes * 60
+        return timestamps // step * step
+    # Offsets only change at DST transitions, so look them up once per distinct UTC hour
+    hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(h * 3600, tz=MARKET_TZ).utcoffset().total_seconds() for h in hours.tolist()
+    ], dtype=np.int64)
+    local_days = (timestamps + offsets[inverse]) // 86400
+    days, inverse = np.unique(local_days, return_inverse=True)
+    return _midnights(days)[inverse]
+
+
+def aggregate(data, minutes: int):
+    """Columns of bars (oldest first) -> columns of `minutes` bars, open buckets included"""
+    timestamps = np.asarray(data["timestamp"])
+    if len(timestamps) == 0:
+        return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+    bucket = buckets(timestamps, minutes)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+    volume = np.asarray(data["volume"], dtype=np.float64)
+    close = np.asarray(data["close"], dtype=np.float64)
+    vwap = np.asarray(data["vwap"], dtype=np.float64)
+    # VWAP re-weights by volume; a bar without volume falls back to its close
+    notional = np.add.reduceat(np.where(np.isnan(vwap), close, vwap) * volume, starts)
+    total = np.add.reduceat(volume, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(total > 0, notional / total, close[ends])
+    return {
+        "timestamp": bucket[starts],
+        "open": np.asarray(data["open"], dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(data["high"], dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(data["low"], dtype=np.float64), starts),
+        "close": close[ends],
+        "volume": total,
+        "trade_count": np.add.reduceat(np.asarray(data["trade_count"], dtype=np.float64), starts),
+        "vwap": vwap,
+    }
+
+
+def _concat(*parts):
+    return {c: np.concatenate([np.asarray(p[c], dtype=dtype) for p in parts]) for c, dtype in COLUMNS.items()}
+
+
+def _slice(data, start: int = None, stop: int = None):
+    return {c: v[start:stop] for c, v in data.items()}
+
+
+def bucket_ends(bucket: np.ndarray, minutes: int) -> np.ndarray:
+    if minutes < DAY:
+        return bucket + minutes * 60
+    # Daily bars are 23-25 hours around DST changes; a day's bar ends at the next midnight
+    return buckets(bucket + 26 * 3600, DAY)
+
+
+class DerivedBarStore(BarStore):
+    """One resampled timeframe; sync() goes through the 1-minute source and the cascade"""
+
+    def __init__(self, source: "TimeframeStore", minutes: int):
+        super().__init__(source.root, minutes)
+        self.source = source
+
+    def sync(self, symbols, client=None, lookback: timedelta = DEFAULT_LOOKBACK, end: datetime = None):
+        return {s: added[self.minutes] for s, added in self.source.sync(symbols, client, lookback, end).items()}
+
+
+class _Cascade:
+    """
+    In-memory roll-up state of one symbol: for each timeframe, the closed child bars that its
+    open bar is still collecting ("pending", at most one bar's worth once caught up) and when
+    the first of them closes, plus how many 1-minute bars have been consumed.
+    """
+
+    def __init__(self, base_count: int, latest: int = None):
+        self.base_count = base_count
+        self.latest = latest
+        self.pending = {}
+        self.closes_at = {}
+
+
+class TimeframeStore:
+    """1-minute bar store plus its resampled timeframes"""
+
+    def __init__(self, root: str = RESAMPLED_ROOT, timeframes=TIMEFRAMES):
+        self.root = root
+        self.base = BarStore(root, minutes=1)
+        self.timeframes = tuple(sorted(timeframes))
+        self.stores = {minutes: DerivedBarStore(self, minutes) for minutes in self.timeframes}
+        self.parents = {minutes: self._parent(minutes) for minutes in self.timeframes}
+        self._state = {}  # symbol -> _Cascade
+        self._lock = threading.RLock()
+
+    def store(self, minutes: int) -> BarStore:
+        return self.base if minutes == 1 else self.stores[minutes]
+
+    def _parent(self, minutes: int) -> int:
+        """The largest smaller timeframe whose bars nest in `minutes` bars; 1 for the base"""
+        smaller = [m for m in self.timeframes if m < minutes and (minutes % m == 0 or minutes == DAY)]
+        return smaller[-1] if smaller else 1
+
+    def sync(self, symbols, client=None, lookback: timedelta = DEFAULT_LOOKBACK, end: datetime = None):
+        """Delta-sync the 1-minute bars, then roll them up; returns {symbol: {minutes: new bars}}"""
+        end = end or datetime.now(timezone.utc)
+        with span("fetch"):
+            added = self.base.sync(symbols, client, lookback, end)
+        rolled = self.update(symbols, as_of=int(end.timestamp()))
+        return {s: {1: added.get(s, 0), **rolled[s]} for s in rolled}
+
+    def _load(self, symbol: str) -> _Cascade:
+        """Rebuild a symbol's roll-up state from the stored bars (first use in this process)"""
+        state = _Cascade(self.base.count(symbol), self.base.last_timestamp(symbol))
+        for minutes in self.timeframes:
+            last = self.stores[minutes].last_timestamp(symbol)
+            # Children from the end of the last stored bar on
+            since = None if last is None else int(bucket_ends(np.array([last]), minutes)[0])
+            children = self.store(self.parents[minutes]).columns(symbol, since)
+            state.pending[minutes] = {c: np.array(v) for c, v in children.items()}
+            state.closes_at[minutes] = None
+        return state
+
+    def update(self, symbols, as_of: int = None):
+        """
+        Store every bar closed by the 1-minute history, cascading up the timeframes. A bar is
+        closed once `as_of` (epoch seconds) passed its end; by default, once a 1-minute bar from
+        after its end is stored. Returns {symbol: {minutes: new bars}}.
+        """
+        result = {}
+        with self._lock, span("resample"):
+            for symbol in (s.upper() for s in symbols):
+                result[symbol] = self._advance(symbol, as_of)
+        return result
+
+    def _advance(self, symbol: str, as_of: int = None):
+        state = self._state.get(symbol)
+        if state is None:
+            state = self._state[symbol] = self._load(symbol)
+        count = self.base.count(symbol)
+        fresh = {1: self.base.rows(symbol, state.base_count, count)}
+        state.base_count = count
+        if len(fresh[1]["timestamp"]):
+            state.latest = int(fresh[1]["timestamp"][-1])
+        if as_of is None:
+            as_of = state.latest if state.latest is not None else 0
+
+        added = {}
+        for minutes in self.timeframes:
+            pending = state.pending[minutes]
+            children = fresh[self.parents[minutes]]
+            if len(children["timestamp"]):
+                if not len(pending["timestamp"]):
+                    state.closes_at[minutes] = None
+                pending = state.pending[minutes] = _concat(pending, children)
+            closes_at = state.closes_at[minutes]
+            if not len(pending["timestamp"]) or (closes_at is not None and as_of < closes_at):
+                # Nothing closes: no file access at this level
+                fresh[minutes] = _slice(pending, 0, 0)
+                added[minutes] = 0
+                continue
+            ends = bucket_ends(buckets(pending["timestamp"], minutes), minutes)
+            n = int(np.searchsorted(ends, as_of, side="right"))
+            state.pending[minutes] = _slice(pending, n)
+            state.closes_at[minutes] = int(ends[n]) if n < len(ends) else None
+            if n == 0:
+                fresh[minutes] = _slice(pending, 0, 0)
+                added[minutes] = 0
+                continue
+            fresh[minutes] = aggregate(_slice(pending, None, n), minutes)
+            added[minutes] = self.stores[minutes].append_columns(symbol, fresh[minutes])
+        return added
+
+    def _open(self, state: _Cascade, minutes: int):
+        """Children of the `minutes` bars not stored yet: its pending bars plus its parent's open bars"""
+        parent = self.parents[minutes]
+        pending = state.pending[minutes]
+        if parent == 1:
+            return pending
+        return _concat(pending, aggregate(self._open(state, parent), parent))
+
+    def bars(self, symbol: str, minutes: int, since: int = None, partial: bool = False) -> BarArray:
+        """
+        Stored (closed) `minutes` bars from epoch second `since`; with partial=True the bars not
+        yet closed are appended, from the cached roll-up state brought up to the last 1-minute bar.
+        """
+        store = self.store(minutes)
+        closed = store.columns(symbol, since)
+        if not partial or minutes == 1:
+            return BarArray.from_columns(symbol, closed)
+        with self._lock:
+            self._advance(symbol.upper())
+            tail = aggregate(self._open(self._state[symbol.upper()], minutes), minutes)
+        if since is not None:
+            tail = _slice(tail, int(np.searchsorted(tail["timestamp"], since, side="left")))
+        return BarArray.from_columns(symbol, _concat(closed, tail))
+
+    def multi(self, symbol: str, timeframes=TIMEFRAMES, since: int = None, partial: bool = False):
+        """{minutes: BarArray} for one symbol, from local files only"""
+        return {minutes: self.bars(symbol, minutes, since, partial) for minutes in timeframes}
+
+
+_timeframes = None
+_timeframes_lock = threading.Lock()
+
+
+def get_timeframes() -> TimeframeStore:
+    """Process-wide 1-minute store and its resampled timeframes"""
+    global _timeframes
+    with _timeframes_lock:
+        if _timeframes is None:
+            _timeframes = TimeframeStore()
+        return _timeframes
@@ -0,0 +1,69 @@
+# Dashboard load benchmark
+# Simulates concurrent dashboard pollers against the FastAPI app backed by a local mock broker
+# and reports p50/p99 latency per route.
+#
+#   cd backend && python -m benchmarks.bench_api_load --clients 200 --rounds 10 --latency 0.02
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.mock_broker import MockBroker
+
+ROUTES = ["/positions", "/orders", "/account"]
+
+
+async def poller(client, rounds, samples):
+    for _ in range(rounds):
+        for route in ROUTES:
+            start = time.perf_counter()
+            response = await client.get(route)
+            samples[route].append((time.perf_counter() - start, response.status_code))
+
+
+async def run(clients: int, rounds: int):
+    from app.main import app
+
+    samples = {route: [] for route in ROUTES}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(poller(client, rounds, samples) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def report(samples, elapsed):
+    total = 0
+    print(f"{'route':<12}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for route, values in samples.items():
+        latencies = np.array([v[0] for v in values]) * 1000
+        errors = sum(1 for v in values if v[1] != 200)
+        total += len(values)
+        print(f"{route:<12}{len(values):>10}{errors:>8}"
+              f"{np.percentile(latencies, 50):>10.1f}{np.percentile(latencies, 99):>10.1f}")
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent dashboard load benchmark")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock broker latency in seconds")
+    args = parser.parse_args()
+
+    with MockBroker(latency=args.latency) as broker:
+        broker.install()
+        samples, elapsed = asyncio.run(run(args.clients, args.rounds))
+        report(samples, elapsed)
+        print(f"mock broker served {broker.requests} requests")
+
+        from app.alpaca_client import get_client_stats
+        print(get_client_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Bar container benchmark
+# Build time and memory of the original get_15min_data conversion (one dict per SDK bar, then
+# a DataFrame) against app.bars.BarArray built straight from the same SDK bars, for a single
+# symbol and for a many-symbol universe, plus the per-bar cost of appending streamed bars.
+#
+#   cd backend && python -m benchmarks.bench_bars --bars 2000 --symbols 200
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from alpaca.data.models import BarSet
+
+from app.bars import BarArray
+from benchmarks.mock_broker import synthetic_bars
+
+
+def legacy_frame(bars, symbol):
+    """get_15min_data's conversion before BarArray"""
+    bar_list = [
+        {
+            "timestamp": bar.timestamp,
+            "open": bar.open,
+            "high": bar.high,
+            "low": bar.low,
+            "close": bar.close,
+            "volume": bar.volume,
+            "trade_count": bar.trade_count,
+            "vwap": bar.vwap,
+            "symbol": bar.symbol
+        }
+        for bar in bars[symbol]
+    ]
+    df = pd.DataFrame(bar_list)
+    df.set_index('timestamp', inplace=True)
+    return df
+
+
+def sdk_bars(symbol, n):
+    end = datetime(2024, 6, 3, 20, 0, tzinfo=timezone.utc)
+    return BarSet({symbol: synthetic_bars(symbol, end - timedelta(minutes=15 * n), end)})
+
+
+def best_time(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def peak_and_retained(build):
+    """(peak bytes allocated while building, bytes still held by the result)"""
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, retained, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BarArray vs list-of-dicts DataFrame benchmark")
+    parser.add_argument("--bars", type=int, default=2000, help="bars per symbol")
+    parser.add_argument("--symbols", type=int, default=200, help="symbols in the universe test")
+    args = parser.parse_args()
+
+    barset = sdk_bars("SPY", args.bars)
+    legacy = legacy_frame(barset, "SPY")
+    array = BarArray.from_bars(barset["SPY"], "SPY")
+    pd.testing.assert_frame_equal(array.to_frame(), legacy, check_dtype=False, check_index_type=False)
+
+    paths = {
+        "dicts -> DataFrame": lambda: legacy_frame(barset, "SPY"),
+        "BarArray": lambda: BarArray.from_bars(barset["SPY"], "SPY"),
+        "BarArray float32": lambda: BarArray.from_bars(barset["SPY"], "SPY", np.float32),
+        "BarArray -> DataFrame": lambda: BarArray.from_bars(barset["SPY"], "SPY").to_frame(),
+    }
+    print(f"One symbol, {len(legacy)} bars")
+    print(f"{'path':<24}{'build ms':>10}{'peak KiB':>10}{'held KiB':>10}")
+    for name, build in paths.items():
+        elapsed = best_time(build)
+        peak, retained, _ = peak_and_retained(build)
+        print(f"{name:<24}{elapsed * 1000:>10.2f}{peak / 1024:>10.0f}{retained / 1024:>10.0f}")
+
+    # Universe: how much a bot holding every symbol's history keeps resident
+    universe = {f"S{i}": sdk_bars(f"S{i}", args.bars) for i in range(args.symbols)}
+    for name, build in (
+        ("dicts -> DataFrame", lambda: [legacy_frame(b, s) for s, b in universe.items()]),
+        ("BarArray", lambda: [BarArray.from_bars(b[s], s) for s, b in universe.items()]),
+        ("BarArray float32", lambda: [BarArray.from_bars(b[s], s, np.float32) for s, b in universe.items()]),
+    ):
+        start = time.perf_counter()
+        peak, retained, _ = peak_and_retained(build)
+        elapsed = time.perf_counter() - start
+        print(f"{args.symbols} symbols {name:<20} {elapsed:6.2f}s (traced)  held {retained / 2**20:8.1f} MiB")
+
+    # Streaming append
+    stream = list(sdk_bars("QQQ", 10000)["QQQ"])
+    target = BarArray("QQQ")
+    start = time.perf_counter()
+    for bar in stream:
+        target.append(bar)
+    per_bar = (time.perf_counter() - start) / len(stream)
+    rebuilt = legacy_frame({"QQQ": stream[:-1]}, "QQQ")
+    start = time.perf_counter()
+    pd.concat([rebuilt, legacy_frame({"QQQ": stream[-1:]}, "QQQ")])
+    concat = time.perf_counter() - start
+    print(f"append: BarArray {per_bar * 1e6:.2f} us/bar, DataFrame concat of one bar onto {len(rebuilt)} {concat * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
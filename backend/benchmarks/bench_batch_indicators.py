@@ -0,0 +1,68 @@
+# Multi-symbol indicator benchmark
+# Time to compute llm_strategy's technical features for a whole universe: one pandas pipeline
+# per symbol versus a single vectorized pass of app.batch_indicators.compute_features.
+#
+#   cd backend && python -m benchmarks.bench_batch_indicators --sizes 10 50 100 500 --bars 182
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.batch_indicators import compute_features
+from app.strategy import (
+    calculate_sma, calculate_rsi, calculate_macd,
+    detect_sma_crossover, check_trend_reversal, get_rsi_zone, get_volume_trend
+)
+
+
+def per_symbol(closes, volumes):
+    rows = []
+    for c, v in zip(closes, volumes):
+        sma_20 = calculate_sma(c, 20)
+        sma_50 = calculate_sma(c, 50)
+        rsi_9 = calculate_rsi(c, 9)
+        macd_line, signal_line, _ = calculate_macd(c)
+        rows.append((
+            sma_20.iloc[-1], sma_50.iloc[-1], rsi_9.iloc[-1], macd_line.iloc[-1], signal_line.iloc[-1],
+            detect_sma_crossover(c, sma_20, sma_50), check_trend_reversal(sma_20, sma_50),
+            get_rsi_zone(rsi_9.iloc[-1]), get_volume_trend(v[-10:]),
+        ))
+    return rows
+
+
+def universe(symbols: int, bars: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, (symbols, bars)), axis=1)
+    volumes = rng.integers(1_000, 50_000, (symbols, bars)).astype(np.float64)
+    return closes, volumes
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-symbol pandas vs vectorized universe indicators")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--bars", type=int, default=182)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8}{'pandas ms':>12}{'vectorized ms':>15}{'speedup':>10}")
+    for size in args.sizes:
+        closes, volumes = universe(size, args.bars)
+        pandas_time = timed(per_symbol, closes, volumes)
+        vector_time = timed(compute_features, closes, volumes)
+        print(f"{size:>8}{pandas_time * 1000:>12.1f}{vector_time * 1000:>15.2f}{pandas_time / vector_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Indicator update benchmark
+# Per-bar cost of recomputing SMA/RSI/MACD with the pandas functions in strategy.py over the
+# trailing window versus one O(1) update of app.indicators.IncrementalIndicators.
+#
+#   cd backend && python -m benchmarks.bench_indicators --window 182 --bars 500
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.indicators import IncrementalIndicators
+from app.strategy import calculate_sma, calculate_rsi, calculate_macd
+
+
+def synthetic_closes(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 0.5, n))
+
+
+def batch_update(closes):
+    sma_20 = calculate_sma(closes, 20)
+    sma_50 = calculate_sma(closes, 50)
+    rsi_9 = calculate_rsi(closes, 9)
+    macd_line, signal_line, _ = calculate_macd(closes)
+    return sma_20.iloc[-1], sma_50.iloc[-1], rsi_9.iloc[-1], macd_line.iloc[-1], signal_line.iloc[-1]
+
+
+def run(window: int, bars: int):
+    closes = synthetic_closes(window + bars)
+
+    # Pandas path: every new bar recomputes everything over the trailing window
+    start = time.perf_counter()
+    for i in range(window, window + bars):
+        expected = batch_update(closes[i - window + 1:i + 1])
+    batch_per_bar = (time.perf_counter() - start) / bars
+
+    # Incremental path: warm once, then one update per bar
+    engine = IncrementalIndicators()
+    engine.warm(closes[:window])
+    start = time.perf_counter()
+    for close in closes[window:]:
+        snapshot = engine.update(float(close))
+    incremental_per_bar = (time.perf_counter() - start) / bars
+
+    # The incremental EMA has seen the full history, so compare the window-independent values
+    error = max(abs(snapshot["sma_20"] - expected[0]), abs(snapshot["sma_50"] - expected[1]),
+                abs(snapshot["rsi_9"] - expected[2]))
+    return batch_per_bar, incremental_per_bar, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental vs pandas indicator benchmark")
+    parser.add_argument("--window", type=int, default=182, help="bars in the trailing window (7 days of 15m bars)")
+    parser.add_argument("--bars", type=int, default=500, help="new bars to process")
+    args = parser.parse_args()
+
+    batch, incremental, error = run(args.window, args.bars)
+    print(f"pandas recompute : {batch * 1e6:10.1f} us/bar")
+    print(f"incremental      : {incremental * 1e6:10.1f} us/bar")
+    print(f"speedup          : {batch / incremental:10.1f}x")
+    print(f"max abs error    : {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
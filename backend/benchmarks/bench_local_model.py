@@ -0,0 +1,104 @@
+# Local decision model benchmark
+# Trains app.local_model end to end on synthetic data (random-walk bars in a temporary bar
+# store, decisions journaled to an in-memory journal every few bars, as the live bot would),
+# then times inference: one symbol through LocalModelBackend.decide, a batch through
+# decide_batch, and a universe straight from a compute_features matrix.
+#
+#   cd backend && python -m benchmarks.bench_local_model --symbols 20 --days 120
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+
+from alpaca.data.models import BarSet
+
+from app.backends import LocalModelBackend
+from app.bar_store import BarStore
+from app.batch_indicators import compute_features
+from app.indicators import IncrementalIndicators
+from app.journal import Journal
+from app.local_model import journal_samples, labelled, train
+from app.strategy import MIN_BARS, technical_data_from_snapshot
+from benchmarks.mock_broker import synthetic_bars
+
+END = datetime(2024, 6, 3, 20, 0, tzinfo=timezone.utc)
+
+
+def universe(symbols: int):
+    return [f"S{i:03d}" for i in range(symbols)]
+
+
+def build(symbols, days: int, every: int):
+    """Bar store with `days` of bars per symbol and a journal with a decision every `every` bars"""
+    store = BarStore(tempfile.mkdtemp(prefix="bench-local-"))
+    journal = Journal("sqlite://", flush_interval=0.05)
+    for symbol in symbols:
+        raw = synthetic_bars(symbol, END - timedelta(days=days), END)
+        store.append(symbol, BarSet({symbol: raw})[symbol])
+        bars = store.bars(symbol)
+        engine = IncrementalIndicators()
+        for i, (close, volume) in enumerate(zip(bars["close"].tolist(), bars["volume"].tolist())):
+            engine.update(close, volume)
+            if engine.bars >= MIN_BARS and i % every == 0:
+                # Decided at the bar's close
+                ts = datetime.fromtimestamp(int(bars["timestamp"][i]) + 15 * 60, tz=timezone.utc)
+                technical_data = technical_data_from_snapshot(engine.snapshot(), symbol)
+                journal.record_decision(symbol, {"decision": "HOLD"}, gated=True,
+                                        technical_data=technical_data, ts=ts)
+    journal.flush()
+    return store, journal
+
+
+def per_call(fn, repeats: int):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def run(symbols: int, days: int, every: int, batch: int):
+    names = universe(symbols)
+    start = time.perf_counter()
+    store, journal = build(names, days, every)
+    samples = journal_samples(journal)
+    rows, labels = labelled(samples, store, stop_pct=0.01, target_pct=0.02)
+    model, report = train(rows, labels, stop_pct=0.01, target_pct=0.02)
+    print(f"trained on {report['rows']} journaled decisions in {time.perf_counter() - start:.1f}s "
+          f"(positive rate {report['positive_rate']:.2f}), holdout: {report.get('holdout')}")
+
+    backend = LocalModelBackend(model)
+    technical_data = samples[-1][2]
+    single = per_call(lambda: backend.decide(technical_data, "S000", 1, record=False), 2000)
+    items = [(samples[i % len(samples)][2], f"S{i:03d}", 1) for i in range(batch)]
+    batched = per_call(lambda: backend.decide_batch(items, record=False), 20)
+
+    closes = np.vstack([store.bars(s)["close"][-200:] for s in names])
+    volumes = np.vstack([store.bars(s)["volume"][-200:] for s in names]).astype(np.float64)
+    reps = -(-batch // symbols)
+    features = np.tile(compute_features(closes, volumes), (reps, 1))[:batch]
+    symbols_batch = [f"S{i:03d}" for i in range(batch)]
+    matrix = per_call(lambda: backend.decide_features(features, symbols_batch, 1, record=False), 20)
+    scoring = per_call(lambda: model.probabilities(features), 200)
+
+    print(f"decide, one symbol:            {single * 1e6:8.1f}us")
+    print(f"decide_batch, {batch} symbols:   {batched * 1e3:8.2f}ms ({batched / batch * 1e6:.1f}us/symbol)")
+    print(f"decide_features, {batch} symbols:{matrix * 1e3:8.2f}ms ({matrix / batch * 1e6:.1f}us/symbol)")
+    print(f"probabilities only, {batch} rows:{scoring * 1e3:8.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local decision model training and inference")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--every", type=int, default=4, help="journal a decision every N bars")
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.every, args.batch)
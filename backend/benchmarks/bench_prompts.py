@@ -0,0 +1,75 @@
+# Prompt size benchmark
+# Input tokens, characters and render time per prompt version in app.prompts, over technical
+# snapshots of synthetic random-walk bars. Tokens are the static prefix (system message plus the
+# response schema, identical on every call) and the per-call user message. Counted with
+# tiktoken's o200k_base (gpt-4o / gpt-4o-mini) when it is installed and its encoding files are
+# available, otherwise estimated at 4 characters per token and labelled "est".
+#
+#   cd backend && python -m benchmarks.bench_prompts --samples 200
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+
+from app.prompts import PROMPTS, TradeDecision
+from app.strategy import build_technical_data
+
+SAMPLE_ANSWER = json.dumps({
+    "decision": "BUY", "side": "buy", "order_type": "market", "stop_loss": 98.5, "take_profit": 104.0,
+    "confidence": 0.62, "risk_reward": 2.1, "reasoning": "Fresh SMA20/50 crossover on rising volume.",
+})
+
+
+def token_counter():
+    """(count(text) -> int, label)"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "o200k_base"
+    except Exception:
+        return (lambda text: round(len(text) / 4)), "est"
+
+
+def snapshots(n: int, bars: int = 182):
+    for seed in range(n):
+        rng = np.random.default_rng(seed)
+        closes = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+        volumes = rng.integers(50_000, 500_000, bars).astype(float)
+        yield build_technical_data(pd.DataFrame({"close": closes, "volume": volumes}), "SPY")
+
+
+def run(samples: int):
+    count, label = token_counter()
+    data = list(snapshots(samples))
+    print(f"{samples} snapshots, tokens: {label}\n")
+    print(f"{'version':<10}{'prefix tok':>12}{'call tok':>10}{'total tok':>11}{'chars':>8}{'render':>11}")
+    for name, version in PROMPTS.items():
+        prefix = (version.system or "") + (json.dumps(version.response_format) if version.response_format else "")
+        prompts = [version.render(t, "SPY", 1) for t in data]
+        start = time.perf_counter()
+        for t in data:
+            version.render(t, "SPY", 1)
+        render_us = (time.perf_counter() - start) / len(data) * 1e6
+        per_call = statistics.mean(count(p) for p in prompts)
+        print(f"{name:<10}{count(prefix) if prefix else 0:>12}{per_call:>10.0f}{count(prefix) + per_call:>11.0f}"
+              f"{statistics.mean(len(p) for p in prompts) + len(prefix):>8.0f}{render_us:>9.1f}us")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        TradeDecision.parse(SAMPLE_ANSWER, 100.0)
+    print(f"\nTradeDecision.parse: {(time.perf_counter() - start) / 10_000 * 1e6:.1f}us per answer")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens per version")
+    parser.add_argument("--samples", type=int, default=100)
+    args = parser.parse_args()
+    run(args.samples)
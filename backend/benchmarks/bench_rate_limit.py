@@ -0,0 +1,107 @@
+# Upstream rate limit benchmark
+# Dashboard readers saturate a mock broker that enforces a per-minute request budget the way
+# Alpaca does (429 plus X-RateLimit-Reset once the window is spent) while one thread places an
+# order every --order-every seconds. Compares:
+#
+#   sdk        no client-side budget; the SDK's own loop sleeps 3s after each 429, up to 3 times
+#   limited    app.ratelimit at the server's budget: readers queue client-side, orders jump them
+#
+#   cd backend && python -m benchmarks.bench_rate_limit --budget 300 --readers 16 --seconds 20
+
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+
+from app import ratelimit
+from app.clients import registry
+from benchmarks.mock_broker import MockBroker
+
+ORDER = {"symbol": "SPY", "qty": 1, "side": "buy", "type": "market", "time_in_force": "day"}
+
+
+class BudgetBroker(MockBroker):
+    """Mock broker answering 429 once `budget` requests were served in the last `period` seconds"""
+
+    def __init__(self, budget: int, period: float = 60.0, **kwargs):
+        super().__init__(**kwargs)
+        self.budget = budget
+        self.period = period
+        self.served = deque()
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def fault(self, method, path):
+        with self._lock:
+            now = time.time()
+            while self.served and now - self.served[0] >= self.period:
+                self.served.popleft()
+            if len(self.served) < self.budget:
+                self.served.append(now)
+                return None
+            self.throttled += 1
+            reset = self.served[0] + self.period
+        return 429, {"code": 42910000, "message": "rate limit exceeded"}, {"X-RateLimit-Reset": f"{reset:.3f}"}
+
+
+def run_mode(mode: str, budget: int, readers: int, seconds: float, order_every: float):
+    with BudgetBroker(budget) as broker:
+        broker.install()
+        rate = 1e9 if mode == "sdk" else budget
+        ratelimit.limiter.upstreams["trading"] = ratelimit.Upstream("trading", rate, retries=0 if mode == "sdk" else 4)
+        client = registry.trading()
+        if mode == "sdk":
+            client._retry = 3
+        stop = time.monotonic() + seconds
+        reads, read_errors, orders, order_errors = [], [0], [], [0]
+
+        def reader():
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                try:
+                    client.get_account()
+                    reads.append(time.perf_counter() - start)
+                except Exception:
+                    read_errors[0] += 1
+
+        def trader():
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                try:
+                    client.post("/orders", ORDER)
+                    orders.append(time.perf_counter() - start)
+                except Exception:
+                    order_errors[0] += 1
+                time.sleep(max(order_every - (time.perf_counter() - start), 0))
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=trader)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.reset()
+
+    def ms(values, q):
+        return np.percentile(values, q) * 1000 if values else float("nan")
+
+    print(f"{mode:<9}{len(reads):>7}{read_errors[0]:>8}{ms(reads, 50):>10.0f}{ms(reads, 99):>10.0f}"
+          f"{len(orders):>8}{order_errors[0]:>8}{ms(orders, 50):>10.0f}{ms(orders, 99):>10.0f}{broker.throttled:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Client-side rate limiting against a budgeted mock broker")
+    parser.add_argument("--budget", type=int, default=300, help="server budget, requests per minute")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--order-every", type=float, default=0.5)
+    args = parser.parse_args()
+    print(f"{'mode':<9}{'reads':>7}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'orders':>8}{'failed':>8}{'p50 ms':>10}{'p99 ms':>10}{'429s':>7}")
+    for mode in ("sdk", "limited"):
+        run_mode(mode, args.budget, args.readers, args.seconds, args.order_every)
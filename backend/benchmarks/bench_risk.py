@@ -0,0 +1,87 @@
+# Portfolio sizing benchmark
+# Time to size a cycle's candidate trades with app.risk: the whole set in one PortfolioRisk
+# pass versus one pass per symbol (what run_bot does, which also can't see the other
+# candidates' correlation or their share of the sector and gross limits). Bars are synthetic
+# random walks with a common market factor, in a temporary bar store; the account and held
+# positions are passed in, so no broker is involved.
+#
+#   cd backend && python -m benchmarks.bench_risk --sizes 10 100 500 --held 50
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+
+from app.bar_store import BarStore
+from app.bars import BarArray
+from app.risk import PortfolioRisk, RISK_LOOKBACK_BARS
+
+ACCOUNT = {"equity": "1000000", "buying_power": "2000000"}
+
+
+def build_store(symbols, bars: int, seed: int = 0):
+    """Bar store of factor-driven random walks, so candidates are correlated"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.002, bars)
+    start = int((datetime.now(timezone.utc) - timedelta(minutes=15 * bars)).timestamp()) // 900 * 900
+    store = BarStore(tempfile.mkdtemp(prefix="bench-risk-"))
+    for symbol in symbols:
+        beta = rng.uniform(0.5, 1.5)
+        closes = 100 * np.exp(np.cumsum(beta * market + rng.normal(0, 0.003, bars)))
+        store.append(symbol, BarArray.from_columns(symbol, {
+            "timestamp": start + 900 * np.arange(bars), "open": closes, "high": closes * 1.001,
+            "low": closes * 0.999, "close": closes, "volume": np.full(bars, 10_000),
+            "trade_count": np.full(bars, 100), "vwap": closes,
+        }).records())
+    return store
+
+
+def candidates(symbols, store):
+    plans = []
+    for symbol in symbols:
+        price = float(store.columns(symbol)["close"][-1])
+        plans.append((symbol, {"decision": "BUY", "side": "buy", "stop_loss": price * 0.99,
+                               "take_profit": price * 1.02, "confidence": 0.6,
+                               "technical_context": {"entry_price": price}}))
+    return plans
+
+
+def best_of(fn, repeats: int = 5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(sizes, held: int, bars: int):
+    names = [f"S{i:03d}" for i in range(max(sizes) + held)]
+    store = build_store(names, bars)
+    positions = [{"symbol": s, "market_value": "5000"} for s in names[max(sizes):]]
+    risk = PortfolioRisk(store=store, sectors={s: f"sector{i % 11}" for i, s in enumerate(names)})
+    print(f"{held} held positions, {RISK_LOOKBACK_BARS}-bar returns\n")
+    print(f"{'candidates':>10}{'batch':>12}{'per symbol':>14}{'speedup':>9}{'batch shares':>14}{'per-symbol shares':>19}")
+    for n in sizes:
+        plans = candidates(names[:n], store)
+        batch = best_of(lambda: risk.size_batch(plans, ACCOUNT, positions))
+        single = best_of(lambda: [risk.size_batch([p], ACCOUNT, positions) for p in plans], 1)
+        batch_qty = sum(d.get("qty", 0) for d in risk.size_batch(plans, ACCOUNT, positions))
+        single_qty = sum(risk.size_batch([p], ACCOUNT, positions)[0].get("qty", 0) for p in plans)
+        print(f"{n:>10}{batch * 1e3:>10.2f}ms{single * 1e3:>12.1f}ms{single / batch:>8.1f}x"
+              f"{batch_qty:>14}{single_qty:>19}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portfolio sizing, batched vs per symbol")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--held", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=400)
+    args = parser.parse_args()
+    run(args.sizes, args.held, args.bars)
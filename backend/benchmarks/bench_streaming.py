@@ -0,0 +1,62 @@
+# Streaming ingestion benchmark
+# Replays synthetic trades through a local websocket server into app.streaming.MarketStream,
+# drops the connection part way through and lets the stream backfill the gap from the mock
+# broker. Reports tick throughput and checks the emitted 15-minute bars are continuous.
+#
+#   cd backend && python -m benchmarks.bench_streaming --symbols 20 --minutes 480
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.bar_store import BarStore
+from app.streaming import MarketStream
+from benchmarks.mock_broker import MockBroker
+from benchmarks.replay_server import ReplayServer, synthetic_ticks
+
+
+async def run(symbols, minutes, drop_after, skip):
+    now = datetime.now(timezone.utc)
+    start = (now - timedelta(minutes=minutes)).replace(second=0, microsecond=0)
+    ticks = synthetic_ticks(symbols, start, minutes)
+    server = await ReplayServer(ticks, drop_after=drop_after, skip_on_reconnect=skip).start()
+
+    store = BarStore(tempfile.mkdtemp())
+    stream = MarketStream(symbols, url=server.url, store=store)
+    bars = {symbol: [] for symbol in symbols}
+    stream.on_bar(lambda bar: bars[bar["symbol"]].append(bar["timestamp"]))
+
+    began = time.perf_counter()
+    task = asyncio.ensure_future(stream.run())
+    await asyncio.wait_for(server.finished.wait(), 120)
+    elapsed = time.perf_counter() - began
+    stream.stop()
+    await task
+    await server.stop()
+    return len(ticks), elapsed, bars, stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Websocket replay ingestion benchmark")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--minutes", type=int, default=480)
+    parser.add_argument("--drop-after", type=int, default=5000, help="ticks before the first disconnect")
+    parser.add_argument("--skip", type=int, default=2000, help="ticks lost while disconnected")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    with MockBroker() as broker:
+        broker.install()
+        ticks, elapsed, bars, stream = asyncio.run(run(symbols, args.minutes, args.drop_after, args.skip))
+
+    gaps = 0
+    for stamps in bars.values():
+        gaps += sum(1 for a, b in zip(stamps, stamps[1:]) if (b - a).total_seconds() != 15 * 60)
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/s), {stream.connects} connections")
+    print(f"{sum(len(b) for b in bars.values())} bars emitted, {gaps} gaps between consecutive bars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Multi-timeframe resampling benchmark
+# Costs of app.timeframes on synthetic 1-minute bars: the initial roll-up of a week of history,
+# the incremental update per new minute (cascade through the in-memory open bars) against
+# re-aggregating the whole history for every timeframe, and reads of several timeframes. Then
+# a sync through the mock broker, counting bar requests for all four timeframes.
+#
+#   cd backend && python -m benchmarks.bench_timeframes --symbols 20 --days 7 --minutes 60
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+
+from alpaca.data.models import BarSet
+
+from app.bars import BarArray
+from app.timeframes import TIMEFRAMES, TimeframeStore, aggregate
+from benchmarks.mock_broker import MockBroker, synthetic_bars
+
+END = datetime(2024, 6, 3, 20, 0, tzinfo=timezone.utc)
+
+
+def minute_bars(symbol: str, start: datetime, end: datetime) -> BarArray:
+    return BarArray.from_bars(BarSet({symbol: synthetic_bars(symbol, start, end, minutes=1)})[symbol], symbol)
+
+
+def columns(bars: BarArray, i: int = None, j: int = None):
+    return {c: bars[c][i:j] for c in ("timestamp", "open", "high", "low", "close", "volume", "trade_count", "vwap")}
+
+
+def run(symbols: int, days: int, minutes: int):
+    names = [f"S{i:03d}" for i in range(symbols)]
+    history = {s: minute_bars(s, END - timedelta(days=days), END + timedelta(minutes=minutes)) for s in names}
+    split = {s: int((history[s]["timestamp"] < END.timestamp()).sum()) for s in names}
+    store = TimeframeStore(tempfile.mkdtemp(prefix="bench-tf-"))
+    for s in names:
+        store.base.append_columns(s, columns(history[s], None, split[s]))
+
+    start = time.perf_counter()
+    store.update(names)
+    build = time.perf_counter() - start
+    stored = {m: store.stores[m].count(names[0]) for m in TIMEFRAMES}
+    print(f"{symbols} symbols x {split[names[0]]} 1-minute bars; initial roll-up {build * 1e3:.0f}ms "
+          f"({build / symbols * 1e3:.1f}ms/symbol), bars per symbol {stored}")
+
+    incremental = 0.0
+    for k in range(minutes):
+        for s in names:
+            store.base.append_columns(s, columns(history[s], split[s] + k, split[s] + k + 1))
+        start = time.perf_counter()
+        store.update(names)
+        incremental += time.perf_counter() - start
+    per_minute = incremental / minutes / symbols
+
+    data = store.base.columns(names[0])
+    start = time.perf_counter()
+    for _ in range(20):
+        for m in TIMEFRAMES:
+            aggregate(data, m)
+    full = (time.perf_counter() - start) / 20
+    print(f"per new minute and symbol:  incremental {per_minute * 1e6:8.0f}us   "
+          f"re-aggregate all history {full * 1e6:8.0f}us  ({len(data['timestamp'])} bars)")
+
+    start = time.perf_counter()
+    for s in names:
+        store.multi(s, (15, 60, 1440))
+    closed = (time.perf_counter() - start) / symbols
+    start = time.perf_counter()
+    for s in names:
+        store.multi(s, (15, 60, 1440), partial=True)
+    partial = (time.perf_counter() - start) / symbols
+    print(f"read 15m/1h/1d per symbol:  closed {closed * 1e6:8.0f}us   with open bars {partial * 1e6:8.0f}us")
+
+    with MockBroker() as broker:
+        broker.install()
+        synced = TimeframeStore(tempfile.mkdtemp(prefix="bench-tf-sync-"))
+        start = time.perf_counter()
+        synced.sync(names, end=END, lookback=timedelta(days=days))
+        first = time.perf_counter() - start
+        requests = broker.requests
+        start = time.perf_counter()
+        synced.sync(names, end=END + timedelta(minutes=15))
+        delta = time.perf_counter() - start
+        print(f"mock sync, all {len(TIMEFRAMES) + 1} timeframes: first {first:.2f}s ({requests} bar requests), "
+              f"15 minutes later {delta * 1e3:.0f}ms ({broker.requests - requests} bar requests)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental multi-timeframe resampling")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--minutes", type=int, default=60, help="new 1-minute bars fed one at a time")
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.minutes)
@@ -0,0 +1,229 @@
+# Local mock Alpaca broker
+# Serves the subset of the trading and market data REST API used by app/alpaca_client.py
+# so benchmarks can run offline. Point the shared clients at it with ALPACA_TRADING_URL /
+# ALPACA_DATA_URL (see MockBroker.install()).
+
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+TIMEFRAME_MINUTES = {"Min": 1, "Hour": 60, "Day": 1440}
+
+
+def _iso(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_time(value: str) -> datetime:
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _timeframe_minutes(value: str) -> int:
+    for unit, minutes in TIMEFRAME_MINUTES.items():
+        if value.endswith(unit):
+            return int(value[:-len(unit)] or 1) * minutes
+    raise ValueError(f"Unsupported timeframe: {value}")
+
+
+def synthetic_bars(symbol: str, start: datetime, end: datetime, minutes: int = 15):
+    """Deterministic random-walk bars for `symbol` on a fixed grid between start and end"""
+    step = minutes * 60
+    first = int(start.timestamp()) // step * step
+    if first < start.timestamp():
+        first += step
+    stamps = np.arange(first, int(end.timestamp()), step, dtype=np.int64)
+    if len(stamps) == 0:
+        return []
+
+    # Seed from the symbol and grid position so overlapping requests return identical bars
+    seed = zlib.crc32(symbol.encode())
+    index = stamps // step
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0, 0.002, 4096)
+    base = 100 + seed % 400
+    closes = base * np.exp(np.cumsum(drift)[index % 4096] + np.sin(index / 50.0) * 0.05)
+    opens = closes * (1 + np.sin(index * 1.7) * 0.001)
+    highs = np.maximum(opens, closes) * (1 + np.abs(np.cos(index * 0.3)) * 0.002)
+    lows = np.minimum(opens, closes) * (1 - np.abs(np.sin(index * 0.7)) * 0.002)
+    volumes = (1000 + (index * 7919 + seed) % 5000) * minutes
+
+    return [
+        {
+            "t": _iso(datetime.fromtimestamp(int(t), tz=timezone.utc)),
+            "o": round(float(o), 4), "h": round(float(h), 4),
+            "l": round(float(l), 4), "c": round(float(c), 4),
+            "v": int(v), "n": int(v // 10),
+            "vw": round(float((o + h + l + c) / 4), 4),
+        }
+        for t, o, h, l, c, v in zip(stamps, opens, highs, lows, closes, volumes)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, the body waits out a ~40ms delayed ACK
+    disable_nagle_algorithm = True
+    broker = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _dispatch(self, method: str):
+        broker = self.broker
+        url = urlparse(self.path)
+        body = self._body() if method in ("POST", "PATCH") else None
+        broker.requests += 1
+        if broker.latency:
+            time.sleep(broker.latency)
+        fault = broker.fault(method, url.path)
+        if fault is not None:
+            return self._send(*fault)
+        status, payload = broker.route(method, url.path, parse_qs(url.query), body)
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class MockBroker:
+    """Threaded in-process HTTP server emulating the Alpaca REST endpoints"""
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self.orders = {}
+        self.positions = []
+        self.cash = 100000.0
+        handler = type("Handler", (_Handler,), {"broker": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def install(self):
+        """Point app.clients at this server with dummy credentials"""
+        from app.clients import registry
+
+        os.environ.setdefault("APCA-API-KEY-ID", "mock-key")
+        os.environ.setdefault("APCA-API-SECRET-KEY", "mock-secret")
+        os.environ["ALPACA_TRADING_URL"] = self.url
+        os.environ["ALPACA_DATA_URL"] = self.url
+        registry.reset()
+        return self
+
+    def fault(self, method: str, path: str):
+        """Hook for injecting error responses; returns (status, payload[, headers]) or None"""
+        return None
+
+    # Routes
+    def route(self, method, path, query, body):
+        if path == "/v2/account" and method == "GET":
+            return 200, self.account()
+        if path == "/v2/positions" and method == "GET":
+            return 200, self.positions
+        if path == "/v2/orders" and method == "GET":
+            return 200, [o for o in self.orders.values() if o["status"] == "new"]
+        if path == "/v2/orders" and method == "POST":
+            order = self.new_order(body)
+            return 200, order
+        if path.startswith("/v2/orders/"):
+            order = self.orders.get(path.rsplit("/", 1)[-1])
+            if order is None:
+                return 404, {"code": 40410000, "message": "order not found"}
+            if method == "DELETE":
+                if order["status"] != "new":
+                    return 422, {"code": 42210000, "message": f"order is already {order['status']}"}
+                order["status"] = "canceled"
+                order["canceled_at"] = _iso(datetime.now(timezone.utc))
+                return 204, None
+            return 200, order
+        if path == "/v2/stocks/bars" and method == "GET":
+            return 200, self.bars(query)
+        return 404, {"code": 40400000, "message": f"no mock route for {method} {path}"}
+
+    def account(self):
+        return {
+            "id": str(uuid.uuid4()), "account_number": "MOCK", "status": "ACTIVE",
+            "crypto_status": "ACTIVE", "currency": "USD",
+            "buying_power": str(self.cash * 2), "cash": str(self.cash),
+            "portfolio_value": str(self.cash), "equity": str(self.cash),
+            "last_equity": str(self.cash), "pattern_day_trader": False,
+            "trading_blocked": False, "transfers_blocked": False, "account_blocked": False,
+            "created_at": "2024-01-01T00:00:00Z", "trade_suspended_by_user": False,
+            "multiplier": "2", "shorting_enabled": False, "long_market_value": "0",
+            "short_market_value": "0", "initial_margin": "0", "maintenance_margin": "0",
+            "last_maintenance_margin": "0", "sma": "0", "daytrade_count": 0,
+        }
+
+    def new_order(self, body):
+        now = _iso(datetime.now(timezone.utc))
+        order = {
+            "id": str(uuid.uuid4()), "client_order_id": body.get("client_order_id") or str(uuid.uuid4()),
+            "created_at": now, "updated_at": now, "submitted_at": now,
+            "symbol": body.get("symbol"), "asset_class": "us_equity",
+            "qty": str(body.get("qty")), "filled_qty": "0",
+            "order_class": body.get("order_class") or "simple",
+            "order_type": body.get("type"), "type": body.get("type"),
+            "side": body.get("side"), "time_in_force": body.get("time_in_force"),
+            "limit_price": body.get("limit_price"), "stop_price": body.get("stop_price"),
+            "status": "new", "extended_hours": False, "legs": None,
+        }
+        self.orders[order["id"]] = order
+        return order
+
+    def bars(self, query):
+        symbols = query["symbols"][0].split(",")
+        minutes = _timeframe_minutes(query.get("timeframe", ["15Min"])[0])
+        end = _parse_time(query["end"][0]) if "end" in query else datetime.now(timezone.utc)
+        start = _parse_time(query["start"][0]) if "start" in query else end - timedelta(days=1)
+        return {
+            "bars": {symbol: synthetic_bars(symbol, start, end, minutes) for symbol in symbols},
+            "next_page_token": None,
+        }
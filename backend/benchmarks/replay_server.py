@@ -0,0 +1,92 @@
+# Local replay websocket server
+# Speaks the Alpaca v2 market data stream protocol (connect / auth / subscribe, JSON frames)
+# and feeds recorded ticks to app.streaming.MarketStream. Ticks come from a JSONL file
+# written with MarketStream(record_path=...) or from synthetic_ticks().
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import websockets
+
+
+def load_ticks(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_ticks(symbols, start: datetime, minutes: int, per_minute: int = 4, seed: int = 0):
+    """Random-walk trade messages for `minutes` minutes from `start`, in time order"""
+    rng = np.random.default_rng(seed)
+    prices = {symbol: 100.0 + 50 * i for i, symbol in enumerate(symbols)}
+    base = start.timestamp()
+    ticks = []
+    for n in range(minutes * per_minute):
+        ts = base + n * 60 / per_minute
+        stamp = datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        for symbol in symbols:
+            prices[symbol] *= 1 + rng.normal(0, 0.0005)
+            ticks.append({"T": "t", "S": symbol, "p": round(prices[symbol], 4),
+                          "s": int(rng.integers(1, 500)), "t": stamp})
+    return ticks
+
+
+class ReplayServer:
+    """Replays ticks to each connection; can drop the first connection to simulate a gap"""
+
+    def __init__(self, ticks, batch: int = 100, delay: float = 0.0, drop_after: int = None,
+                 skip_on_reconnect: int = 0):
+        self.ticks = ticks
+        self.batch = batch
+        self.delay = delay
+        self.drop_after = drop_after
+        self.skip_on_reconnect = skip_on_reconnect
+        self.position = 0
+        self.connections = 0
+        self.sent = 0
+        self.finished = asyncio.Event()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        port = self._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handler(self, ws, path=None):
+        self.connections += 1
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        json.loads(await ws.recv())  # auth; any key is accepted
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+        subscription = json.loads(await ws.recv())
+        symbols = set(subscription.get("trades", [])) | set(subscription.get("bars", []))
+        await ws.send(json.dumps([{"T": "subscription", **{k: v for k, v in subscription.items() if k != "action"}}]))
+
+        if self.connections > 1:
+            # Ticks published while the client was away never reach it
+            self.position += self.skip_on_reconnect
+
+        sent_here = 0
+        while self.position < len(self.ticks):
+            if self.connections == 1 and self.drop_after is not None and sent_here >= self.drop_after:
+                await ws.close()
+                return
+            chunk = self.ticks[self.position:self.position + self.batch]
+            self.position += len(chunk)
+            frame = [tick for tick in chunk if tick.get("S") in symbols]
+            if frame:
+                await ws.send(json.dumps(frame))
+            sent_here += len(chunk)
+            self.sent += len(chunk)
+            if self.delay:
+                await asyncio.sleep(self.delay)
+        self.finished.set()
+        await ws.wait_closed()
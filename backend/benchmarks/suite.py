@@ -0,0 +1,309 @@
+# Benchmark suite with regression tracking
+# Times the hot paths on deterministic synthetic bars with the Alpaca API served by the local
+# mock broker and the OpenAI call replaced by a canned answer, so runs are reproducible and
+# offline. Every run is appended to a JSONL results file tagged with the git commit; each case
+# is compared with the latest earlier run from a different commit and flagged when its best
+# (minimum) time got slower than the threshold; the minimum is far less noisy than the median.
+#
+#   cd backend && python -m benchmarks.suite                    # run everything, compare, store
+#   cd backend && python -m benchmarks.suite -k indicators      # only cases matching "indicators"
+#   cd backend && python -m benchmarks.suite --fail-on-regression --threshold 0.4
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+# Benchmarks never write to the real journal or bar store
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
+os.environ.setdefault("BAR_STORE_DIR", tempfile.mkdtemp(prefix="bench-bars-"))
+# The mock broker has no request budget; time the code, not app.ratelimit's waits
+for _upstream in ("ALPACA_TRADING_RATE", "ALPACA_DATA_RATE", "OPENAI_RATE"):
+    os.environ.setdefault(_upstream, "1000000")
+
+from benchmarks.mock_broker import MockBroker, synthetic_bars
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "benchmarks.jsonl")
+DEFAULT_THRESHOLD = 0.25
+# Each repeat runs the case for at least this long, timeit-style
+MIN_REPEAT_SECONDS = 0.05
+LLM_ANSWER = json.dumps({
+    "decision": "BUY", "side": "buy", "confidence": 0.9, "order_type": "market",
+    "stop_loss": 1.0, "take_profit": 10000.0, "reasoning": "benchmark",
+})
+
+CASES = {}
+
+
+def case(name: str):
+    """Register setup() -> fn; the suite times fn() calls"""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _window(n: int, minutes: int = 15):
+    end = datetime(2024, 6, 3, 20, 0, tzinfo=timezone.utc)
+    return end - timedelta(minutes=minutes * n), end
+
+
+def _bars(symbol: str, n: int):
+    return synthetic_bars(symbol, *_window(n))
+
+
+def _frame(symbol: str, n: int):
+    """DataFrame shaped like get_15min_data output, through the bar store"""
+    from alpaca.data.models import BarSet
+    from app.bar_store import BarStore
+
+    store = BarStore(tempfile.mkdtemp())
+    store.append(symbol, BarSet({symbol: _bars(symbol, n)})[symbol])
+    return store.frame(symbol)
+
+
+def _closes(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 0.5, n))
+
+
+def _stub_llm():
+    """Canned LLM answer, no gate and no cached decisions, so every call does the full work"""
+    from app import strategy
+
+    strategy.ask_llm = lambda prompt: LLM_ANSWER
+    strategy.signal_gate.enabled = False
+    return strategy
+
+
+# Data ingest
+for _n in (182, 2000):
+    @case(f"ingest.bars_to_frame[{_n}]")
+    def _bars_to_frame_case(n=_n):
+        from alpaca.data.models import BarSet
+        from app.bars import BarArray
+
+        barset = BarSet({"SPY": _bars("SPY", n)})
+        return lambda: BarArray.from_bars(barset["SPY"], "SPY").to_frame()
+
+
+@case("ingest.get_15min_data")
+def _get_15min_data_case():
+    from app.alpaca_client import get_15min_data
+    return lambda: get_15min_data("SPY")
+
+
+# Indicators across series lengths and window sizes
+for _n in (182, 5000):
+    for _period in (20, 50, 200):
+        @case(f"indicators.calculate_sma[n={_n},period={_period}]")
+        def _sma_case(n=_n, period=_period):
+            from app.strategy import calculate_sma
+            closes = _closes(n)
+            return lambda: calculate_sma(closes, period)
+
+    for _period in (9, 14):
+        @case(f"indicators.calculate_rsi[n={_n},period={_period}]")
+        def _rsi_case(n=_n, period=_period):
+            from app.strategy import calculate_rsi
+            closes = _closes(n)
+            return lambda: calculate_rsi(closes, period)
+
+    @case(f"indicators.calculate_macd[n={_n}]")
+    def _macd_case(n=_n):
+        from app.strategy import calculate_macd
+        closes = _closes(n)
+        return lambda: calculate_macd(closes)
+
+
+# Strategy without network
+@case("strategy.build_technical_data[182]")
+def _technical_data_case():
+    from app.strategy import build_technical_data
+
+    df = _frame("SPY", 182)
+    return lambda: build_technical_data(df, "SPY")
+
+
+@case("strategy.create_prompt")
+def _prompt_case():
+    from app.strategy import build_technical_data, create_prompt
+
+    technical_data = build_technical_data(_frame("SPY", 182), "SPY")
+    return lambda: create_prompt(technical_data, "SPY", 1)
+
+
+@case("strategy.llm_strategy[182]")
+def _llm_strategy_case():
+    strategy = _stub_llm()
+    df = _frame("SPY", 182)
+
+    def run():
+        strategy.decision_cache.invalidate()
+        return strategy.llm_strategy(df, "SPY", 1)
+    return run
+
+
+# End to end: bar store sync against the mock broker, strategy, confidence gate, order stub
+@case("bot.run_bot")
+def _run_bot_case():
+    from app import bot
+
+    strategy = _stub_llm()
+
+    def run():
+        strategy.decision_cache.invalidate()
+        return bot.run_bot("SPY")
+    return run
+
+
+# FastAPI throughput through the ASGI app (no sockets), 100 concurrent requests per call
+for _route in ("/account", "/positions", "/market-data/SPY"):
+    @case(f"api.throughput[{_route}]x100")
+    def _api_case(route=_route):
+        import httpx
+        from app.main import app
+
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+        async def burst():
+            responses = await asyncio.gather(*(client.get(route) for _ in range(100)))
+            assert all(r.status_code == 200 for r in responses), responses[0].text
+
+        return lambda: loop.run_until_complete(burst())
+
+
+# Cold start: import of each entry point in a fresh interpreter (includes interpreter startup)
+for _module in ("app.main", "app.bot", "app.scheduler"):
+    @case(f"startup.import[{_module}]")
+    def _import_case(module=_module):
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        command = [sys.executable, "-c", f"import {module}"]
+        return lambda: subprocess.run(command, cwd=backend, check=True)
+
+
+def measure(fn, repeats: int):
+    """Median / min seconds per call over `repeats` repeats of an auto-sized loop"""
+    fn()  # warm caches, imports and lazy clients
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_REPEAT_SECONDS or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(MIN_REPEAT_SECONDS / elapsed) + 1))
+
+    timings = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        timings.append((time.perf_counter() - start) / loops)
+    return {"median": statistics.median(timings), "min": min(timings), "loops": loops, "repeats": repeats}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_runs(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_for(runs, commit: str, baseline: str = None):
+    """Latest stored run for `baseline`, or the latest run from a different commit"""
+    for run in reversed(runs):
+        if baseline is not None:
+            if run["commit"].startswith(baseline):
+                return run
+        elif run["commit"] != commit:
+            return run
+    return None
+
+
+def compare(results, baseline, threshold: float):
+    """{case: ratio} for cases slower than baseline by more than `threshold`"""
+    regressions = {}
+    for name, result in results.items():
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous and result["min"] > previous["min"] * (1 + threshold):
+            regressions[name] = result["min"] / previous["min"]
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with regression tracking")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSONL file runs are appended to")
+    parser.add_argument("--baseline", help="commit to compare with (default: latest other commit)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, 0.2 = 20%%")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.pattern or args.pattern in name]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    commit = git_commit()
+    runs = load_runs(args.results)
+    baseline = baseline_for(runs, commit, args.baseline)
+    previous = (baseline or {}).get("results", {})
+
+    results = {}
+    with MockBroker() as broker:
+        broker.install()
+        print(f"{'case':<48}{'median':>12}{'min':>12}{'vs ' + (baseline or {}).get('commit', '-'):>16}")
+        for name in names:
+            result = measure(CASES[name](), args.repeats)
+            results[name] = result
+            change = ""
+            if name in previous:
+                change = f"{(result['min'] / previous[name]['min'] - 1) * 100:+.1f}%"
+            print(f"{name:<48}{result['median'] * 1e6:>10.1f}us{result['min'] * 1e6:>10.1f}us{change:>16}")
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions.items():
+        print(f"REGRESSION {name}: {ratio:.2f}x slower than {baseline['commit']}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a") as f:
+            f.write(json.dumps({
+                "commit": commit,
+                "ts": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.node(),
+                "results": results,
+            }) + "\n")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
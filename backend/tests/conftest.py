@@ -0,0 +1,6 @@
+# Shared test setup: the app reads these at import time
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+# Keep decisions made by the tests out of the on-disk journal
+os.environ.setdefault("JOURNAL_URL", "sqlite://")
@@ -0,0 +1,119 @@
+# Tests for the event-driven backtester (app.backtest)
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest import Backtester, BacktestResult, RecordedLLM, RecordingLLM
+from app.indicators import IncrementalIndicators
+from app.signal_gate import SignalGate
+from app.strategy import technical_data_from_snapshot
+
+
+class ScriptedLLM:
+    """Answers with `answers` in turn, then HOLD"""
+
+    uses_prompt = False
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    def respond(self, prompt, technical_data):
+        return json.dumps(self.answers.pop(0)) if self.answers else "HOLD"
+
+
+def frame(rows):
+    index = pd.date_range("2024-06-03 13:30", periods=len(rows), freq="15min", tz="UTC")
+    return pd.DataFrame(rows, columns=["open", "high", "low", "close"], index=index).assign(volume=1000.0)
+
+
+def plan(stop, target, confidence=0.9):
+    return {"side": "buy", "order_type": "market", "stop_loss": stop, "take_profit": target,
+            "confidence": confidence, "qty": 10}
+
+
+@pytest.mark.parametrize("side,bar,expected", [
+    # long, stop 95 / target 110
+    ("buy", (94, 96, 90, 95), (94, "stop_loss")),       # gaps through the stop: fills at the open
+    ("buy", (112, 115, 111, 113), (112, "take_profit")),
+    ("buy", (100, 111, 94, 100), (95, "stop_loss")),    # both legs touched: assume the stop
+    ("buy", (100, 111, 99, 105), (110, "take_profit")),
+    ("buy", (100, 109, 96, 105), (None, None)),
+    # short, stop 105 / target 90
+    ("sell", (106, 108, 104, 107), (106, "stop_loss")),
+    ("sell", (88, 89, 85, 86), (88, "take_profit")),
+    ("sell", (100, 106, 89, 95), (105, "stop_loss")),
+    ("sell", (100, 101, 89, 95), (90, "take_profit")),
+])
+def test_check_exit_gaps_ties_and_short_side(side, bar, expected):
+    position = {"side": side, "stop_loss": 95 if side == "buy" else 105, "take_profit": 110 if side == "buy" else 90}
+    open_, high, low, _ = bar
+    assert Backtester._check_exit(position, open_, high, low) == expected
+
+
+def test_entry_fills_at_next_open_with_slippage_against_us():
+    bars = frame([
+        (100, 101, 99, 100),
+        (100, 101, 99, 100),    # decision on this close
+        (101, 102, 100, 101),   # market entry at this open
+        (104, 111, 103, 108),   # target touched
+        (108, 109, 107, 108),
+    ])
+    gate = SignalGate(min_signals=0, enabled=True)
+    backtester = Backtester(llm=ScriptedLLM(plan(95, 110)), min_bars=2, slippage_bps=10, gate=gate)
+    trades, pnl = backtester.run_symbol("SPY", bars)
+
+    assert len(trades) == 1
+    trade = trades[0]
+    assert trade["entry_time"] == bars.index[2] and trade["exit_time"] == bars.index[3]
+    # Buying pays up, selling gets less
+    assert trade["entry_price"] == pytest.approx(101 * 1.001)
+    assert trade["exit_price"] == pytest.approx(110 * 0.999)
+    assert trade["exit_reason"] == "take_profit"
+    assert trade["pnl"] == pytest.approx((110 * 0.999 - 101 * 1.001) * trade["qty"])
+    # Marked to market while open, flat after the exit
+    assert pnl[2] == pytest.approx((101 - 101 * 1.001) * trade["qty"])
+    assert pnl[3] == pnl[4] == pytest.approx(trade["pnl"])
+
+
+def test_backtest_keeps_its_own_gate_stats():
+    from app import strategy
+
+    before = strategy.signal_gate.stats()["total"]["evaluated"]
+    backtester = Backtester(llm=ScriptedLLM(), min_bars=2, gate=SignalGate(min_signals=0, enabled=True))
+    backtester.run({"SPY": frame([(100, 101, 99, 100)] * 6)})
+    assert backtester.gate.stats()["total"]["evaluated"] == 4
+    assert strategy.signal_gate.stats()["total"]["evaluated"] == before
+
+
+def test_summary_profit_factor_and_drawdown():
+    equity = pd.Series([100_000.0, 100_100.0, 100_050.0, 100_080.0])
+    summary = BacktestResult([{"pnl": 100.0}, {"pnl": -50.0}, {"pnl": 30.0}], equity, 100_000.0).summary()
+    assert summary["trades"] == 3 and summary["total_pnl"] == 80.0
+    assert summary["win_rate"] == pytest.approx(2 / 3)
+    assert summary["profit_factor"] == pytest.approx(130 / 50)
+    assert summary["max_drawdown"] == 50.0
+    assert summary["max_drawdown_pct"] == pytest.approx(50 / 100_100 * 100)
+
+    assert BacktestResult([{"pnl": 10.0}], equity, 100_000.0).summary()["profit_factor"] == math.inf
+    empty = BacktestResult([], pd.Series(dtype=np.float64), 100_000.0).summary()
+    assert empty["trades"] == 0 and empty["profit_factor"] == 0.0 and empty["max_drawdown_pct"] == 0.0
+
+
+def test_recorded_llm_replays_recording(tmp_path):
+    engine = IncrementalIndicators()
+    engine.warm(100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 80)))
+    technical_data = technical_data_from_snapshot(engine.snapshot(), "SPY")
+    other = {**technical_data, "rsi_9": technical_data["rsi_9"] + 20}
+    answer = json.dumps(plan(95, 110))
+
+    path = str(tmp_path / "llm.jsonl")
+    asked = []
+    recording = RecordingLLM(path, ask=lambda prompt: asked.append(prompt) or answer)
+    assert recording.respond("prompt", technical_data) == answer and asked == ["prompt"]
+
+    recorded = RecordedLLM(path)
+    assert recorded.respond(None, technical_data) == answer
+    assert recorded.respond(None, other) == "HOLD" and recorded.misses == 1
@@ -0,0 +1,95 @@
+# Tests for the columnar bar store (app.bar_store)
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.bar_store import BarStore
+
+END = datetime(2024, 6, 3, 20, 0, tzinfo=timezone.utc)
+STEP = 15 * 60
+
+
+def bar(ts: datetime, price: float = 100.0):
+    return SimpleNamespace(timestamp=ts, open=price, high=price, low=price, close=price,
+                           volume=1000.0, trade_count=10.0, vwap=price)
+
+
+class FakeData:
+    """get_stock_bars stand-in: 15-minute bars for every symbol not in `quiet`"""
+
+    def __init__(self, quiet=(), delay: float = 0.0):
+        self.quiet = set(quiet)
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_stock_bars(self, request):
+        with self._lock:
+            self.requests.append((tuple(request.symbol_or_symbols), request.start.replace(tzinfo=timezone.utc)))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        data = {}
+        for symbol in request.symbol_or_symbols:
+            if symbol in self.quiet:
+                continue
+            # The SDK request holds naive UTC datetimes; bars open on the 15-minute grid, and
+            # the one still forming at `end` is returned too, as Alpaca does
+            start = request.start.replace(tzinfo=timezone.utc).timestamp()
+            ts, data[symbol] = datetime.fromtimestamp(-(-start // STEP) * STEP, tz=timezone.utc), []
+            while ts < request.end.replace(tzinfo=timezone.utc):
+                data[symbol].append(bar(ts))
+                ts += timedelta(minutes=15)
+        return SimpleNamespace(data=data)
+
+
+def test_sync_downloads_without_holding_the_store_lock(tmp_path):
+    store = BarStore(str(tmp_path))
+    client = FakeData(delay=0.1)
+    threads = [threading.Thread(target=store.sync, args=([symbol], client), kwargs={"end": END})
+               for symbol in ("A", "B", "C")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.peak == 3
+    assert store.requests == 3
+    # 7 days of 15-minute bars; the bar still open at END is left out
+    assert {store.count(s) for s in "ABC"} == {7 * 96}
+
+
+def test_sync_remembers_empty_windows(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.sync(["A", "HALTED"], FakeData(quiet={"HALTED"}), end=END)
+    assert store.count("HALTED") == 0
+
+    # Next bar: the halted symbol shares the active symbol's delta request
+    client = FakeData(quiet={"HALTED"})
+    assert store.sync(["A", "HALTED"], client, end=END + timedelta(minutes=15)) == {"A": 1, "HALTED": 0}
+    assert client.requests == [(("A", "HALTED"), END)]
+    # Nothing has closed since: no request at all
+    store.sync(["A", "HALTED"], client, end=END + timedelta(minutes=20))
+    assert len(client.requests) == 1
+
+
+def test_syncs_between_bar_boundaries_store_every_closed_bar(tmp_path):
+    store = BarStore(str(tmp_path))
+    client = FakeData()
+    first = END + timedelta(minutes=1)
+    store.sync(["A"], client, end=first)
+    # Every 15 minutes, a minute past each boundary: the bar open at the last sync has closed
+    for i in range(1, 6):
+        end = first + timedelta(minutes=15 * i)
+        assert store.sync(["A"], client, end=end) == {"A": 1}
+        stamps = store.columns("A")["timestamp"]
+        assert stamps[-1] == int(end.timestamp()) // STEP * STEP - STEP
+        assert (stamps[1:] - stamps[:-1] == STEP).all()
+    # A sync before the open bar closes asks for nothing
+    requests = len(client.requests)
+    assert store.sync(["A"], client, end=end + timedelta(minutes=13)) == {"A": 0}
+    assert len(client.requests) == requests
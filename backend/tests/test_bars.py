@@ -0,0 +1,105 @@
+# Tests for the compact bar container (app.bars)
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.bars import BarArray
+
+START = datetime(2024, 3, 8, 14, 30, tzinfo=timezone.utc)
+
+
+def sdk_bars(n=5, start=START):
+    """Stand-ins for alpaca Bar objects, 15 minutes apart"""
+    return [
+        SimpleNamespace(timestamp=start + timedelta(minutes=15 * i), open=100.0 + i, high=101.0 + i,
+                        low=99.0 + i, close=100.5 + i, volume=1000.0 * (i + 1),
+                        trade_count=None if i == 0 else 10 * i, vwap=None if i == 1 else 100.2 + i)
+        for i in range(n)
+    ]
+
+
+def test_from_bars_and_from_records_agree():
+    bars = sdk_bars()
+    records = [
+        {"t": b.timestamp.isoformat().replace("+00:00", "Z"), "o": b.open, "h": b.high, "l": b.low,
+         "c": b.close, "v": b.volume, "n": b.trade_count or 0, **({} if b.vwap is None else {"vw": b.vwap})}
+        for b in bars
+    ]
+    from_sdk = BarArray.from_bars(bars, "spy")
+    from_json = BarArray.from_records(records, "SPY")
+
+    assert from_sdk.symbol == "SPY" and len(from_sdk) == 5
+    for column in ("timestamp", "open", "close", "volume", "trade_count", "vwap"):
+        np.testing.assert_array_equal(from_sdk[column], from_json[column])
+    assert from_sdk["timestamp"][0] == int(START.timestamp())
+    assert from_sdk["volume"].dtype == np.int64 and from_sdk["trade_count"][0] == 0
+    assert np.isnan(from_sdk["vwap"][1])
+
+
+def test_append_grows_amortized_and_rejects_stale_bars():
+    bars = BarArray("SPY")
+    assert len(bars) == 0 and bars.capacity == 0
+
+    capacities = set()
+    for bar in sdk_bars(200):
+        assert bars.append(bar)
+        capacities.add(bars.capacity)
+    # Doubling from MIN_CAPACITY: a handful of reallocations for 200 appends
+    assert len(bars) == 200 and sorted(capacities) == [64, 128, 256]
+
+    last = int(bars["timestamp"][-1])
+    assert not bars.append({"timestamp": last, "close": 1.0})
+    assert not bars.append({"timestamp": last - 60, "close": 1.0})
+    assert bars.append({"timestamp": last + 900, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+                        "volume": None, "vwap": None})
+    assert bars["volume"][-1] == 0 and np.isnan(bars["vwap"][-1])
+
+
+def test_extend_skips_bars_already_held():
+    bars = BarArray.from_bars(sdk_bars(5), "SPY")
+    assert bars.extend(sdk_bars(8)) == 3
+    assert len(bars) == 8
+    assert np.all(np.diff(bars["timestamp"]) == 900)
+
+
+def test_views_share_memory():
+    bars = BarArray.from_bars(sdk_bars(10), "SPY")
+    close = bars["close"]
+    assert np.shares_memory(close, bars._data["close"])
+
+    tail = bars.tail(3)
+    assert len(tail) == 3 and np.shares_memory(tail["close"], close)
+    np.testing.assert_array_equal(tail["close"], close[-3:])
+    assert len(bars.tail(50)) == 10
+
+    since = bars.since(int(bars["timestamp"][4]))
+    assert len(since) == 6 and since["timestamp"][0] == bars["timestamp"][4]
+    assert len(bars.since(int(bars["timestamp"][-1]) + 1)) == 0
+
+    # Appending to a view copies it out rather than writing into the parent's buffers
+    tail.append({"timestamp": int(bars["timestamp"][-1]) + 900, "close": 1.0})
+    assert len(bars) == 10 and not np.shares_memory(tail["close"], close)
+
+
+def test_from_columns_wraps_without_copy_and_float32_halves_prices():
+    source = BarArray.from_bars(sdk_bars(4), "SPY")
+    wrapped = BarArray.from_columns("SPY", {c: source[c] for c in source._data})
+    assert np.shares_memory(wrapped["close"], source["close"])
+
+    small = BarArray.from_bars(sdk_bars(4), "SPY", price_dtype=np.float32)
+    assert small["close"].dtype == np.float32
+    assert small.nbytes < source.nbytes
+
+
+def test_to_frame_and_records():
+    bars = BarArray.from_bars(sdk_bars(3), "SPY")
+    frame = bars.to_frame()
+    assert list(frame.columns) == ["open", "high", "low", "close", "volume", "trade_count", "vwap", "symbol"]
+    assert str(frame.index.tz) == "UTC" and frame.index[0] == START
+    assert (frame["symbol"] == "SPY").all()
+
+    records = bars.records()
+    assert records[0]["timestamp"] == START.isoformat()
+    assert records[2]["close"] == 102.5 and type(records[2]["volume"]) is int
+    assert records[0]["symbol"] == "SPY"
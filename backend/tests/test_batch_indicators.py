@@ -0,0 +1,60 @@
+# Tests for the vectorized multi-symbol indicators (app.batch_indicators)
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.batch_indicators import compute_features, ema, feature_dict, rolling_mean
+from app.strategy import calculate_macd, calculate_rsi, calculate_sma
+
+
+def synthetic_closes(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    closes[100:115] = closes[100]  # flat stretch exercises the zero gain/loss RSI case
+    return closes
+
+
+def test_batch_features_match_per_symbol_functions():
+    from app.strategy import (
+        detect_sma_crossover, check_trend_reversal, get_rsi_zone, get_volume_trend
+    )
+
+    rng = np.random.default_rng(1)
+    closes = np.vstack([synthetic_closes(120, seed) for seed in range(8)])
+    volumes = rng.integers(1_000, 10_000, closes.shape).astype(float)
+    features = compute_features(closes, volumes)
+
+    for i in range(closes.shape[0]):
+        row = feature_dict(features[i])
+        sma_20 = calculate_sma(closes[i], 20)
+        sma_50 = calculate_sma(closes[i], 50)
+        rsi_9 = calculate_rsi(closes[i], 9)
+        macd_line, signal_line, _ = calculate_macd(closes[i])
+
+        assert row["sma_20"] == pytest.approx(sma_20.iloc[-1])
+        assert row["sma_50"] == pytest.approx(sma_50.iloc[-1])
+        assert row["rsi_9"] == pytest.approx(rsi_9.iloc[-1], nan_ok=True)
+        assert row["macd"] == pytest.approx(macd_line.iloc[-1])
+        assert row["signal"] == pytest.approx(signal_line.iloc[-1])
+        assert row["crossover_detected"] == detect_sma_crossover(closes[i], sma_20, sma_50)
+        assert row["trend_reversal"] == check_trend_reversal(sma_20, sma_50)
+        assert row["rsi_zone"] == get_rsi_zone(rsi_9.iloc[-1])
+        assert row["volume_trend"] == get_volume_trend(volumes[i][-10:])
+
+
+
+def test_nan_padded_rows_match_pandas_on_their_own_bars():
+    # BarStore.matrix left-pads short histories; a gap mid-series stays a gap
+    closes = np.vstack([synthetic_closes(120, seed) for seed in range(3)])
+    closes[1, :70] = np.nan
+    closes[2, 60] = np.nan
+
+    for i, row in enumerate(closes):
+        series = pd.Series(row)
+        np.testing.assert_allclose(rolling_mean(closes, 20)[i], series.rolling(20).mean(), equal_nan=True)
+        np.testing.assert_allclose(ema(closes, 12)[i], series.ewm(span=12).mean(), equal_nan=True)
+
+    # The padded symbol's features are those of its 50 real bars
+    features = compute_features(closes[1:2], np.full((1, 120), 1000.0))
+    alone = compute_features(closes[1:2, 70:], np.full((1, 50), 1000.0))
+    np.testing.assert_allclose(features, alone)
@@ -0,0 +1,89 @@
+# Tests for batch order submission and cancellation (app.batch_orders)
+import asyncio
+import threading
+import time
+import warnings
+
+import pytest
+
+from app import batch_orders
+from app.batch_orders import cancel_batch, order_call, submit_batch
+
+
+class Rejected(Exception):
+    status_code = 403
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """Fake order functions recording calls and peak parallelism"""
+    calls, lock = [], threading.Lock()
+    active, peak = [0], [0]
+
+    def place(kind):
+        def fn(symbol, *args):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+                calls.append((kind, symbol, args))
+            if symbol == "REJECT":
+                raise Rejected("insufficient buying power")
+            return {"id": f"{kind}-{symbol}", "symbol": symbol}
+        return fn
+
+    for kind in ("market_order", "limit_order", "bracket_order", "cancel_order_direct"):
+        monkeypatch.setattr(batch_orders, kind, place(kind))
+    return {"calls": calls, "peak": peak}
+
+
+def test_order_call_maps_types_and_rejects_bad_items():
+    fn, args = order_call({"type": "limit", "symbol": "SPY", "qty": 1, "side": "buy", "limit_price": 500.0})
+    assert fn is batch_orders.limit_order and args == ("SPY", 1, "buy", 500.0)
+    with pytest.raises(ValueError, match="stop_loss"):
+        order_call({"type": "bracket", "symbol": "SPY", "qty": 1, "side": "buy", "take_profit": 510.0})
+    with pytest.raises(ValueError, match="Unknown"):
+        order_call({"type": "trailing", "symbol": "SPY", "qty": 1, "side": "buy"})
+
+
+def test_submit_batch_gives_each_item_its_own_result(broker):
+    orders = [
+        {"symbol": "SPY", "qty": 1, "side": "buy"},
+        {"type": "bracket", "symbol": "QQQ", "qty": 2, "side": "buy", "stop_loss": 90.0},
+        {"symbol": "REJECT", "qty": 1, "side": "buy"},
+        {"type": "bracket", "symbol": "IWM", "qty": 3, "side": "buy", "stop_loss": 90.0, "take_profit": 110.0},
+        {"symbol": "DIA", "side": "sell"},
+    ] + [{"symbol": f"S{i}", "qty": 1, "side": "buy"} for i in range(6)]
+    results = asyncio.run(submit_batch(orders, concurrency=3))
+
+    assert [r["index"] for r in results] == list(range(len(orders)))
+    assert results[0] == {"index": 0, "ok": True, "result": {"id": "market_order-SPY", "symbol": "SPY"}}
+    # Invalid items never reach the broker
+    assert results[1]["status_code"] == 400 and "stop_loss" in results[1]["error"]
+    assert results[4]["status_code"] == 400 and "qty" in results[4]["error"]
+    assert results[2] == {"index": 2, "ok": False, "error": "insufficient buying power", "status_code": 403}
+    assert results[3]["result"]["id"] == "bracket_order-IWM"
+    assert len(broker["calls"]) == 9 and broker["peak"][0] == 3
+    assert ("bracket_order", "IWM", (3, "buy", 90.0, 110.0, "market", None)) in broker["calls"]
+
+
+def test_cancel_batch_and_size_limit(broker, monkeypatch):
+    results = asyncio.run(cancel_batch(["a", "b"]))
+    assert [(r["order_id"], r["ok"], r["index"]) for r in results] == [("a", True, 0), ("b", True, 1)]
+
+    monkeypatch.setattr(batch_orders, "MAX_BATCH_SIZE", 2)
+    with pytest.raises(ValueError, match="exceeds"):
+        asyncio.run(cancel_batch(["a", "b", "c"]))
+
+
+def test_batch_route_counts_results(broker):
+    from app.routes.api import BatchOrderRequest, place_batch_orders
+
+    request = BatchOrderRequest(orders=[{"symbol": "SPY", "qty": 1, "side": "buy"},
+                                        {"symbol": "REJECT", "qty": 1, "side": "buy"}])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        response = asyncio.run(place_batch_orders(request))
+    assert (response["submitted"], response["failed"]) == (1, 1)
@@ -0,0 +1,60 @@
+# Tests for the single-symbol bot cycle (app.bot)
+import pytest
+
+from app import bot
+
+
+def plan(confidence: float):
+    return {"decision": "BUY", "side": "buy", "order_type": "market", "stop_loss": 98.0,
+            "take_profit": 104.0, "confidence": confidence, "reasoning": "test",
+            "technical_context": {"entry_price": 100.0}}
+
+
+class Sizer:
+    """portfolio_risk stand-in counting size_batch calls (each one reads the broker account)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def size_batch(self, candidates):
+        self.calls += 1
+        return [{**decision, "qty": 7} for _, decision in candidates]
+
+
+@pytest.fixture
+def cycle(monkeypatch):
+    sizer = Sizer()
+    decisions = {}
+    monkeypatch.setattr(bot, "get_recent_bars", lambda symbol, frame: None)
+    monkeypatch.setattr(bot, "llm_strategy", lambda bars, symbol, qty: decisions[symbol])
+    monkeypatch.setattr(bot, "portfolio_risk", sizer)
+    return decisions, sizer
+
+
+def test_trade_levels_and_gate():
+    levels = bot.trade_levels(plan(0.5))
+    assert levels == {"stop_loss": 98.0, "take_profit": 104.0, "entry_price": 100.0, "risk_reward": 2.0}
+    # Break-even for R/R 2 is 1/3
+    assert bot.confidence_gate(plan(0.34)) == (2.0, None)
+    risk_reward, rejection = bot.confidence_gate(plan(0.3), levels=levels)
+    assert risk_reward == 2.0 and rejection["decision"] == "HOLD"
+
+
+def test_run_bot_sizes_only_plans_that_pass_the_gate(cycle, caplog):
+    decisions, sizer = cycle
+    decisions["SPY"] = plan(0.3)
+    result = bot.run_bot("SPY")
+    assert result["decision"] == "HOLD" and "below required threshold" in result["reason"]
+    assert sizer.calls == 0
+
+    decisions["SPY"] = plan(0.6)
+    caplog.set_level("INFO", logger="app.bot")
+    assert bot.run_bot("SPY") == "test"
+    assert sizer.calls == 1
+    assert "Placing BUY order for 7 SPY: stop 98.00, target 104.00, entry 100.0" in caplog.text
+    assert "R/R 2.00" in caplog.text
+
+
+def test_execute_decision_gates_plans_it_is_handed_ungated():
+    assert bot.execute_decision(plan(0.3), "SPY")["decision"] == "HOLD"
+    assert bot.execute_decision(plan(0.6), "SPY") == "test"
@@ -0,0 +1,54 @@
+# Tests for the broker thread-pool layer (app.broker)
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import broker
+
+
+def test_broker_call_runs_off_the_loop_and_limits_concurrency(monkeypatch):
+    monkeypatch.setitem(broker.ROUTE_LIMITS, "test-limit", (2, 5.0))
+    running, peak, lock = [0], [0], threading.Lock()
+    seen = {}
+
+    def call(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return threading.current_thread().name
+
+    async def main():
+        calls = [asyncio.ensure_future(broker.broker_call("test-limit", call, i)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        seen.update(broker.broker_stats()["test-limit"])
+        return await asyncio.gather(*calls)
+
+    names = asyncio.run(main())
+    assert all(name.startswith("broker") for name in names)
+    assert peak[0] == 2
+    assert seen["in_flight"] == 2 and seen["queued"] == 3 and seen["limit"] == 2
+    assert broker.broker_stats()["test-limit"] == {"limit": 2, "timeout": 5.0, "in_flight": 0, "queued": 0}
+
+
+def test_broker_call_timeout_covers_queueing_and_frees_the_slot(monkeypatch):
+    monkeypatch.setitem(broker.ROUTE_LIMITS, "test-timeout", (1, 0.1))
+    release = threading.Event()
+
+    async def main():
+        slow = asyncio.ensure_future(broker.broker_call("test-timeout", release.wait, 2.0, timeout=0.3))
+        await asyncio.sleep(0.01)
+        # Times out waiting behind the slow call, never reaching the pool
+        with pytest.raises(broker.BrokerTimeout):
+            await broker.broker_call("test-timeout", lambda: "queued")
+        with pytest.raises(broker.BrokerTimeout, match="after 0.3s"):
+            await slow
+        release.set()
+        return await broker.broker_call("test-timeout", lambda: "after", timeout=1.0)
+
+    assert asyncio.run(main()) == "after"
+    assert broker.broker_stats()["test-timeout"]["in_flight"] == 0
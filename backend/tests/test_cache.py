@@ -0,0 +1,92 @@
+# Tests for the route response cache (app.cache)
+import asyncio
+
+import pytest
+
+from app.cache import AsyncTTLCache
+
+
+class Broker:
+    """Fetch stand-in returning the current value after a delay, counting calls"""
+
+    def __init__(self, value, delay: float = 0.02):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        value = self.value
+        await asyncio.sleep(self.delay)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = AsyncTTLCache(policies={"orders": (10.0, 0.0)})
+    broker = Broker(["o1"])
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_fetch("orders:open", broker.fetch) for _ in range(5)))
+        return results + [await cache.get_or_fetch("orders:open", broker.fetch)]
+
+    assert asyncio.run(main()) == [["o1"]] * 6
+    stats = cache.stats()["namespaces"]["orders"]
+    assert broker.calls == 1
+    assert (stats["misses"], stats["joins"], stats["hits"]) == (1, 4, 1)
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    cache = AsyncTTLCache(policies={"orders": (10.0, 0.0)})
+    broker = Broker(RuntimeError("broker down"))
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_fetch("orders:open", broker.fetch) for _ in range(3)),
+                                       return_exceptions=True)
+        broker.value = ["o1"]
+        return results, await cache.get_or_fetch("orders:open", broker.fetch)
+
+    results, after = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results) and after == ["o1"]
+    assert broker.calls == 2 and cache.stats()["namespaces"]["orders"]["errors"] == 1
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    cache = AsyncTTLCache(policies={"account": (0.05, 10.0)})
+    broker = Broker({"cash": 100})
+
+    async def main():
+        await cache.get_or_fetch("account", broker.fetch)
+        await asyncio.sleep(0.06)
+        broker.value = {"cash": 90}
+        # Expired but within the stale window: old value now, a single background refresh
+        stale = await asyncio.gather(*(cache.get_or_fetch("account", broker.fetch) for _ in range(3)))
+        await asyncio.sleep(0.05)
+        return stale, await cache.get_or_fetch("account", broker.fetch)
+
+    stale, fresh = asyncio.run(main())
+    assert stale == [{"cash": 100}] * 3 and fresh == {"cash": 90}
+    stats = cache.stats()["namespaces"]["account"]
+    assert broker.calls == 2 and stats["stale_hits"] == 3 and stats["refreshes"] == 1
+
+
+@pytest.mark.parametrize("pattern", ["orders:open", "orders:*"])
+def test_invalidate_during_fetch_discards_the_old_result(pattern):
+    cache = AsyncTTLCache(policies={"orders": (10.0, 0.0)})
+    broker = Broker([], delay=0.05)
+
+    async def main():
+        before = asyncio.ensure_future(cache.get_or_fetch("orders:open", broker.fetch))
+        await asyncio.sleep(0.01)
+        # An order is placed while the listing is in flight
+        broker.value = ["o1"]
+        cache.invalidate(pattern)
+        after = await cache.get_or_fetch("orders:open", broker.fetch)
+        return await before, after, await cache.get_or_fetch("orders:open", broker.fetch)
+
+    before, after, cached = asyncio.run(main())
+    # The caller that asked first gets its answer, but nobody after the change sees it
+    assert before == [] and after == ["o1"] and cached == ["o1"]
+    stats = cache.stats()["namespaces"]["orders"]
+    assert broker.calls == 2 and stats["joins"] == 0 and stats["discarded"] == 1
@@ -0,0 +1,79 @@
+# Tests for the startup health check (app.health)
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app import health
+from app.backends import LLMBackend, LocalModelBackend, set_backend
+
+
+class Trading:
+    """trading() client stand-in whose get_account fails with `error`, if set"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+
+    def get_account(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return SimpleNamespace(account_number="TEST")
+
+
+@pytest.fixture
+def broker(monkeypatch, tmp_path):
+    for key in ("APCA-API-KEY-ID", "APCA-API-SECRET-KEY", "OPENAI_API_KEY"):
+        monkeypatch.setenv(key, "test")
+    trading = Trading()
+    monkeypatch.setattr(health, "registry", SimpleNamespace(trading=lambda: trading))
+    monkeypatch.setattr(health, "last_report", None)
+    from app import bar_store
+    monkeypatch.setattr(bar_store, "_store", bar_store.BarStore(str(tmp_path)))
+    previous = set_backend(LLMBackend())
+    yield trading
+    set_backend(previous)
+
+
+def test_deep_checks_pass_and_are_kept_for_health(broker):
+    report = health.run_checks()
+    assert report["ok"] and set(report["checks"]) == {"config", "broker", "journal", "bar_store",
+                                                      "strategy_backend"}
+    assert broker.calls == 1
+    assert all(r["ok"] and r["ms"] >= 0 for r in report["checks"].values())
+    assert health.last_report is report
+
+
+def test_shallow_checks_skip_round_trips_and_keep_the_deep_report(broker):
+    deep = health.run_checks()
+    shallow = health.run_checks(deep=False)
+    assert set(shallow["checks"]) == {"config", "bar_store", "strategy_backend"}
+    assert broker.calls == 1
+    # A shallow run (e.g. /health before the startup check finished) never replaces it
+    assert health.last_report is deep
+
+
+def test_failures_are_reported_not_raised(broker, monkeypatch, tmp_path):
+    broker.error = ConnectionError("broker unreachable")
+    monkeypatch.delenv("OPENAI_API_KEY")
+    set_backend(LocalModelBackend(path=str(tmp_path / "missing.npz")))
+
+    report = health.run_checks()
+    checks = report["checks"]
+    assert not report["ok"]
+    assert checks["broker"] == {"ok": False, "error": "ConnectionError: broker unreachable",
+                                "ms": checks["broker"]["ms"]}
+    assert checks["config"]["error"] == "RuntimeError: missing OPENAI_API_KEY"
+    assert not checks["strategy_backend"]["ok"]
+    assert checks["journal"]["ok"] and checks["bar_store"]["ok"]
+
+
+def test_bot_import_defers_heavy_sdks():
+    heavy = ("openai", "pandas", "alpaca", "sqlalchemy", "fastapi")
+    code = f"import sys, app.bot; print([m for m in {heavy!r} if m in sys.modules])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert out.stdout.strip() == "[]"
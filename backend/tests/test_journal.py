@@ -0,0 +1,77 @@
+# Tests for the trade and decision journal (app.journal)
+from app import journal as journal_module
+from app.journal import Journal
+
+
+class FlakyEngine:
+    """Engine wrapper whose first `failures` transactions raise"""
+
+    def __init__(self, engine, failures: int):
+        self.engine = engine
+        self.failures = failures
+
+    def begin(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is locked")
+        return self.engine.begin()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+def flaky_journal(monkeypatch, failures):
+    monkeypatch.setattr(journal_module, "WRITE_RETRY_DELAY", 0)
+    journal = Journal("sqlite://", flush_interval=0.01)
+    journal._engine = FlakyEngine(journal.engine, failures)
+    return journal
+
+
+def test_journal_batches_writes_and_pages_by_cursor():
+    journal = Journal("sqlite://", flush_interval=0.01)
+    for i in range(25):
+        journal.record_decision("spy" if i % 2 else "QQQ", {"decision": "HOLD", "reason": str(i)}, gated=True)
+    journal.record_decision("SPY", {"decision": "HOLD", "reason": "x"})
+    journal.flush()
+
+    pages, cursor = [], None
+    while True:
+        page = journal.history("decisions", symbol="spy", cursor=cursor, limit=5)
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    ids = [row["id"] for items in pages for row in items]
+    assert len(ids) == 13 and ids == sorted(ids, reverse=True)
+    assert [len(items) for items in pages] == [5, 5, 3]
+    assert journal.stats()["written"] == 26
+    journal.close()
+
+
+
+
+def test_journal_retries_a_failed_write_once(monkeypatch):
+    journal = flaky_journal(monkeypatch, failures=1)
+    for i in range(3):
+        journal.record_decision("SPY", {"decision": "HOLD", "reason": str(i)})
+    journal.flush()
+
+    stats = journal.stats()
+    assert (stats["written"], stats["dropped"], stats["errors"]) == (3, 0, 1)
+    assert len(journal.history("decisions", symbol="SPY")["items"]) == 3
+    journal.close()
+
+
+def test_journal_drops_a_batch_that_keeps_failing(monkeypatch, caplog):
+    journal = flaky_journal(monkeypatch, failures=2)
+    journal.record_decision("SPY", {"decision": "HOLD", "reason": "lost"})
+    journal.flush()
+    journal.record_decision("SPY", {"decision": "HOLD", "reason": "kept"})
+    journal.flush()
+
+    stats = journal.stats()
+    assert (stats["written"], stats["dropped"], stats["errors"]) == (1, 1, 2)
+    assert [row["reason"] for row in journal.history("decisions", symbol="SPY")["items"]] == ["kept"]
+    assert "1 rows dropped" in caplog.text
+    journal.close()
@@ -0,0 +1,103 @@
+# Tests for the local order and position ledger (app.ledger)
+import asyncio
+
+import pytest
+
+from app import ledger as ledger_module
+from app.ledger import TradingLedger
+
+
+def order(order_id, symbol="SPY", status="new", side="buy", **fields):
+    return {"id": order_id, "symbol": symbol, "status": status, "side": side, "qty": "10", **fields}
+
+
+def fill(order_id, qty, price, status="filled", event="fill", symbol="SPY", side="buy", position_qty=None):
+    return {"event": event, "order": order(order_id, symbol, status, side), "qty": str(qty),
+            "price": str(price), "position_qty": position_qty}
+
+
+def test_apply_order_indexes_bracket_legs():
+    ledger = TradingLedger()
+    ledger.apply_order(order("parent", legs=[order("stop", status="held"), order("target", status="held")]))
+    assert {o["id"] for o in ledger.open_orders("spy")} == {"parent", "stop", "target"}
+
+    ledger.mark_status("parent", "filled")
+    ledger.apply_order(order("stop", status="canceled"))
+    assert [o["id"] for o in ledger.open_orders("SPY")] == ["target"]
+    assert ledger.order_status("parent") == "filled"
+    ledger.mark_status("target", "canceled")
+    assert ledger.open_orders("SPY") == [] and "SPY" not in ledger.open_by_symbol
+
+
+def test_trade_updates_build_positions():
+    ledger = TradingLedger()
+    ledger.apply_trade_update(fill("a", 10, 100.0, status="partially_filled", event="partial_fill"))
+    ledger.apply_trade_update(fill("a", 10, 110.0))
+    position = ledger.position("SPY")
+    assert float(position["qty"]) == 20 and float(position["avg_entry_price"]) == 105.0
+    assert ledger.open_orders("SPY") == []
+
+    # Reducing keeps the average entry; the broker's position_qty wins over local arithmetic
+    ledger.apply_trade_update(fill("b", 5, 120.0, side="sell", position_qty="14"))
+    position = ledger.position("SPY")
+    assert float(position["qty"]) == 14 and float(position["avg_entry_price"]) == 105.0
+    assert ledger.exposure("SPY") == pytest.approx(14 * 120.0)
+
+    ledger.apply_trade_update(fill("c", 14, 121.0, side="sell"))
+    assert ledger.position("SPY") is None and ledger.counters["events"] == 4
+
+
+def test_reconcile_counts_differences():
+    ledger = TradingLedger()
+    ledger._fetch = lambda: ([{"symbol": "SPY", "qty": "5"}], [order("a")])
+    ledger.reconcile()
+    ledger._fetch = lambda: ([{"symbol": "SPY", "qty": "7"}], [order("b")])
+    # SPY's qty, "a" gone, "b" new
+    assert ledger.reconcile() == 3
+    assert [o["id"] for o in ledger.open_orders("SPY")] == ["b"] and ledger.position_qty("SPY") == 7
+
+
+def test_reconcile_keeps_changes_made_while_fetching():
+    ledger = TradingLedger()
+    ledger._fetch = lambda: ([], [order("resting")])
+    ledger.reconcile()
+
+    def fetch():
+        snapshot = ([], [order("resting")])
+        # While the broker answers: an order is placed and the resting one fills
+        ledger.apply_order(order("submitted", "QQQ"))
+        ledger.apply_trade_update(fill("resting", 10, 100.0))
+        return snapshot
+
+    ledger._fetch = fetch
+    assert ledger.reconcile() == 0
+    assert [o["id"] for o in ledger.open_orders()] == ["submitted"]
+    assert ledger.order_status("resting") == "filled" and ledger.position_qty("SPY") == 10
+
+    # The next snapshot includes them: the broker is the source of truth again
+    ledger._fetch = lambda: ([{"symbol": "SPY", "qty": "10"}], [])
+    assert ledger.reconcile() == 1
+    assert ledger.open_orders() == []
+
+
+def test_stream_errors_reconnect(monkeypatch, caplog):
+    monkeypatch.setattr(ledger_module, "RECONNECT_DELAYS", (0.01,))
+    ledger = TradingLedger()
+    attempts = []
+
+    async def listen():
+        attempts.append(1)
+        if len(attempts) == 1:
+            ledger.apply_trade_update({"event": "fill"})  # no "order": KeyError
+        await asyncio.sleep(10)
+
+    ledger._listen = listen
+
+    async def main():
+        ledger._tasks.append(asyncio.ensure_future(ledger._listen_forever()))
+        await asyncio.sleep(0.1)
+        await ledger.stop()
+
+    asyncio.run(main())
+    assert len(attempts) == 2
+    assert "Trade stream failed" in caplog.text
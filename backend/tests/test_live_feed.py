@@ -0,0 +1,70 @@
+# Tests for the shared live account feed (app.live_feed)
+import asyncio
+import json
+
+from app import live_feed as feed_module
+from app.live_feed import LiveFeed, diff_topic
+
+
+def test_diff_topic_keyed_and_flat():
+    assert diff_topic({"cash": 1, "equity": 2}, {"cash": 1, "equity": 3, "new": 4}, keyed=False) == {
+        "set": {"equity": 3, "new": 4}, "remove": []}
+    old = {"SPY": {"qty": 1}, "QQQ": {"qty": 2}}
+    new = {"SPY": {"qty": 5}, "IWM": {"qty": 1}, "QQQ": {"qty": 2}}
+    assert diff_topic(old, new, keyed=True) == {"upsert": {"SPY": {"qty": 5}, "IWM": {"qty": 1}}, "remove": []}
+    assert diff_topic(new, {}, keyed=True)["remove"] == ["SPY", "IWM", "QQQ"]
+    assert diff_topic(old, dict(old), keyed=True) is None
+
+
+def test_feed_publishes_diffs_and_resyncs_slow_clients(monkeypatch):
+    broker = {"account": {"cash": "100"}, "positions": [{"symbol": "SPY", "qty": "1"}], "orders": []}
+    monkeypatch.setattr(feed_module, "TOPICS", {
+        "account": (lambda: broker["account"], None),
+        "positions": (lambda: broker["positions"], "symbol"),
+        "orders": (lambda: broker["orders"], "id"),
+    })
+    monkeypatch.setattr(feed_module, "CLIENT_QUEUE_SIZE", 3)
+
+    async def next_message(queue):
+        return json.loads(await asyncio.wait_for(queue.get(), 1.0))
+
+    async def main():
+        feed = LiveFeed(interval=60)
+        fast = feed.subscribe()
+        slow = feed.subscribe()
+        assert (await next_message(fast))["type"] == "snapshot"
+        first = await next_message(fast)
+        assert first["seq"] == 1 and first["changes"]["positions"] == {"upsert": {"SPY": {"symbol": "SPY", "qty": "1"}}, "remove": []}
+
+        # Only what changed is sent; an unchanged poll sends nothing
+        broker["positions"] = []
+        broker["orders"] = [{"id": "o1", "symbol": "SPY", "status": "new"}]
+        feed.notify()
+        second = await next_message(fast)
+        assert second["seq"] == 2 and set(second["changes"]) == {"positions", "orders"}
+        assert second["changes"]["positions"] == {"upsert": {}, "remove": ["SPY"]}
+        feed.notify()
+        await asyncio.sleep(0.05)
+        assert fast.empty() and feed.polls == 3
+
+        # The slow client never read: its backlog is replaced by one snapshot of the latest state
+        broker["account"] = {"cash": "90"}
+        feed.notify()
+        await next_message(fast)
+        assert slow.qsize() == 1
+        resync = await next_message(slow)
+        assert resync["type"] == "snapshot" and resync["seq"] == 3 and resync["data"]["account"] == {"cash": "90"}
+
+        # Broker errors reach clients and the poller keeps going
+        broker["account"] = None
+        feed.notify()
+        error = await next_message(fast)
+        assert error["type"] == "error" and feed.errors == 1
+        feed.unsubscribe(fast)
+        feed.unsubscribe(slow)
+        feed.notify()
+        await asyncio.sleep(0.05)
+        return feed
+
+    feed = asyncio.run(main())
+    assert feed.stats()["subscribers"] == 0 and feed._task is None
@@ -0,0 +1,62 @@
+# Tests for the local decision model (app.local_model)
+import numpy as np
+import pytest
+
+from app.backends import LocalModelBackend, ShadowBackend
+from app.batch_indicators import compute_features, feature_dict
+from app.bot import confidence_gate
+from app.local_model import LocalModel, train
+
+
+def flat_model(stop_pct=0.01, target_pct=0.02):
+    """Model that scores every row p=0.5 (zero weights), which clears the 1/3 break-even"""
+    n = 11
+    return LocalModel(np.zeros(n), np.ones(n), np.zeros(n), 0.0, stop_pct, target_pct)
+
+
+def test_local_model_batch_matches_single_and_shadow_counts(tmp_path):
+    rng = np.random.default_rng(1)
+    closes = 100 + np.cumsum(rng.normal(0, 1, (400, 120)), axis=1)
+    features = compute_features(closes, np.full(closes.shape, 1000.0))
+    labels = (features[:, 7] > 0).astype(int)  # wins when price is above SMA(20)
+    model, report = train(features, labels, stop_pct=0.01, target_pct=0.02)
+    assert report["holdout"]["auc"] > 0.9
+
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+    loaded = LocalModel.load(str(path))
+    rows = [dict(feature_dict(row, f"S{i}"), current_price=row[0]) for i, row in enumerate(features[:20])]
+    batch = loaded.probabilities(features[:20])
+    assert np.allclose([loaded.probability(t) for t in rows], batch)
+
+    backend = LocalModelBackend(loaded)
+    plans = backend.decide_batch([(t, t["symbol"], 1) for t in rows], record=False)
+    assert [p["decision"] == "BUY" for p in plans] == list(batch >= loaded.threshold)
+
+    class AlwaysHold:
+        name = "hold"
+
+        def decide(self, technical_data, symbol, qty):
+            return {"decision": "HOLD", "reason": "test"}
+
+    shadow = ShadowBackend(AlwaysHold(), backend)
+    for t in rows:
+        assert shadow.decide(t, t["symbol"], 1)["decision"] == "HOLD"
+    stats = shadow.stats()
+    assert stats["compared"] == 20 and stats["shadow_only"] == int((batch >= loaded.threshold).sum())
+
+
+@pytest.mark.parametrize("price", [250.0, 0.5, 0.1234, 0.05])
+def test_local_model_bracket_spans_a_price_increment(price):
+    plan = flat_model().plan(price, 0.5)
+    assert plan["decision"] == "BUY"
+    assert plan["stop_loss"] < price < plan["take_profit"]
+    plan["technical_context"] = {"entry_price": price}
+    risk_reward, hold = confidence_gate(plan)
+    assert risk_reward > 0 and hold is None
+
+
+def test_local_model_holds_when_the_bracket_collapses():
+    # 1% below $0.004 rounds back onto the entry at four decimals
+    plan = flat_model().plan(0.004, 0.5)
+    assert plan["decision"] == "HOLD" and "collapses" in plan["reason"]
@@ -0,0 +1,88 @@
+# Tests for the hot-path latency metrics (app.metrics)
+import json
+
+import pytest
+
+from app import metrics
+from app.metrics import Histogram, MetricsRegistry, span, symbol_scope, trace_cycle
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram("lat", "Latency", ("stage",), buckets=(0.1, 1.0))
+    # A value on a bound lands in that bucket (le="0.1"), past the last bound in +Inf
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "fetch")
+    histogram.observe(0.2, "llm")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP lat Latency", "# TYPE lat histogram"]
+    assert 'lat_bucket{stage="fetch",le="0.1"} 2' in lines
+    assert 'lat_bucket{stage="fetch",le="1.0"} 3' in lines
+    assert 'lat_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'lat_count{stage="fetch"} 4' in lines
+    assert 'lat_count{stage="llm"} 1' in lines
+
+    summary = histogram.summary()
+    assert summary[("fetch",)]["count"] == 4
+    assert abs(summary[("fetch",)]["sum"] - 2.65) < 1e-9
+    histogram.reset()
+    assert histogram.summary() == {}
+
+
+def test_registry_escapes_labels_and_skips_failing_collectors():
+    registry = MetricsRegistry()
+    registry.histogram("h", "H", ("name",)).observe(0.01, 'a"b')
+    registry.collector(lambda: [("up", "gauge", "Up", [({"host": "x"}, 1)])])
+
+    @registry.collector
+    def broken():
+        raise RuntimeError("backend down")
+
+    text = registry.render()
+    assert 'h_count{name="a\\"b"} 1' in text
+    assert 'up{host="x"} 1.0' in text
+    assert text.endswith("\n")
+
+
+def test_span_observes_stage_and_symbol_histograms(monkeypatch):
+    stage = Histogram("s", "S", ("stage",))
+    per_symbol = Histogram("p", "P", ("stage", "symbol"))
+    monkeypatch.setattr(metrics, "stage_seconds", stage)
+    monkeypatch.setattr(metrics, "symbol_stage_seconds", per_symbol)
+
+    with span("gate"):
+        pass
+    with symbol_scope("spy"), span("indicators"):
+        pass
+    with span("order", symbol="qqq"):
+        pass
+
+    assert set(stage.summary()) == {("gate",), ("indicators",), ("order",)}
+    assert set(per_symbol.summary()) == {("indicators", "SPY"), ("order", "QQQ")}
+
+
+def test_span_records_even_when_the_block_raises(monkeypatch):
+    stage = Histogram("s", "S", ("stage",))
+    monkeypatch.setattr(metrics, "stage_seconds", stage)
+    with pytest.raises(TimeoutError), span("llm"):
+        raise TimeoutError
+    assert stage.summary()[("llm",)]["count"] == 1
+
+
+def test_trace_cycle_writes_one_line_per_cycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "TRACE_DIR", None)
+    with trace_cycle("cycle-1", trace_dir=str(tmp_path)) as trace:
+        with symbol_scope("SPY"), span("fetch"):
+            pass
+        with span("order"):
+            pass
+    assert trace is not None
+
+    with trace_cycle("off") as disabled:
+        assert disabled is None
+
+    (path,) = tmp_path.glob("traces-*.jsonl")
+    (record,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert record["cycle"] == "cycle-1"
+    assert [(s["stage"], s["symbol"]) for s in record["spans"]] == [("fetch", "SPY"), ("order", None)]
+    assert all(s["ms"] >= 0 and s["start_ms"] >= 0 for s in record["spans"])
@@ -0,0 +1,67 @@
+# Tests for the broker API rate limiter (app.ratelimit)
+import threading
+import time
+
+import pytest
+
+from app.clients import registry
+from app.ratelimit import LANES, TokenBucket, limiter
+from benchmarks.mock_broker import MockBroker
+
+
+class FlakyBroker(MockBroker):
+    """Throttles the first two account reads and fails every order with a 5xx"""
+
+    throttled = 2
+
+    def fault(self, method, path):
+        if path == "/v2/account" and self.throttled:
+            self.throttled -= 1
+            return 429, {"code": 42910000, "message": "rate limit exceeded"}, {"Retry-After": "0"}
+        if method == "POST":
+            return 503, {"code": 50300000, "message": "unavailable"}
+        return None
+
+
+def test_rate_limiter_retries_throttling_but_never_resends_orders(monkeypatch):
+    for key in ("APCA-API-KEY-ID", "APCA-API-SECRET-KEY", "ALPACA_TRADING_URL", "ALPACA_DATA_URL"):
+        monkeypatch.setenv(key, "mock")
+    upstream = limiter["trading"]
+    monkeypatch.setattr(upstream, "base_delay", 0.01)
+    before = upstream.stats()
+    with FlakyBroker() as broker:
+        broker.install()
+        try:
+            assert registry.trading().get_account().account_number == "MOCK"
+            assert broker.requests == 3
+            # An order may have reached the exchange before a 5xx; it is never resent
+            with pytest.raises(Exception):
+                registry.trading().post("/orders", {"symbol": "SPY", "qty": 1, "side": "buy",
+                                                    "type": "market", "time_in_force": "day"})
+            assert broker.requests == 4
+        finally:
+            registry.reset()
+    after = upstream.stats()
+    assert after["throttled"] - before["throttled"] == 2
+    assert after["lanes"]["order"]["acquired"] - before["lanes"]["order"]["acquired"] == 1
+
+
+def test_token_bucket_serves_the_order_lane_first():
+    bucket = TokenBucket(rate=20.0, burst=1)
+    bucket.acquire()
+    served = []
+
+    def take(lane):
+        bucket.acquire(LANES.index(lane))
+        served.append(lane)
+
+    threads = [threading.Thread(target=take, args=("background",)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while bucket.stats()["lanes"]["background"]["queued"] < 3:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=take, args=("order",)))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+    assert served[0] == "order"
@@ -0,0 +1,39 @@
+# Tests for portfolio risk and position sizing (app.risk)
+import numpy as np
+import pytest
+
+from app.bar_store import BarStore
+from app.risk import LIMITS, PortfolioRisk, RiskLimits, size_arrays
+
+
+def test_risk_sizing_limits_and_correlation(tmp_path):
+    # A and B move together, C is independent; all enter at 100 with a stop at 98
+    var = 1e-4
+    cov = np.array([[var, var, 0], [var, var, 0], [0, 0, var]])
+    args = dict(entry=[100.0] * 3, stop=[98.0] * 3, direction=[1, 1, 1],
+                sector=np.array([0, 0, 1]), candidate_index=np.arange(3), held=np.zeros(3),
+                sector_exposure=np.zeros(2), gross=0.0, equity=100_000.0, buying_power=200_000.0, cov=cov)
+    loose = RiskLimits(per_trade=0.01, max_position=1.0, max_sector=1.0, max_gross=1.0, max_vol=1.0)
+    qty, _, bound = size_arrays(**args, limits=loose)
+    # $1000 at risk / $2 per share, shared between the correlated pair
+    assert qty.tolist() == [250, 250, 500] and set(bound.tolist()) == {0}
+
+    qty, _, bound = size_arrays(**args, limits=RiskLimits(0.01, 0.20, 0.30, 1.0, 1.0))
+    assert qty.tolist() == [150, 150, 200]
+    assert [LIMITS[b] for b in bound] == ["sector", "sector", "position"]
+
+    qty, notional, bound = size_arrays(**args, limits=RiskLimits(0.01, 1.0, 1.0, 1.0, 0.01))
+    assert np.sqrt(notional @ (cov * 26) @ notional) == pytest.approx(1000.0)
+    assert set(bound.tolist()) == {LIMITS.index("volatility")}
+
+    # Wiring: HOLDs pass through, a held position uses up its symbol's room
+    risk = PortfolioRisk(RiskLimits(0.01, 0.10, 1.0, 1.0, 1.0), store=BarStore(str(tmp_path)), sectors={})
+    plan = {"decision": "BUY", "side": "buy", "stop_loss": 98.0, "take_profit": 104.0,
+            "confidence": 0.6, "technical_context": {"entry_price": 100.0}}
+    hold = {"decision": "HOLD", "reason": "test"}
+    account = {"equity": "100000", "buying_power": "200000"}
+    sized = risk.size_batch([("SPY", plan), ("QQQ", hold), ("IWM", plan)], account,
+                            [{"symbol": "IWM", "market_value": "10000"}])
+    assert sized[0]["qty"] == 100 and sized[0]["risk"]["limited_by"] == "position"
+    assert sized[1] is hold
+    assert sized[2]["decision"] == "HOLD" and "position" in sized[2]["reason"]
@@ -0,0 +1,32 @@
+# Tests for the multi-symbol scheduler (app.scheduler)
+import asyncio
+import threading
+
+from app.scheduler import BotScheduler
+
+
+class ThreadRecordingStore:
+    """Bar store stand-in remembering which thread each call ran on"""
+
+    def __init__(self):
+        self.threads = []
+
+    def sync(self, symbols):
+        self.threads.append(threading.current_thread())
+
+    def bars(self, symbol, since=None):
+        self.threads.append(threading.current_thread())
+        return []
+
+
+def test_cycle_reads_bars_off_the_event_loop():
+    store = ThreadRecordingStore()
+    scheduler = BotScheduler(["spy", "qqq"], store=store,
+                             strategy=lambda bars, symbol, qty: {"decision": "HOLD", "reason": "test"})
+    try:
+        results = asyncio.run(scheduler.run_cycle())
+    finally:
+        scheduler.close()
+    assert {s: r["decision"] for s, r in results.items()} == {"SPY": "HOLD", "QQQ": "HOLD"}
+    assert len(store.threads) == 3 and threading.main_thread() not in store.threads
+    assert scheduler.last_cycle["symbols"] == 2 and scheduler.last_cycle["errors"] == 0
@@ -0,0 +1,43 @@
+# Tests for the pre-LLM signal gate (app.signal_gate)
+import numpy as np
+import pandas as pd
+
+from app.batch_indicators import FEATURES, FEATURE_INDEX, RSI_ZONES
+from app.signal_gate import SignalGate
+
+
+def test_signal_gate_holds_quiet_symbols_without_llm(monkeypatch):
+    from app import strategy
+
+    def fail_llm(prompt):
+        raise AssertionError("LLM should not be called for a gated symbol")
+
+    gate = SignalGate(enabled=True)
+    monkeypatch.setattr(strategy, "ask_llm", fail_llm)
+    monkeypatch.setattr(strategy, "signal_gate", gate)
+
+    # Slight uptrend with flat volume: no crossover, neutral RSI (~57), stable volume
+    closes = 100 + np.arange(120) * 0.002 + np.where(np.arange(120) % 2, 0.05, -0.05)
+    df = pd.DataFrame({"close": closes, "volume": np.full(120, 1000.0)})
+
+    decision = strategy.llm_strategy(df, "SPY", 1)
+    assert decision["decision"] == "HOLD"
+    stats = gate.stats()["cycle"]
+    assert stats["held"] == 1 and stats["cost_saved_usd"] > 0
+
+
+
+def test_rsi_zones_are_symmetric_and_nan_rsi_is_no_signal():
+    gate = SignalGate(crossover=False, trend_reversal=False, volume_trends=(), enabled=True)
+    quiet = {"crossover_detected": False, "trend_reversal": False, "volume_trend": "stable"}
+    fired = {zone: gate.signals({**quiet, "rsi_9": rsi, "rsi_zone": zone})
+             for zone, rsi in zip(RSI_ZONES, (25.0, 35.0, 50.0, 65.0, 75.0))}
+    assert [zone for zone, signals in fired.items() if signals] == [
+        "oversold", "weak_oversold", "weak_overbought", "overbought"]
+    # get_rsi_zone(nan) says "overbought"
+    assert gate.signals({**quiet, "rsi_9": float("nan"), "rsi_zone": "overbought"}) == []
+
+    features = np.zeros((3, len(FEATURES)))
+    features[:, FEATURE_INDEX["rsi_9"]] = [50.0, 65.0, np.nan]
+    features[:, FEATURE_INDEX["rsi_zone"]] = [RSI_ZONES.index(z) for z in ("neutral", "weak_overbought", "overbought")]
+    assert gate.check_features(features).tolist() == [False, True, False]
@@ -1,2 +1,109 @@
 # Unit/integration tests for strategy
-# This file will contain tests for trading strategies 
\ No newline at end of file
+import numpy as np
+import pytest
+
+from app.indicators import IncrementalIndicators
+from app.strategy import calculate_sma, calculate_rsi, calculate_macd
+
+
+def synthetic_closes(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    closes[100:115] = closes[100]  # flat stretch exercises the zero gain/loss RSI case
+    return closes
+
+
+def test_incremental_indicators_match_batch():
+    closes = synthetic_closes()
+    engine = IncrementalIndicators()
+    snapshots = [engine.update(float(c)) for c in closes]
+
+    macd_line, signal_line, histogram = calculate_macd(closes)
+    expected = {
+        "sma_20": calculate_sma(closes, 20),
+        "sma_50": calculate_sma(closes, 50),
+        "rsi_9": calculate_rsi(closes, 9),
+        "macd": macd_line,
+        "signal": signal_line,
+        "histogram": histogram,
+    }
+    for key, series in expected.items():
+        actual = np.array([s[key] for s in snapshots])
+        np.testing.assert_allclose(actual, series.values, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_incremental_indicators_state_round_trip(tmp_path):
+    closes = synthetic_closes()
+    engine = IncrementalIndicators()
+    engine.warm(closes[:200])
+
+    path = tmp_path / "spy.json"
+    engine.save(str(path))
+    restored = IncrementalIndicators.load(str(path))
+
+    for close in closes[200:]:
+        assert restored.update(float(close)) == pytest.approx(engine.update(float(close)), nan_ok=True)
+
+
+def bars_frame(n=120, seed=0):
+    import pandas as pd
+
+    closes = synthetic_closes(n, seed)
+    return pd.DataFrame({"close": closes, "volume": np.full(n, 1000.0)})
+
+
+def test_llm_strategy_reuses_cached_decision(monkeypatch):
+    import threading
+    import time
+    from app import strategy
+
+    calls = []
+
+    def fake_llm(prompt):
+        calls.append(prompt)
+        time.sleep(0.05)
+        return "HOLD"
+
+    monkeypatch.setattr(strategy, "ask_llm", fake_llm)
+    monkeypatch.setattr(strategy.signal_gate, "enabled", False)
+    strategy.decision_cache.invalidate()
+    df = bars_frame()
+
+    threads = [threading.Thread(target=strategy.llm_strategy, args=(df, "SPY", 1)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert strategy.llm_strategy(df, "SPY", 1)["decision"] == "HOLD"
+
+    assert len(calls) == 1
+    stats = strategy.decision_cache.stats()
+    assert stats["hits"] + stats["inflight_joins"] == 5
+
+
+def test_decision_validator_and_retry(monkeypatch):
+    import json
+    from app import strategy
+    from app.prompts import InvalidDecision, TradeDecision
+
+    plan = {"decision": "BUY", "side": "buy", "order_type": "market", "stop_loss": 95.0,
+            "take_profit": 110.0, "confidence": 0.7, "risk_reward": None, "reasoning": "x"}
+    parsed = TradeDecision.parse(json.dumps(plan), entry_price=100.0)
+    assert parsed.decision == "BUY" and parsed.risk_reward == 2.0
+    assert TradeDecision.parse("```json\n" + json.dumps(plan) + "\n```", 100.0).decision == "BUY"
+    assert TradeDecision.parse("HOLD").decision == "HOLD"
+    for bad in ({**plan, "stop_loss": 101.0}, {**plan, "confidence": 1.5}, {**plan, "side": "sell"}):
+        with pytest.raises(InvalidDecision):
+            TradeDecision.parse(json.dumps(bad), entry_price=100.0)
+
+    answers = iter([json.dumps({**plan, "take_profit": "high"}), json.dumps(plan)])
+    prompts = []
+
+    def fake_llm(prompt):
+        prompts.append(prompt)
+        return next(answers)
+
+    monkeypatch.setattr(strategy, "ask_llm", fake_llm)
+    technical_data = {"current_price": 100.0}
+    assert json.loads(strategy.ask_validated("p", technical_data)) == plan
+    assert len(prompts) == 2 and "rejected" in prompts[1]
@@ -0,0 +1,113 @@
+# Tests for the market data stream and bar aggregation (app.streaming)
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from app import streaming
+from app.streaming import BarAggregator, MarketStream
+from benchmarks.replay_server import ReplayServer, synthetic_ticks
+
+T0 = datetime(2024, 6, 3, 14, 30, tzinfo=timezone.utc)
+
+
+def at(minutes: float) -> float:
+    return (T0 + timedelta(minutes=minutes)).timestamp()
+
+
+def test_aggregator_buckets_trades_and_ignores_late_prints():
+    agg = BarAggregator(15)
+    assert agg.add_trade("SPY", at(0), 100.0, 10) is None
+    assert agg.add_trade("SPY", at(7), 102.0, 30) is None
+    assert agg.add_trade("SPY", at(14.9), 99.0, 10) is None
+    bar = agg.add_trade("SPY", at(15), 101.0, 5)
+    assert bar["timestamp"] == T0
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (100.0, 102.0, 99.0, 99.0)
+    assert bar["volume"] == 50 and bar["trade_count"] == 3
+    assert bar["vwap"] == pytest.approx((100 * 10 + 102 * 30 + 99 * 10) / 50)
+
+    # A print for the bar already emitted is dropped, not folded into the open one
+    assert agg.add_trade("SPY", at(14), 500.0, 1000) is None
+    assert agg.bars["SPY"]["high"] == 101.0 and agg.bars["SPY"]["volume"] == 5
+
+    # Bars close on time even without a next trade, after the grace period
+    assert agg.flush(at(30) + 1, grace=2.0) == []
+    (flushed,) = agg.flush(at(30) + 2, grace=2.0)
+    assert flushed["timestamp"] == T0 + timedelta(minutes=15) and agg.bars == {}
+
+
+class GapStore:
+    """Bar store stand-in whose REST history holds 15-minute bars for every bucket"""
+
+    def __init__(self, start: datetime, buckets: int):
+        index = pd.date_range(start, periods=buckets, freq="15min")
+        self.history = pd.DataFrame({"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+                                     "volume": 1.0, "trade_count": 1.0, "vwap": 1.0}, index=index)
+        self.synced = 0
+        self.appended = []
+
+    def sync(self, symbols):
+        self.synced += 1
+
+    def frame(self, symbol, since=None):
+        return self.history[self.history.index.asi8 // 10 ** 9 >= since]
+
+    def append(self, symbol, bars):
+        self.appended.extend(bars)
+
+
+async def stream_until(stream, server, bars: int, emitted):
+    task = asyncio.ensure_future(stream.run())
+    try:
+        for _ in range(500):
+            if len(emitted) >= bars:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        stream.stop()
+        await task
+        await server.stop()
+
+
+def test_reconnect_backfills_the_gap_without_duplicates():
+    # Future timestamps, so the wall-clock flush never closes a bar early
+    start = datetime.fromtimestamp((datetime.now(timezone.utc).timestamp() // 900 + 96) * 900, tz=timezone.utc)
+    step = timedelta(minutes=15)
+    ticks = synthetic_ticks(["SPY"], start, minutes=75, per_minute=4)
+
+    async def main():
+        # First connection drops 25 minutes in; the next 15 minutes of ticks are never sent
+        server = await ReplayServer(ticks, batch=20, drop_after=100, skip_on_reconnect=60).start()
+        store = GapStore(start, buckets=3)
+        stream = MarketStream(["SPY"], url=server.url, store=store)
+        emitted = []
+        stream.on_bar(emitted.append)
+        await stream_until(stream, server, 4, emitted)
+        return stream, store, emitted
+
+    stream, store, emitted = asyncio.run(main())
+    assert stream.connects == 2 and store.synced == 1
+    # Bucket 0 streamed, 1 and 2 backfilled over REST, 3 streamed again; 4 is still open
+    assert [bar["timestamp"] for bar in emitted] == [start + step * i for i in range(4)]
+    assert [bar["close"] == 1.0 for bar in emitted] == [False, True, True, False]
+    assert store.appended == emitted
+
+
+def test_unexpected_errors_reconnect_instead_of_ending_the_stream(monkeypatch, caplog):
+    monkeypatch.setattr(streaming, "RECONNECT_DELAYS", (0.01,))
+    start = datetime.fromtimestamp((datetime.now(timezone.utc).timestamp() // 900 + 96) * 900, tz=timezone.utc)
+    ticks = synthetic_ticks(["SPY"], start, minutes=45, per_minute=4)
+    del ticks[10]["p"]  # malformed trade: KeyError while handling it
+
+    async def main():
+        server = await ReplayServer(ticks, batch=20, delay=0.01).start()
+        stream = MarketStream(["SPY"], url=server.url, backfill=False)
+        emitted = []
+        stream.on_bar(emitted.append)
+        await stream_until(stream, server, 2, emitted)
+        return stream, emitted
+
+    stream, emitted = asyncio.run(main())
+    assert stream.connects == 2 and len(emitted) == 2
+    assert "Stream session failed" in caplog.text
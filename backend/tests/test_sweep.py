@@ -0,0 +1,71 @@
+# Tests for the parameter sweep and walk-forward optimization (app.sweep)
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.sweep import DEFAULT_PARAMS, SharedBars, SweepRunner, _window, parameter_grid, walk_forward_splits
+
+
+def bars_frame(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    index = pd.date_range("2024-01-02 14:30", periods=n, freq="15min", tz="UTC")
+    return pd.DataFrame({"open": close, "high": close + 0.3, "low": close - 0.3, "close": close,
+                         "volume": 1000.0}, index=index)
+
+
+def test_parameter_grid_fills_defaults_and_drops_inconsistent_combinations():
+    grid = {"sma_fast": [20, 60], "sma_slow": [50, 100], "macd_fast": [12, 30]}
+    combos = list(parameter_grid(grid))
+    assert [(p["sma_fast"], p["sma_slow"], p["macd_fast"]) for p in combos] == [
+        (20, 50, 12), (20, 100, 12), (60, 100, 12)]
+    assert all(p["rsi_period"] == DEFAULT_PARAMS["rsi_period"] for p in combos)
+
+
+def test_walk_forward_splits_rolling_and_anchored():
+    assert walk_forward_splits(0, 1000, 4, train_fraction=0.5) == [
+        (0, 125, 250), (250, 375, 500), (500, 625, 750), (750, 875, 1000)]
+    anchored = walk_forward_splits(0, 1000, 2, train_fraction=0.8, anchored=True)
+    assert anchored == [(0, 400, 500), (0, 900, 1000)]
+
+
+def test_window_adds_warmup_without_copying():
+    bars = {"timestamp": np.arange(10, dtype=np.int64) * 60, "close": np.arange(10, dtype=np.float64)}
+    window = _window(bars, 5 * 60, 8 * 60, warmup=2)
+    assert window["close"].tolist() == [3, 4, 5, 6, 7]
+    assert np.shares_memory(window["close"], bars["close"])
+    # Warm-up is clamped at the first bar; open ends take everything
+    assert window["timestamp"][0] == 180
+    assert _window(bars, 60, None, warmup=5)["close"].tolist() == list(range(10))
+
+
+def test_shared_bars_create_attach_unlink():
+    frames = {"SPY": bars_frame(50), "QQQ": bars_frame(30, seed=1)}
+    shared = SharedBars.create(frames)
+    attached = SharedBars.attach(shared.spec)
+    try:
+        for symbol, frame in frames.items():
+            np.testing.assert_array_equal(attached.bars[symbol]["close"], frame["close"].to_numpy())
+            assert attached.bars[symbol]["timestamp"][0] == frame.index[0].timestamp()
+    finally:
+        attached.close()
+        shared.close(unlink=True)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=shared.spec["names"]["close"])
+
+
+def test_sweep_runner_grid_and_walk_forward_with_one_worker():
+    grid = {"sma_fast": [10, 20], "sma_slow": [50], "min_bars": [60]}
+    with SweepRunner({"SPY": bars_frame()}, workers=1) as runner:
+        names = runner.shared.spec["names"]
+        table = runner.run_grid(grid)
+        folds = runner.walk_forward(grid, folds=2)
+    assert sorted(table["sma_fast"]) == [10, 20]
+    assert table["total_pnl"].is_monotonic_decreasing
+    assert folds["fold"].tolist() == [0, 1] and "test_total_pnl" in folds
+    # The runner unlinks its blocks on exit
+    for name in names.values():
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
@@ -0,0 +1,89 @@
+# Tests for the multi-timeframe bar cascade (app.timeframes)
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.timeframes import TIMEFRAMES, TimeframeStore
+
+
+class MinuteData:
+    """get_stock_bars stand-in: 1-minute bars on the minute grid, priced from their open time"""
+
+    def get_stock_bars(self, request):
+        # The SDK request holds naive UTC datetimes
+        start = int(request.start.replace(tzinfo=timezone.utc).timestamp())
+        end = request.end.replace(tzinfo=timezone.utc).timestamp()
+        data = {}
+        for symbol in request.symbol_or_symbols:
+            data[symbol] = []
+            # Includes the bar still forming at `end`, as Alpaca does
+            for ts in range(-(-start // 60) * 60, int(np.ceil(end)), 60):
+                price = 100 + (ts // 60) % 37 * 0.1
+                data[symbol].append(SimpleNamespace(
+                    timestamp=datetime.fromtimestamp(ts, tz=timezone.utc), open=price, high=price + 0.5,
+                    low=price - 0.5, close=price + 0.1, volume=float(ts // 60 % 11 + 1), trade_count=1.0,
+                    vwap=price))
+        return SimpleNamespace(data=data)
+
+
+def test_timeframes_cascade_matches_resample_across_dst(tmp_path):
+    # Minute bars with gaps over the 2024-03-10 New York DST change
+    rng = np.random.default_rng(1)
+    ts = np.arange(1709856000, 1710115200, 60)
+    ts = ts[rng.random(len(ts)) > 0.3]
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(ts)))
+    data = dict(timestamp=ts, open=close + 0.01, high=close + 0.2, low=close - 0.2, close=close,
+                volume=rng.integers(1, 100, len(ts)).astype(float), trade_count=np.ones(len(ts)), vwap=close)
+
+    whole = TimeframeStore(str(tmp_path / "whole"))
+    whole.base.append_columns("X", data)
+    whole.update(["X"])
+    # Fed a few minutes at a time, restarting (state rebuilt from files) halfway
+    chunked = TimeframeStore(str(tmp_path / "chunked"))
+    for i in range(0, len(ts), 7):
+        chunked.base.append_columns("X", {c: v[i:i + 7] for c, v in data.items()})
+        chunked.update(["X"])
+        if i == len(ts) // 14 * 7:
+            chunked = TimeframeStore(chunked.root)
+
+    frame = pd.DataFrame(data, index=pd.to_datetime(ts, unit="s", utc=True))
+    for minutes in TIMEFRAMES:
+        closed = whole.bars("X", minutes)
+        assert np.array_equal(chunked.bars("X", minutes)["close"], closed["close"])
+        bars = whole.bars("X", minutes, partial=True)
+        index = frame.index.tz_convert("America/New_York") if minutes == 1440 else frame.index
+        expected = frame.set_index(index).resample("1D" if minutes == 1440 else f"{minutes}min").agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna()
+        assert bars["timestamp"].tolist() == (expected.index.tz_convert("UTC").asi8 // 10 ** 9).tolist()
+        for column in ("open", "high", "low", "close", "volume"):
+            assert np.allclose(bars[column], expected[column].to_numpy())
+        # Only the bar still open at the last minute is left out of the files
+        assert len(closed) == len(expected) - 1
+
+
+def test_syncs_between_minute_boundaries_match_one_full_sync(tmp_path):
+    first = datetime(2024, 6, 3, 13, 0, 20, tzinfo=timezone.utc)
+    last = first + timedelta(hours=3, seconds=15)
+    lookback = timedelta(hours=2)
+
+    incremental = TimeframeStore(str(tmp_path / "incremental"))
+    end = first
+    incremental.sync(["X"], MinuteData(), lookback=lookback, end=end)
+    while end < last:
+        # Uneven steps, never on a minute boundary
+        end = min(end + timedelta(minutes=7, seconds=31), last)
+        incremental.sync(["X"], MinuteData(), lookback=lookback, end=end)
+
+    whole = TimeframeStore(str(tmp_path / "whole"))
+    whole.sync(["X"], MinuteData(), lookback=lookback + (last - first), end=last)
+
+    minutes = incremental.base.columns("X")["timestamp"]
+    assert (np.diff(minutes) == 60).all()
+    assert minutes[-1] == int(last.timestamp()) // 60 * 60 - 60
+    assert len(incremental.store(60).columns("X")["timestamp"]) >= 4
+    for timeframe in (1,) + tuple(TIMEFRAMES):
+        ours, theirs = incremental.store(timeframe).columns("X"), whole.store(timeframe).columns("X")
+        for column in ("timestamp", "open", "high", "low", "close", "volume"):
+            assert np.array_equal(ours[column], theirs[column]), (timeframe, column)